@@ -2,41 +2,44 @@ import os
 import logging
 import time
 import json
-from flask import Flask, request, jsonify, Response
+from flask import Flask, Blueprint, current_app, request, jsonify, Response, stream_with_context, send_file
 from flask_cors import CORS
 from pydantic import ValidationError
 from dotenv import load_dotenv
-from requests import HTTPError
 
 from models import db, Recipe, RecipeIngredient
-from services.recipes import recommend_recipes, get_shopping_missing
-from services.places import search_restaurants, geocode_address
+from services.recipes import recommend_recipes, get_shopping_missing, get_shopping_plan
+from services.search import ensure_search_index, search_recipes
+from services.places import iter_restaurant_search, geocode_address
 from services.webrecipes import discover_recipes_from_web
 from services.vision import debug_detect_all
-from flask import request, jsonify
+from services.jobs import get_queue, find_job, all_stats, drain_all, QueueFull
+from services.clients import connection_stats
+from services.catalog import promote_cached_web_recipes
+from services.database import add_missing_columns, cache_writer, configure_database, enable_incremental_vacuum
+from services.metrics import init_request_metrics, render_metrics
+from services.profiling import check_admin_token, init_profiling, list_profiles, profile_path, sampler
+from services.photos import get_photo, PhotoError, PHOTO_MAX_AGE
+from services.webcache import compactor, ensure_unique_keys, web_cache_stats
 
 from schemas.dto import (
-    RecognizeResponse, RecommendRequest, RecommendResponse,
-    ShoppingListRequest, ShoppingListResponse
+    RecommendRequest, RecommendResponse,
+    RecipeSearchResponse, ShoppingListRequest, ShoppingListResponse,
+    ShoppingPlanRequest, ShoppingPlanResponse
 )
 
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
-os.makedirs(app.instance_path, exist_ok=True)
-os.makedirs('generated_videos', exist_ok=True)
+from services.cooking_guide import cooking_guide_bp, shutdown_render_pool, VIDEO_DIR
 
-from services.cooking_guide import cooking_guide_bp
-app.register_blueprint(cooking_guide_bp)
+api = Blueprint("api", __name__)
 
-db_path = os.path.join(app.instance_path, "smartcuisine.db")
-
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["MAX_CONTENT_LENGTH"] = 5 * 1024 * 1024
-
-db.init_app(app)
+# Bounded pool for async image recognition (Vision + optional Claude fallback)
+recognition_jobs = get_queue(
+    "recognition",
+    max_workers=int(os.getenv("RECOGNITION_WORKERS", "4")),
+    max_pending=int(os.getenv("RECOGNITION_MAX_PENDING", "64")),
+)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
@@ -55,7 +58,7 @@ def init_data():
     if Recipe.query.first():
         return
 
-    app.logger.info("Initializing database with seed data...")
+    current_app.logger.info("Initializing database with seed data...")
     seeds = [
         {
             "name": "Tomato Egg Stir-Fry",
@@ -90,21 +93,97 @@ def init_data():
             db.session.add(RecipeIngredient(recipe_id=r.id, name=ing_name, qty=qty))
 
     db.session.commit()
-    app.logger.info("Database seeded!")
+    current_app.logger.info("Database seeded!")
 
 
-with app.app_context():
-    db.create_all()
-    init_data()
+def create_app(config=None):
+    """
+    Application factory. `python app.py` runs the dev server; production
+    runs gunicorn with gunicorn.conf.py, which calls this.
+
+    Building the app does not touch the database; run init_db() once per
+    deployment (gunicorn does it in the master, `flask --app app init-db`
+    by hand).
+    """
+    app = Flask(__name__)
+    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    os.makedirs(app.instance_path, exist_ok=True)
+    VIDEO_DIR.mkdir(parents=True, exist_ok=True)
+
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["MAX_CONTENT_LENGTH"] = 5 * 1024 * 1024
+    if config:
+        app.config.update(config)
+
+    configure_database(app)
+    compactor.init_app(app)
+    init_request_metrics(app)
+    init_profiling(app)
+    app.register_blueprint(api)
+    app.register_blueprint(cooking_guide_bp)
+
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create tables and insert the seed recipes."""
+        init_db(app)
+
+    @app.cli.command("promote-web-cache")
+    def promote_web_cache_command():
+        """Promote the recipes in web_recipe_cache into the local catalog."""
+        counts = promote_cached_web_recipes()
+        print(", ".join(f"{n} {outcome}" for outcome, n in counts.items()))
+
+    @app.cli.command("compact-web-cache")
+    def compact_web_cache_command():
+        """Drop expired / duplicate web cache rows, enforce the size cap, vacuum."""
+        print(json.dumps(compactor.run_once()))
+
+    return app
+
+
+def init_db(app):
+    """Create missing tables and columns and seed an empty database (idempotent)."""
+    with app.app_context():
+        db.create_all()
+        add_missing_columns()
+        ensure_unique_keys()
+        init_data()
+        ensure_search_index()
+        enable_incremental_vacuum()
+        # Don't hand pooled SQLite connections to forked workers
+        db.engine.dispose()
+
+
+def drain_background_work(timeout: float = 60.0):
+    """
+    Stop accepting background jobs, wait up to `timeout` seconds for queued
+    and running ones (recognition, video renders) to finish, then stop the
+    render and slide process pools. Called from gunicorn's worker_exit hook.
+    Queued cache writes and sampled profiler stacks are flushed as well, and
+    the web cache compactor is stopped.
+    """
+    logger = logging.getLogger(__name__)
+    remaining = drain_all(timeout)
+    unfinished = sum(remaining.values())
+    if unfinished:
+        logger.warning("Shutting down with %d unfinished background jobs: %s", unfinished, remaining)
+    else:
+        logger.info("Background jobs drained")
+    shutdown_render_pool(wait=not unfinished)
+    left = cache_writer.flush(timeout=10.0)
+    if left:
+        logger.warning("Dropping %d unwritten cache entries", left)
+    sampler.stop()
+    compactor.stop()
 
 # --- Routes ---
 
 
-@app.get("/health")
+@api.get("/health")
 def health():
     return ok({"status": "ok", "db": "connected"})
 
-@app.post("/api/ingredients/recognize")
+@api.post("/api/ingredients/recognize")
 def recognize_ingredients():
     if "image" not in request.files:
         return jsonify({"error": "No image uploaded"}), 400
@@ -115,25 +194,132 @@ def recognize_ingredients():
         return jsonify({"error": "Empty filename"}), 400
 
     image_bytes = file.read()
+
+    # ?async=1 (or an "async" form field) returns a job id right away instead
+    # of holding this worker for the Vision/Claude round trips.
+    if _truthy(request.args.get("async") or request.form.get("async")):
+        try:
+            job = recognition_jobs.submit("recognition", _recognition_job, image_bytes)
+        except QueueFull as e:
+            return err("BUSY", str(e), 503)
+        return ok(
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/api/jobs/{job.id}",
+                "events_url": f"/api/jobs/{job.id}/events",
+            },
+            202,
+        )
+
     result = debug_detect_all(image_bytes)
 
     return jsonify(result)
 
-@app.post("/api/ingredients/recognize")
-def recognize():
-    """
-    Recognize ingredients from an uploaded image or from a mock hint string.
-    """
-    if "image" in request.files:
-        f = request.files["image"]
-        data = recognize_from_file(f)
-    else:
-        hint = (request.json or {}).get("mock_image_hint", "") if request.is_json else ""
-        data = recognize_from_hint(hint)
-    return ok(RecognizeResponse(**data).model_dump())
 
+def _truthy(value) -> bool:
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _recognition_job(job, image_bytes: bytes):
+    # Vision / Claude timings land directly in job.stages
+    return debug_detect_all(image_bytes, timings=job.stages)
+
+
+@api.get("/api/upstreams/stats")
+def upstreams_stats():
+    """Per-upstream request counts vs. connections opened (keep-alive reuse)."""
+    return ok({"upstreams": connection_stats()})
+
+
+@api.get("/metrics")
+def metrics():
+    """Prometheus text exposition: route latency, upstream calls, stages, caches, jobs."""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def _require_admin():
+    if not check_admin_token(request.headers.get("X-Admin-Token")):
+        return err("FORBIDDEN", "admin token required", 403)
+    return None
+
+
+@api.get("/api/admin/profiles")
+def admin_profiles():
+    """Stored single-request profiles and the routes with sampled stacks."""
+    denied = _require_admin()
+    if denied:
+        return denied
+    return ok({"profiles": list_profiles(), "samples": sampler.routes()})
+
+
+@api.get("/api/admin/profiles/<profile_id>")
+def admin_profile(profile_id):
+    """Download one cProfile dump (pstats / snakeviz format)."""
+    denied = _require_admin()
+    if denied:
+        return denied
+    path = profile_path(profile_id)
+    if path is None:
+        return err("NOT_FOUND", "profile not found", 404)
+    return send_file(path, mimetype="application/octet-stream", as_attachment=True, download_name=path.name)
+
+
+@api.get("/api/admin/profiles/samples/<route>")
+def admin_samples(route):
+    """Aggregated sampled stacks for one route, in folded-stack format."""
+    denied = _require_admin()
+    if denied:
+        return denied
+    return Response(sampler.folded(route), mimetype="text/plain")
+
+
+@api.get("/api/admin/web-cache")
+def admin_web_cache():
+    """web_recipe_cache size, rows, average age, hit rate and the last compaction."""
+    denied = _require_admin()
+    if denied:
+        return denied
+    return ok(web_cache_stats())
+
+
+@api.post("/api/admin/web-cache/compact")
+def admin_web_cache_compact():
+    """Run a web_recipe_cache compaction now."""
+    denied = _require_admin()
+    if denied:
+        return denied
+    return ok(compactor.run_once())
+
+
+@api.get("/api/jobs/stats")
+def jobs_stats():
+    """Queue depth and average per-stage timings for every job queue."""
+    return ok({"queues": all_stats()})
+
+
+@api.get("/api/jobs/<job_id>")
+def job_status(job_id):
+    job = find_job(job_id)
+    if not job:
+        return err("NOT_FOUND", "job not found", 404)
+    return ok(job.to_dict())
 
-@app.post("/api/recipes/recommend")
+
+@api.get("/api/jobs/<job_id>/events")
+def job_events(job_id):
+    """Stream job progress as Server-Sent Events until it finishes."""
+    job = find_job(job_id)
+    if not job:
+        return err("NOT_FOUND", "job not found", 404)
+    return Response(
+        job.events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api.post("/api/recipes/recommend")
 def recommend():
     """
     Recommend local recipes based on pantry ingredients.
@@ -147,7 +333,32 @@ def recommend():
     return ok(RecommendResponse(recipes=results).model_dump())
 
 
-@app.post("/api/shopping-list")
+@api.get("/api/recipes/search")
+def search_local():
+    """
+    Full-text search over local recipes (name, cuisine, ingredients, steps).
+    Query: q, cuisine (exact, optional), match=all|any (default all), limit.
+    Every term also matches as a prefix ("tom" finds "tomato").
+    """
+    q = (request.args.get("q") or "").strip()
+    cuisine = (request.args.get("cuisine") or "").strip()
+    match = request.args.get("match", "all")
+    if not q and not cuisine:
+        return err(message="q or cuisine query parameter required")
+    if match not in ("all", "any"):
+        return err(message="match must be 'all' or 'any'")
+    try:
+        limit = int(request.args.get("limit", "20"))
+    except ValueError:
+        return err(message="limit must be an integer")
+
+    t0 = time.perf_counter()
+    recipes = search_recipes(q, cuisine or None, match, limit)
+    took_ms = round((time.perf_counter() - t0) * 1000, 2)
+    return ok(RecipeSearchResponse(recipes=recipes, took_ms=took_ms).model_dump())
+
+
+@api.post("/api/shopping-list")
 def shopping_list():
     """
     Compute missing ingredients for a selected recipe given the user's pantry.
@@ -164,7 +375,27 @@ def shopping_list():
     return ok(ShoppingListResponse(missing=missing).model_dump())
 
 
-@app.post("/api/recipes/search-web")
+@api.post("/api/shopping-list/batch")
+def shopping_list_batch():
+    """
+    One merged shopping list for many recipes (e.g. a weekly plan): the
+    ingredients of every recipe in recipe_ids that are not in the pantry,
+    with amounts converted and summed per ingredient. Unknown ids are
+    returned in missing_recipe_ids.
+    """
+    try:
+        payload = ShoppingPlanRequest(**(request.get_json(silent=True) or {}))
+    except ValidationError as e:
+        return err(message=e.errors()[0]["msg"])
+
+    items, missing_ids = get_shopping_plan(payload.recipe_ids, payload.ingredients)
+    if missing_ids and len(missing_ids) == len(set(payload.recipe_ids)):
+        return err("NOT_FOUND", "recipes not found", 404)
+
+    return ok(ShoppingPlanResponse(items=items, missing_recipe_ids=missing_ids).model_dump())
+
+
+@api.post("/api/recipes/search-web")
 def search_web():
     """
     Search recipes from the web using Google Custom Search.
@@ -183,6 +414,8 @@ def search_web():
     if not ingredients:
         return err("BAD_REQUEST", "ingredients required")
 
+    from requests import HTTPError
+
     try:
         # Use a small limit here; discover_recipes_from_web will also
         # read/write from cache to save quota.
@@ -193,23 +426,34 @@ def search_web():
             start=start,
         )
     except HTTPError as e:
-        app.logger.error("search_web HTTPError: %s", e)
+        current_app.logger.error("search_web HTTPError: %s", e)
         # When Google quota is exceeded we gracefully return an empty list
         items = []
     except Exception as e:
-        app.logger.error("search_web failed: %s", e)
+        current_app.logger.error("search_web failed: %s", e)
         items = []
 
     return ok({"items": items})
 
 
-@app.get("/api/restaurants/search")
+@api.get("/api/restaurants/search")
 def restaurants():
     """
     Search nearby restaurants using Google Places API.
     Query: cuisine, lat, lng, radius (meters, 500–50000, default 2000).
+
+    cuisine may be repeated or comma-separated ("Italian,Thai,Japanese");
+    pages (1–3) follows Places nextPageToken. Cuisines are fetched
+    concurrently and merged/deduped by place_id. With stream=1 the rows are
+    sent as Server-Sent Events, one "cuisine" event per cuisine as it
+    arrives and a final "done" event with the merged ranking.
     """
-    cuisine = request.args.get("cuisine", "Italian")
+    cuisines = [
+        c.strip()
+        for raw in (request.args.getlist("cuisine") or ["Italian"])
+        for c in raw.split(",")
+        if c.strip()
+    ] or ["Italian"]
     try:
         lat = float(request.args.get("lat", "41.76"))
         lng = float(request.args.get("lng", "-72.67"))
@@ -221,19 +465,68 @@ def restaurants():
     except ValueError:
         radius = 2000
 
-    payload = search_restaurants(cuisine, lat, lng, radius=radius)
+    try:
+        pages = int(request.args.get("pages", "1"))
+    except ValueError:
+        pages = 1
+
+    location = {"lat": lat, "lng": lng, "radius_m": radius}
+    events = iter_restaurant_search(cuisines, lat, lng, radius=radius, pages=pages)
+
+    if _truthy(request.args.get("stream")):
+        def generate():
+            for event in events:
+                if event["event"] == "done":
+                    event = dict(event, cuisines=cuisines, location=location)
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    payload = {}
+    for payload in events:
+        pass
+
+    cache = payload.get("cache") or {}
     return ok(
         {
-            "cuisine": cuisine,
-            "location": {"lat": lat, "lng": lng, "radius_m": radius},
+            "cuisine": ",".join(cuisines),
+            "cuisines": cuisines,
+            "location": location,
             "results": payload.get("results", []),
             "places_status": payload.get("status"),
             "places_error_message": payload.get("error_message") or "",
+            "places_cache": next(iter(cache.values())) if len(cache) == 1 else cache,
         }
     )
 
 
-@app.get("/api/geocode")
+@api.get("/api/places/photo/<photo_id>")
+def place_photo(photo_id):
+    """
+    Serve a restaurant photo thumbnail from the local cache (fetched from
+    Places once). Query: w (thumbnail width, snapped to 160/400/800).
+    """
+    try:
+        width = int(request.args.get("w", "400"))
+    except ValueError:
+        width = 400
+
+    try:
+        path, mimetype, etag = get_photo(photo_id, width, request.headers.get("Accept", ""))
+    except PhotoError as e:
+        return err("PHOTO_ERROR", str(e), e.status)
+
+    resp = send_file(path, mimetype=mimetype, etag=etag, conditional=True, max_age=PHOTO_MAX_AGE)
+    resp.headers["Cache-Control"] = f"public, max-age={PHOTO_MAX_AGE}"
+    resp.headers["Vary"] = "Accept"
+    return resp
+
+
+@api.get("/api/geocode")
 def geocode():
     """Resolve a street address or place name to coordinates (Geocoding API)."""
     address = (request.args.get("address") or "").strip()
@@ -250,14 +543,14 @@ def geocode():
     return ok(out)
 
 
-@app.get("/openapi.json")
+@api.get("/openapi.json")
 def openapi():
     spec_path = os.path.join(os.path.dirname(__file__), "openapi.json")
     with open(spec_path, "r", encoding="utf-8") as f:
         return jsonify(json.load(f))
 
 
-@app.get("/docs")
+@api.get("/docs")
 def docs():
     """
     Simple Swagger UI host page.
@@ -290,4 +583,6 @@ def docs():
 
 
 if __name__ == "__main__":
+    app = create_app()
+    init_db(app)
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5001)), debug=True)
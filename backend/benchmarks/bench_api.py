@@ -0,0 +1,301 @@
+"""
+End-to-end load test of every /api/* route against fake upstreams.
+
+Starts benchmarks/fake_upstream.py in-process and the backend under
+gunicorn (gunicorn.conf.py) with every upstream base URL pointed at it,
+on a throwaway copy of the database and empty photo/video caches. Each
+route is then driven by N keep-alive clients for --seconds at each
+concurrency level, and throughput plus p50/p95/p99 latency is reported.
+
+By default every request uses a fresh cache key (new address, tile,
+ingredient set, ...) so the upstream path is measured; --warm repeats one
+key so the cached path is measured instead.
+
+The job routes (job-status, job-events) read one cooking-guide job that is
+submitted and rendered to completion before they run, so job-events
+measures a stream that sends its "done" event and closes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --routes restaurants geocode --concurrency 1 8 32
+    python -m benchmarks.bench_api --routes recipes-search job-status job-events
+    python -m benchmarks.bench_api --warm --latency-scale 0
+    python -m benchmarks.bench_api --errors places=0.1 claude=0.05:529
+"""
+import argparse
+import io
+import itertools
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.fake_upstream import (
+    UpstreamConfig,
+    _parse_errors,
+    _parse_latency,
+    base_url_env,
+    start_fake_upstream,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CUISINES = ["Italian", "Mexican", "Thai", "Indian", "Japanese", "Greek", "French", "Korean"]
+PANTRY = ["tomato", "egg", "basil", "onion", "garlic", "cheese", "pepper", "rice", "chicken", "spinach"]
+
+
+def _image() -> bytes:
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", (640, 480), (200, 60, 40)).save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+
+def _pantry(i: int):
+    """A distinct ingredient combination per i (cycles after 2^10)."""
+    picked = [name for bit, name in enumerate(PANTRY) if (i >> bit) & 1]
+    return picked or PANTRY[:2]
+
+
+def _photo_path(i: int) -> str:
+    from services.photos import photo_proxy_path
+
+    # Fake places ids repeat every 20, photo refs never do
+    return photo_proxy_path(f"places/ChIJfake{i % 20:04d}bench/photos/AbenchPhoto{i}")
+
+
+# Filled in by _seed_job before a job route runs
+_JOB_ID = []
+JOB_ROUTES = ("job-status", "job-events")
+
+
+# route -> callable(i) returning (method, path, requests kwargs).
+# i is unique per request (or always 0 with --warm).
+ROUTES = {
+    "recommend": lambda i: ("POST", "/api/recipes/recommend", {"json": {"ingredients": _pantry(i)}}),
+    "shopping-list": lambda i: (
+        "POST", "/api/shopping-list", {"json": {"recipe_id": 1 + i % 3, "ingredients": _pantry(i)}},
+    ),
+    "shopping-list-batch": lambda i: (
+        "POST", "/api/shopping-list/batch",
+        {"json": {"recipe_ids": [1 + (i + k) % 3 for k in range(21)], "ingredients": _pantry(i)}},
+    ),
+    "search-web": lambda i: (
+        "POST", "/api/recipes/search-web",
+        {"json": {"ingredients": _pantry(i) + [f"spice{i}"], "cuisine": CUISINES[i % len(CUISINES)]}},
+    ),
+    "restaurants": lambda i: (
+        # ~1.5 km steps so each request lands in a new geohash tile
+        "GET", "/api/restaurants/search",
+        {"params": {"lat": 41.0 + (i // 100) * 0.015, "lng": -73.5 + (i % 100) * 0.015, "cuisine": "Italian"}},
+    ),
+    "geocode": lambda i: ("GET", "/api/geocode", {"params": {"address": f"{i} Main St, Hartford, CT"}}),
+    "places-photo": lambda i: ("GET", _photo_path(i), {"params": {"w": 400}}),
+    "recognize": lambda i: (
+        "POST", "/api/ingredients/recognize", {"files": {"image": ("pantry.jpg", _image(), "image/jpeg")}},
+    ),
+    "recipes-search": lambda i: (
+        "GET", "/api/recipes/search", {"params": {"q": " ".join(_pantry(i)[:3]), "match": "any"}},
+    ),
+    "upstreams-stats": lambda i: ("GET", "/api/upstreams/stats", {}),
+    "jobs-stats": lambda i: ("GET", "/api/jobs/stats", {}),
+    "job-status": lambda i: ("GET", f"/api/jobs/{_JOB_ID[0]}", {}),
+    "job-events": lambda i: ("GET", f"/api/jobs/{_JOB_ID[0]}/events", {}),
+    # Last: queues background video renders that keep the CPU busy afterwards
+    "cooking-guide": lambda i: (
+        "POST", "/api/generate-cooking-guide",
+        {"json": {"recipe_name": f"Bench Skillet {i}", "ingredients": _pantry(i), "steps": []}},
+    ),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_backend(port: int, env: dict) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+        cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"gunicorn exited with status {proc.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    _stop(proc)
+    raise SystemExit("gunicorn did not come up")
+
+
+def _stop(proc: subprocess.Popen):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=60)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def _seed_job(base: str):
+    """Submit one cooking-guide render and wait for it, for the job routes."""
+    resp = requests.post(
+        f"{base}/api/generate-cooking-guide",
+        json={"recipe_name": "Bench Job Seed", "ingredients": PANTRY[:3], "steps": []},
+        timeout=120,
+    )
+    job_id = resp.json().get("job_id")
+    if not job_id:
+        raise SystemExit(f"cooking guide returned no job_id (HTTP {resp.status_code})")
+    deadline = time.monotonic() + 300
+    while time.monotonic() < deadline:
+        if requests.get(f"{base}/api/jobs/{job_id}", timeout=10).json().get("finished_at"):
+            _JOB_ID[:] = [job_id]
+            return
+        time.sleep(0.5)
+    raise SystemExit(f"job {job_id} did not finish")
+
+
+def _percentile(sorted_values, p: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))] * 1000
+
+
+def _load(base: str, route: str, clients: int, seconds: float, counter, warm: bool):
+    make = ROUTES[route]
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def client():
+        session = requests.Session()
+        mine, failed = [], 0
+        while time.monotonic() < stop_at:
+            method, path, kwargs = make(0 if warm else next(counter))
+            t0 = time.perf_counter()
+            try:
+                resp = session.request(method, base + path, timeout=120, **kwargs)
+                if resp.status_code >= 400:
+                    failed += 1
+            except requests.RequestException:
+                failed += 1
+            mine.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        _percentile(latencies, 0.50),
+        _percentile(latencies, 0.95),
+        _percentile(latencies, 0.99),
+        len(latencies),
+        errors[0],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", nargs="+", default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--warm", action="store_true", help="repeat one cache key per route")
+    parser.add_argument("--latency", nargs="*", metavar="NAME=MS", help="fake upstream median latency")
+    parser.add_argument("--errors", nargs="*", metavar="NAME=RATE[:STATUS]", help="fake upstream error rate")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--threads", type=int, help="GUNICORN_THREADS for the backend")
+    args = parser.parse_args()
+
+    try:
+        config = UpstreamConfig(
+            _parse_latency(args.latency), _parse_errors(args.errors), args.latency_scale, seed=1
+        )
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    upstream = start_fake_upstream(config=config)
+
+    workdir = tempfile.mkdtemp(prefix="bench-api-")
+    db_path = os.path.join(workdir, "smartcuisine.db")
+    source_db = os.path.join(BACKEND_DIR, "instance", "smartcuisine.db")
+    if os.path.exists(source_db):
+        shutil.copyfile(source_db, db_path)
+
+    port = _free_port()
+    env = dict(
+        os.environ,
+        **base_url_env(upstream.base_url),
+        PORT=str(port),
+        DATABASE_URL=f"sqlite:///{db_path}",
+        PHOTO_CACHE_DIR=os.path.join(workdir, "photo_cache"),
+        VIDEO_DIR=os.path.join(workdir, "videos"),
+        GOOGLE_API_KEY="bench-key",
+        GOOGLE_CSE_ID="bench-cx",
+        VISION_API_KEY="bench-key",
+        ANTHROPIC_API_KEY="bench-key",
+        NOMINATIM_MIN_INTERVAL="0",
+        GRACEFUL_TIMEOUT="10",
+        DRAIN_TIMEOUT="5",
+    )
+    if args.threads:
+        env["GUNICORN_THREADS"] = str(args.threads)
+
+    proc = _start_backend(port, env)
+    base = f"http://127.0.0.1:{port}"
+    counter = itertools.count(1)
+    try:
+        print(
+            f"{'warm' if args.warm else 'cold'} caches, {args.seconds:g} s per run, "
+            f"fake upstream latency x{args.latency_scale:g}"
+        )
+        header = (
+            f"{'route':>19} | {'conc':>4} | {'req/s':>7} | {'p50 ms':>7} | "
+            f"{'p95 ms':>7} | {'p99 ms':>7} | {'reqs':>5} | {'errors':>6}"
+        )
+        print(header)
+        print("-" * len(header))
+        for route in args.routes:
+            if route in JOB_ROUTES and not _JOB_ID:
+                _seed_job(base)
+            for clients in args.concurrency:
+                rps, p50, p95, p99, n, errors = _load(base, route, clients, args.seconds, counter, args.warm)
+                print(
+                    f"{route:>19} | {clients:>4} | {rps:7.1f} | {p50:7.1f} | "
+                    f"{p95:7.1f} | {p99:7.1f} | {n:>5} | {errors:>6}"
+                )
+        print()
+        print("upstream calls:", ", ".join(
+            f"{name}={row['requests']}" + (f" ({row['errors']} failed)" if row["errors"] else "")
+            for name, row in sorted(upstream.stats().items())
+        ))
+    finally:
+        _stop(proc)
+        upstream.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
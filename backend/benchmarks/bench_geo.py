@@ -0,0 +1,98 @@
+"""
+Benchmark restaurant distance filtering at 10k - 1M cached places.
+
+Compares, per query:
+- pure Python: _haversine_km in a loop (what _new_place_to_row used to do)
+- NumPy: haversine_km_vec over every point, then nearest-first k
+
+Usage (from backend/):
+    python -m benchmarks.bench_geo
+    python -m benchmarks.bench_geo --sizes 10000 100000 --queries 200
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from services.geo import haversine_km_vec
+from services.places import _haversine_km
+
+# Points spread over roughly a 200 km x 200 km metro area around Hartford, CT
+CENTER = (41.76, -72.67)
+SPREAD_DEG = 0.9
+
+
+def _points(n: int, rng: np.random.Generator):
+    lats = CENTER[0] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, n)
+    lngs = CENTER[1] + rng.uniform(-SPREAD_DEG, SPREAD_DEG, n)
+    return lats, lngs
+
+
+def _per_query_ms(fn, origins) -> float:
+    t0 = time.perf_counter()
+    for lat, lng in origins:
+        fn(lat, lng)
+    return (time.perf_counter() - t0) * 1000 / len(origins)
+
+
+def run(sizes, queries: int, radius_km: float, k: int, python_limit: int):
+    rng = np.random.default_rng(42)
+    random.seed(42)
+    origins = [
+        (CENTER[0] + random.uniform(-0.5, 0.5), CENTER[1] + random.uniform(-0.5, 0.5))
+        for _ in range(queries)
+    ]
+
+    header = f"{'places':>9} | {'python ms':>10} | {'numpy ms':>9} | {'knn ms':>7} | {'hits':>6}"
+    print(f"radius={radius_km} km, k={k}, {queries} queries per size")
+    print(header)
+    print("-" * len(header))
+
+    for n in sizes:
+        lats, lngs = _points(n, rng)
+        lat_list, lng_list = lats.tolist(), lngs.tolist()
+
+        # The pure-Python loop is slow; only time a few queries at large n
+        if n <= python_limit:
+            py_origins = origins[: max(1, min(queries, 20))]
+            py_ms = _per_query_ms(
+                lambda la, ln: [
+                    i for i in range(n)
+                    if _haversine_km(la, ln, lat_list[i], lng_list[i]) <= radius_km
+                ],
+                py_origins,
+            )
+            py_col = f"{py_ms:10.2f}"
+        else:
+            py_col = f"{'skipped':>10}"
+
+        hits = []
+        np_ms = _per_query_ms(
+            lambda la, ln: hits.append(
+                len(np.flatnonzero(haversine_km_vec(la, ln, lats, lngs) <= radius_km))
+            ),
+            origins,
+        )
+        knn_ms = _per_query_ms(
+            lambda la, ln: np.argpartition(haversine_km_vec(la, ln, lats, lngs), k - 1)[:k],
+            origins,
+        )
+
+        print(f"{n:>9} | {py_col} | {np_ms:9.3f} | {knn_ms:7.3f} | {sum(hits) // len(hits):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius-km", type=float, default=2.0)
+    parser.add_argument("-k", type=int, default=15)
+    parser.add_argument("--python-limit", type=int, default=100_000,
+                        help="skip the pure-Python loop above this many places")
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.radius_km, args.k, args.python_limit)
+
+
+if __name__ == "__main__":
+    main()
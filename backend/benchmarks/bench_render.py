@@ -0,0 +1,87 @@
+"""
+Benchmark tutorial video rendering: raw frames piped into ffmpeg vs. the
+temp-PNG + concat list path, for each encoding profile.
+
+Usage (from backend/, needs ffmpeg on PATH):
+    python -m benchmarks.bench_render
+    python -m benchmarks.bench_render --slides 6 --repeat 5 --workers 1
+    python -m benchmarks.bench_render --modes pipe --profiles still quality
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import services.cooking_guide as cg
+
+
+def _steps(n: int):
+    return [
+        {
+            "step_num": i + 1,
+            "title": f"Step {i + 1}: Prepare and cook",
+            "description": (
+                "Heat the pan over medium heat, add the oil and wait until it shimmers. "
+                "Add the vegetables and stir regularly so nothing sticks or burns. " * 2
+            ),
+            "duration_minutes": 5 + i,
+            "tips": "Prep everything before you turn on the heat.",
+            "tools": ["pan", "spatula", "knife"],
+        }
+        for i in range(n)
+    ]
+
+
+def run(slides: int, repeat: int, modes, profiles):
+    steps = _steps(slides)
+    out_dir = tempfile.mkdtemp(prefix="bench-render-")
+    print(f"{slides} slides, {repeat} runs per mode, SLIDE_RENDER_WORKERS={cg.SLIDE_RENDER_WORKERS}")
+    print(f"{'mode':>6} | {'profile':>8} | {'wall s':>7} | {'slides s':>8} | {'encode s':>8} | {'size KB':>8}")
+    print("-" * 61)
+
+    # Warm up fonts / the slide pool so neither mode pays process start-up
+    cg.create_video_from_steps("warmup", steps[:2], os.path.join(out_dir, "warmup.mp4"))
+
+    for mode in modes:
+        for profile in profiles:
+            walls, slide_t, encode_t = [], [], []
+            size = 0
+            for i in range(repeat):
+                out = os.path.join(out_dir, f"{mode}_{profile}_{i}.mp4")
+                timings = {}
+                t0 = time.perf_counter()
+                ok = cg.create_video_from_steps(
+                    "bench", steps, out, timings=timings, mode=mode, profile=profile
+                )
+                walls.append(time.perf_counter() - t0)
+                if not ok:
+                    raise SystemExit(f"{mode}/{profile} render failed")
+                slide_t.append(timings.get("slides", 0.0))
+                encode_t.append(timings.get("encode", 0.0))
+                size = os.path.getsize(out)
+
+            print(
+                f"{mode:>6} | {profile:>8} | {statistics.median(walls):7.2f} | "
+                f"{statistics.median(slide_t):8.3f} | {statistics.median(encode_t):8.2f} | "
+                f"{size / 1024:8.1f}"
+            )
+
+    cg.shutdown_render_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, help="override SLIDE_RENDER_WORKERS")
+    parser.add_argument("--modes", nargs="+", default=["files", "pipe"])
+    parser.add_argument("--profiles", nargs="+", default=list(cg.ENCODING_PROFILES))
+    args = parser.parse_args()
+    if args.workers:
+        cg.SLIDE_RENDER_WORKERS = args.workers
+    run(args.slides, args.repeat, args.modes, args.profiles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Throughput of the dev server (python app.py) vs. gunicorn (gunicorn.conf.py).
+
+Each server is started on a free port, then --clients threads hammer one
+endpoint over keep-alive connections for --seconds.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serving
+    python -m benchmarks.bench_serving --clients 64 --seconds 10 --scenario recommend
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "dev": [sys.executable, "app.py"],
+    "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+}
+
+SCENARIOS = {
+    "health": ("GET", "/health", None),
+    "recommend": ("POST", "/api/recipes/recommend", {"ingredients": ["tomato", "egg", "basil"]}),
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(name: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(port))
+    proc = subprocess.Popen(
+        SERVERS[name], cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        # own process group so the reloader child is stopped too
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    _stop(proc)
+    raise SystemExit(f"{name} server did not come up")
+
+
+def _stop(proc: subprocess.Popen):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def _load(port: int, scenario: str, clients: int, seconds: float):
+    method, path, body = SCENARIOS[scenario]
+    url = f"http://127.0.0.1:{port}{path}"
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def client():
+        session = requests.Session()
+        mine, failed = [], 0
+        while time.monotonic() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                resp = session.request(method, url, json=body, timeout=10)
+                if resp.status_code >= 400:
+                    failed += 1
+            except requests.RequestException:
+                failed += 1
+            mine.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return len(latencies) / elapsed, pct(0.50), pct(0.95), errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument("--scenario", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.clients} concurrent clients, {args.seconds:g} s per run")
+    print(f"{'server':>9} | {'scenario':>10} | {'req/s':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'errors':>6}")
+    print("-" * 62)
+    for name in args.servers:
+        port = _free_port()
+        proc = _start(name, port)
+        try:
+            for scenario in args.scenario:
+                rps, p50, p95, errors = _load(port, scenario, args.clients, args.seconds)
+                print(f"{name:>9} | {scenario:>10} | {rps:8.0f} | {p50:7.1f} | {p95:7.1f} | {errors:>6}")
+        finally:
+            _stop(proc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+Local stand-in for every upstream the backend calls, for load tests and
+offline development.
+
+Replays the recorded responses in benchmarks/fixtures/ with a lognormal
+latency per upstream and optional injected errors:
+
+    Google Vision      POST /v1/images:annotate
+    Places (New)       POST /v1/places:searchText, GET /v1/places/<id>/photos/<ref>/media
+    Geocoding          GET  /maps/api/geocode/json
+    Nominatim          GET  /search
+    Custom Search      GET  /customsearch/v1   (links point at /pages/<n> here)
+    recipe pages       GET  /pages/<n>
+    Anthropic          POST /v1/messages       (JSON, or SSE with "stream": true)
+    GET /stats         requests and injected errors per upstream
+
+Point the backend at it with the *_BASE_URL settings (all upstreams share
+one server, so they take the same URL):
+
+    PLACES_BASE_URL=http://127.0.0.1:8900 GEOCODING_BASE_URL=... \\
+    NOMINATIM_BASE_URL=... CSE_BASE_URL=... VISION_BASE_URL=... \\
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900
+
+Usage (from backend/):
+    python -m benchmarks.fake_upstream --port 8900
+    python -m benchmarks.fake_upstream --latency claude=4000 --errors places=0.05:503
+    python -m benchmarks.fake_upstream --latency-scale 0 # no added latency
+
+benchmarks/bench_api.py starts one in-process with start_fake_upstream().
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Median latency (ms) and lognormal sigma per upstream, roughly what the
+# real services took from a US-East dev box. "claude" is time to the first
+# token when streaming; the rest of the text then arrives in
+# CLAUDE_STREAM_CHUNKS chunks spread over CLAUDE_STREAM_MS.
+LATENCY = {
+    "vision": (350.0, 0.35),
+    "places": (280.0, 0.3),
+    "places_photo": (120.0, 0.4),
+    "geocoding": (110.0, 0.3),
+    "nominatim": (450.0, 0.5),
+    "cse": (380.0, 0.35),
+    "pages": (220.0, 0.6),
+    "claude": (900.0, 0.4),
+    "claude_haiku": (600.0, 0.3),
+}
+CLAUDE_STREAM_MS = 3000.0
+CLAUDE_STREAM_CHUNKS = 60
+
+# Padding added to recipe pages so parsing costs about what a real page does
+PAGE_PADDING_KB = 120
+
+
+class UpstreamConfig:
+    """Latency and error injection for one fake server; safe to mutate while it runs."""
+
+    def __init__(
+        self,
+        latency: Optional[Dict[str, float]] = None,
+        errors: Optional[Dict[str, Tuple[float, int]]] = None,
+        latency_scale: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = {name: median for name, (median, _) in LATENCY.items()}
+        self.latency.update(latency or {})
+        # upstream -> (probability, HTTP status)
+        self.errors: Dict[str, Tuple[float, int]] = dict(errors or {})
+        self.latency_scale = latency_scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, upstream: str) -> float:
+        """Seconds to wait before answering a call to `upstream`."""
+        median = self.latency.get(upstream, 0.0) * self.latency_scale
+        if median <= 0:
+            return 0.0
+        sigma = LATENCY.get(upstream, (0.0, 0.3))[1]
+        with self._lock:
+            return median / 1000.0 * math.exp(self._rng.gauss(0.0, sigma))
+
+    def injected_error(self, upstream: str) -> Optional[int]:
+        rate, status = self.errors.get(upstream, (0.0, 503))
+        if rate <= 0:
+            return None
+        with self._lock:
+            return status if self._rng.random() < rate else None
+
+
+class Fixtures:
+    def __init__(self, directory: str = FIXTURES_DIR):
+        def load(name):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                return f.read()
+
+        self.vision = json.loads(load("vision.json"))
+        self.places = json.loads(load("places.json"))["places"]
+        self.geocode = json.loads(load("geocode.json"))
+        self.nominatim = json.loads(load("nominatim.json"))
+        self.cse = load("cse.json")
+        self.claude_steps = json.loads(load("claude_steps.json"))
+        padding = "\n".join(
+            f"<p>Step note {i}: stir occasionally and taste for seasoning as you go.</p>"
+            for i in range(PAGE_PADDING_KB * 1024 // 72)
+        )
+        self.recipe_page = load("recipe_page.html").replace("{padding}", padding)
+        self.photo = _make_photo()
+
+
+def _make_photo() -> bytes:
+    """An 800x600 JPEG with some texture, standing in for a Places photo."""
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (800, 600), (180, 90, 40))
+    draw = ImageDraw.Draw(img)
+    rng = random.Random(7)
+    for _ in range(400):
+        x, y = rng.randrange(800), rng.randrange(600)
+        r = rng.randrange(4, 40)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+
+_PHOTO_MEDIA_RE = re.compile(r"^/v1/places/[^/]+/photos/[^/]+/media$")
+_PAGE_RE = re.compile(r"^/pages/(\d+)$")
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeUpstreamServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- plumbing ---
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, payload: Any, status: int = 200):
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def _upstream(self, name: str) -> bool:
+        """Count the call, sleep its latency and maybe fail it. False = error already sent."""
+        server = self.server
+        server.count(name)
+        time.sleep(server.config.delay(name))
+        status = server.config.injected_error(name)
+        if status is None:
+            return True
+        server.count(name, error=True)
+        if name.startswith("claude"):
+            kind = "overloaded_error" if status == 529 else "api_error"
+            self._json({"type": "error", "error": {"type": kind, "message": "injected by fake_upstream"}}, status)
+        else:
+            self._json({"error": {"code": status, "message": "injected by fake_upstream", "status": "UNAVAILABLE"}}, status)
+        return False
+
+    # --- routes ---
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        fx = self.server.fixtures
+
+        if url.path == "/stats":
+            return self._json(self.server.stats())
+        if _PHOTO_MEDIA_RE.match(url.path):
+            if self._upstream("places_photo"):
+                self._send(200, fx.photo, "image/jpeg")
+            return
+        if url.path == "/maps/api/geocode/json":
+            if self._upstream("geocoding"):
+                self._json(fx.geocode)
+            return
+        if url.path == "/search":
+            if self._upstream("nominatim"):
+                self._json(fx.nominatim)
+            return
+        if url.path == "/customsearch/v1":
+            if self._upstream("cse"):
+                body = fx.cse.replace("{base}", self.server.base_url)
+                items = json.loads(body)["items"]
+                num = int((query.get("num") or ["10"])[0])
+                self._json({"items": items[:num]})
+            return
+        match = _PAGE_RE.match(url.path)
+        if match:
+            if self._upstream("pages"):
+                html = fx.recipe_page.replace("{n}", match.group(1))
+                self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+            return
+        self._json({"error": {"code": 404, "message": f"no fake for GET {url.path}"}}, 404)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        raw = self._body()
+        fx = self.server.fixtures
+
+        if url.path == "/v1/images:annotate":
+            if self._upstream("vision"):
+                self._json(fx.vision)
+            return
+        if url.path == "/v1/places:searchText":
+            if self._upstream("places"):
+                self._json({"places": _places_around(fx.places, json.loads(raw or b"{}"))})
+            return
+        if url.path == "/v1/messages":
+            return self._messages(json.loads(raw or b"{}"))
+        self._json({"error": {"code": 404, "message": f"no fake for POST {url.path}"}}, 404)
+
+    def _messages(self, body: Dict[str, Any]):
+        model = body.get("model") or "claude"
+        # The vision fallback uses Haiku and expects a comma separated list
+        if "haiku" in model:
+            upstream, text = "claude_haiku", "tomato, onion, bell pepper"
+        else:
+            upstream, text = "claude", json.dumps(self.server.fixtures.claude_steps, indent=2)
+        if not self._upstream(upstream):
+            return
+        if body.get("stream"):
+            return self._stream_message(model, text)
+        self._json(
+            {
+                "id": f"msg_{uuid.uuid4().hex[:24]}",
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": 350, "output_tokens": len(text) // 4},
+            }
+        )
+
+    def _stream_message(self, model: str, text: str):
+        """Anthropic Messages SSE: the text arrives in chunks over CLAUDE_STREAM_MS."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        # No Content-Length: end of stream is end of connection
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(kind: str, payload: Dict[str, Any]):
+            payload = {"type": kind, **payload}
+            self.wfile.write(f"event: {kind}\ndata: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event("message_start", {"message": {
+            "id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant",
+            "model": model, "content": [], "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": 350, "output_tokens": 1},
+        }})
+        event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+        size = max(1, math.ceil(len(text) / CLAUDE_STREAM_CHUNKS))
+        pause = CLAUDE_STREAM_MS * self.server.config.latency_scale / 1000.0 / CLAUDE_STREAM_CHUNKS
+        for i in range(0, len(text), size):
+            event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": text[i:i + size]}})
+            time.sleep(pause)
+        event("content_block_stop", {"index": 0})
+        event("message_delta", {"delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                "usage": {"output_tokens": len(text) // 4}})
+        event("message_stop", {})
+
+
+def _places_around(places, body: Dict[str, Any]):
+    """Recorded places moved to the request's circle center (fixture locations are offsets)."""
+    circle = ((body.get("locationBias") or {}).get("circle") or {}).get("center") or {}
+    lat = float(circle.get("latitude", 41.76))
+    lng = float(circle.get("longitude", -72.67))
+    limit = int(body.get("maxResultCount") or body.get("pageSize") or 20)
+    out = []
+    for place in places[:limit]:
+        loc = place["location"]
+        out.append({**place, "location": {"latitude": lat + loc["latitude"], "longitude": lng + loc["longitude"]}})
+    return out
+
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once
+    request_queue_size = 256
+
+    def __init__(self, address, config: UpstreamConfig, fixtures: Fixtures):
+        super().__init__(address, FakeUpstreamHandler)
+        self.config = config
+        self.fixtures = fixtures
+        self.base_url = f"http://{self.server_address[0]}:{self.server_address[1]}"
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._counts_lock = threading.Lock()
+
+    def count(self, upstream: str, error: bool = False):
+        with self._counts_lock:
+            row = self._counts.setdefault(upstream, {"requests": 0, "errors": 0})
+            row["errors" if error else "requests"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._counts_lock:
+            return {name: dict(row) for name, row in self._counts.items()}
+
+
+def start_fake_upstream(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    config: Optional[UpstreamConfig] = None,
+    fixtures_dir: str = FIXTURES_DIR,
+) -> FakeUpstreamServer:
+    """Serve in a daemon thread; returns the server (base_url, stats(), shutdown())."""
+    server = FakeUpstreamServer((host, port), config or UpstreamConfig(), Fixtures(fixtures_dir))
+    threading.Thread(target=server.serve_forever, name="fake-upstream", daemon=True).start()
+    return server
+
+
+def base_url_env(base_url: str) -> Dict[str, str]:
+    """Environment pointing every upstream of the backend at `base_url`."""
+    return {
+        "PLACES_BASE_URL": base_url,
+        "GEOCODING_BASE_URL": base_url,
+        "NOMINATIM_BASE_URL": base_url,
+        "CSE_BASE_URL": base_url,
+        "VISION_BASE_URL": base_url,
+        "ANTHROPIC_BASE_URL": base_url,
+    }
+
+
+def _parse_latency(values) -> Dict[str, float]:
+    out = {}
+    for item in values or []:
+        name, _, ms = item.partition("=")
+        if name not in LATENCY or not ms:
+            raise argparse.ArgumentTypeError(f"--latency expects one of {sorted(LATENCY)}=<ms>, got {item!r}")
+        out[name] = float(ms)
+    return out
+
+
+def _parse_errors(values) -> Dict[str, Tuple[float, int]]:
+    out = {}
+    for item in values or []:
+        name, _, spec = item.partition("=")
+        rate, _, status = spec.partition(":")
+        if name not in LATENCY or not rate:
+            raise argparse.ArgumentTypeError(f"--errors expects one of {sorted(LATENCY)}=<rate>[:status], got {item!r}")
+        out[name] = (float(rate), int(status or (529 if name.startswith("claude") else 503)))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", nargs="*", metavar="NAME=MS", help="median latency per upstream")
+    parser.add_argument("--errors", nargs="*", metavar="NAME=RATE[:STATUS]", help="injected error rate per upstream")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiply every latency (0 = none)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    try:
+        config = UpstreamConfig(_parse_latency(args.latency), _parse_errors(args.errors), args.latency_scale, args.seed)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    server = FakeUpstreamServer((args.host, args.port), config, Fixtures(args.fixtures))
+    print(f"fake upstreams on {server.base_url}")
+    for name, value in sorted(base_url_env(server.base_url).items()):
+        print(f"  {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cold-start report for the backend: wall time of `import app` +
+create_app() in a fresh interpreter, plus the slowest packages from
+python -X importtime.
+
+Exits non-zero when startup exceeds --budget-ms or when an SDK that is
+supposed to load lazily (LAZY_PACKAGES) was imported at startup, so it can
+guard worker boot time in CI.
+
+Usage (from backend/):
+    python -m benchmarks.startup_report
+    python -m benchmarks.startup_report --top 15 --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only loaded on first use (LLM calls, outbound HTTP, page scraping,
+# distance ranking, slide rendering)
+LAZY_PACKAGES = ("anthropic", "requests", "urllib3", "bs4", "numpy", "PIL")
+
+_PROBE = (
+    "import time; t0 = time.perf_counter(); import app; t1 = time.perf_counter(); "
+    "app.create_app(); t2 = time.perf_counter(); "
+    "print(f'{(t1 - t0) * 1000:.1f} {(t2 - t1) * 1000:.1f}')"
+)
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def measure():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    import_ms, factory_ms = (float(x) for x in proc.stdout.split()[-2:])
+
+    # Sum each package's own import time (self us), so nested modules count once
+    per_package = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            per_package[m.group(4).split(".")[0]] += int(m.group(1))
+    return import_ms, factory_ms, per_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    import_ms, factory_ms, per_package = measure()
+    total_ms = import_ms + factory_ms
+    print(f"import app:   {import_ms:8.1f} ms")
+    print(f"create_app(): {factory_ms:8.1f} ms")
+    print(f"total:        {total_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print()
+    print(f"{'package':<24} {'self ms':>8}")
+    for name, us in sorted(per_package.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"{name:<24} {us / 1000:8.1f}")
+
+    failed = False
+    eager = [name for name in LAZY_PACKAGES if name in per_package]
+    if eager:
+        print(f"\nFAIL: imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"\nFAIL: startup took {total_ms:.0f} ms, budget is {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Production server settings: gunicorn -c gunicorn.conf.py
+
+Requests mostly wait on upstreams (Vision, Places, Claude, recipe sites),
+so each worker process runs a pool of threads (gthread) rather than one
+request at a time. CPU-heavy video rendering already runs in its own
+process pool.
+
+Background job state (/api/jobs/<id>) lives in process memory, so keep
+WEB_CONCURRENCY=1 unless the load balancer pins a client to one worker;
+scale with GUNICORN_THREADS first.
+"""
+import os
+import time
+
+wsgi_app = "app:create_app()"
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+# gthread workers heartbeat from their main loop, so long SSE streams and
+# slow upstream calls do not trip this
+timeout = 60
+keepalive = 5
+
+# On SIGTERM the arbiter waits graceful_timeout before SIGKILL. Within that
+# window the worker finishes in-flight requests, then worker_exit drains
+# background jobs for up to DRAIN_TIMEOUT seconds.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "120"))
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "90"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    # One-time DB bootstrap in the master, before any worker is forked
+    from app import create_app, init_db
+
+    init_db(create_app())
+
+
+def post_fork(server, worker):
+    worker.boot_started = time.perf_counter()
+
+
+def post_worker_init(worker):
+    worker.log.info(
+        "Worker %s booted in %.0f ms",
+        worker.pid, (time.perf_counter() - worker.boot_started) * 1000,
+    )
+
+
+def worker_exit(server, worker):
+    from app import drain_background_work
+
+    drain_background_work(timeout=DRAIN_TIMEOUT)
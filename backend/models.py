@@ -18,7 +18,8 @@ class Recipe(db.Model):
     Local recipe stored in SQLite.
 
     This is used for fast, offline recommendations based on a small
-    curated set of recipes.
+    curated set of recipes, plus web recipes promoted from search results
+    (services/catalog.py), which carry the canonical URL they came from.
     """
     __tablename__ = "recipes"
 
@@ -27,6 +28,8 @@ class Recipe(db.Model):
     cuisine = db.Column(db.String(50))
     # Free-text cooking steps / instructions
     steps = db.Column(db.Text)
+    # Canonical page URL for promoted web recipes; NULL for the seed recipes
+    source_url = db.Column(db.String(500), unique=True, index=True, nullable=True)
 
     # One-to-many relationship to recipe ingredients
     ingredients = db.relationship(
@@ -43,6 +46,7 @@ class Recipe(db.Model):
             "name": self.name,
             "cuisine": self.cuisine,
             "steps": self.steps,
+            "source_url": self.source_url,
             "required_ingredients": [i.name for i in self.ingredients],
         }
 
@@ -59,7 +63,7 @@ class RecipeIngredient(db.Model):
     __tablename__ = "recipe_ingredients"
 
     id = db.Column(db.Integer, primary_key=True)
-    recipe_id = db.Column(db.Integer, db.ForeignKey("recipes.id"), nullable=False)
+    recipe_id = db.Column(db.Integer, db.ForeignKey("recipes.id"), nullable=False, index=True)
     name = db.Column(db.String(50), nullable=False)
     qty = db.Column(db.String(50))
 
@@ -70,8 +74,13 @@ class WebRecipeCache(db.Model):
 
     We store:
     - key: normalized ingredients + optional cuisine
-    - items_json: JSON string of the recipe list we got from Google
+    - payload: zlib-compressed JSON of the recipe list we got from Google
+    - items_json: the same list as plain JSON, only in rows written before
+      payload existed (empty otherwise; compaction converts them)
     - created_at: when this cache entry was created/updated
+    - last_accessed_at: last cache hit, for LRU eviction
+
+    services/webcache.py reads and writes the payloads and compacts the table.
 
     Later, discover_recipes_from_web() will:
     - read from this table before calling Google
@@ -80,8 +89,80 @@ class WebRecipeCache(db.Model):
     __tablename__ = "web_recipe_cache"
 
     id = db.Column(db.Integer, primary_key=True)
-    # Normalized key, e.g. "beef,egg,tomato|italian"
-    key = db.Column(db.String(255), nullable=False, index=True)
-    # JSON string (list[dict]) representing the web recipes
-    items_json = db.Column(db.Text, nullable=False)
+    # Normalized key, e.g. "beef,egg,tomato|italian"; one row per key
+    key = db.Column(db.String(255), nullable=False, unique=True, index=True)
+    # zlib(JSON list[dict]) representing the web recipes
+    payload = db.Column(db.LargeBinary, nullable=True)
+    # Legacy uncompressed JSON; "" when payload is set
+    items_json = db.Column(db.Text, nullable=False, default="")
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_accessed_at = db.Column(db.DateTime, nullable=True, index=True)
+
+
+class GeocodeCache(db.Model):
+    """
+    Cache for geocoding lookups (Google Geocoding, then Nominatim).
+
+    We store:
+    - key: normalized address, e.g. "mansfield ct usa"
+    - result_json: JSON of the geocode_address() result, or NULL for a
+      negative entry (the address could not be resolved by any provider)
+    - created_at: used for the positive / negative TTLs
+    """
+    __tablename__ = "geocode_cache"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False, unique=True, index=True)
+    result_json = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PlacesTileCache(db.Model):
+    """
+    Cache for Places Text Search results, bucketed by geohash tile.
+
+    We store:
+    - cuisine + tile: normalized cuisine and the geohash of the query origin
+    - radius_m: search radius of the query that produced these places
+    - lat, lng: origin of that query (NULL on rows written before it was kept)
+    - pages: how many result pages (nextPageToken) were fetched
+    - places_json: raw Places API (New) place objects (not the per-user rows;
+      distance_km and the radius filter are recomputed for every request)
+
+    A request is answered from this table when a fresh entry's query circle
+    contains the request's whole circle; places from neighboring tiles are
+    merged in as extra candidates.
+    """
+    __tablename__ = "places_tile_cache"
+    __table_args__ = (db.UniqueConstraint("cuisine", "tile", name="uq_places_tile"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    cuisine = db.Column(db.String(50), nullable=False)
+    tile = db.Column(db.String(12), nullable=False, index=True)
+    radius_m = db.Column(db.Integer, nullable=False)
+    lat = db.Column(db.Float, nullable=True)
+    lng = db.Column(db.Float, nullable=True)
+    pages = db.Column(db.Integer, nullable=False, default=1)
+    places_json = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class CookingGuideCache(db.Model):
+    """
+    Cache for Claude-generated cooking steps.
+
+    We store:
+    - key: sha256 of the normalized prompt inputs, model name and cache version
+    - model / version: what produced the entry (bump the version in
+      services/cooking_guide.py to invalidate everything at once)
+    - steps_json: the parsed {"steps": [...], "total_time_minutes", "difficulty"}
+    - created_at: used for the TTL
+    """
+    __tablename__ = "cooking_guide_cache"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    model = db.Column(db.String(64), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    steps_json = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
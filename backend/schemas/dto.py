@@ -21,10 +21,24 @@ class RecipeItem(BaseModel):
     match_ratio: float
     required_ingredients: List[str]
     steps: str
+    source_url: Optional[str] = None
 
 class RecommendResponse(BaseModel):
     recipes: List[RecipeItem]
 
+class RecipeSearchItem(BaseModel):
+    id: int
+    name: str
+    cuisine: str
+    score: float
+    required_ingredients: List[str]
+    steps: str
+    source_url: Optional[str] = None
+
+class RecipeSearchResponse(BaseModel):
+    recipes: List[RecipeSearchItem]
+    took_ms: float
+
 class ShoppingListRequest(BaseModel):
     recipe_id: int
     ingredients: List[str]
@@ -35,3 +49,25 @@ class ShoppingListItem(BaseModel):
 
 class ShoppingListResponse(BaseModel):
     missing: List[ShoppingListItem]
+
+class ShoppingPlanRequest(BaseModel):
+    # Repeat an id to cook a recipe more than once
+    recipe_ids: List[int] = Field(min_length=1, max_length=1000)
+    ingredients: List[str] = []
+
+class ShoppingQuantity(BaseModel):
+    amount: float
+    # ml, g, another unit (clove, can, ...) or None for plain counts
+    unit: Optional[str] = None
+
+class AggregatedShoppingItem(BaseModel):
+    ingredient: str
+    # Display form of the totals, e.g. "1.5 kg + to taste"
+    qty: Optional[str] = None
+    quantities: List[ShoppingQuantity]
+    unparsed: List[str]
+    recipe_ids: List[int]
+
+class ShoppingPlanResponse(BaseModel):
+    items: List[AggregatedShoppingItem]
+    missing_recipe_ids: List[int]
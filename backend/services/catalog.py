@@ -0,0 +1,189 @@
+"""
+Promotion of scraped web recipes into the local catalog.
+
+discover_recipes_from_web() hands every fresh result set to
+promote_web_recipes(), which queues it on the write-behind thread (see
+services/database.py). There each result with a usable ingredient list is
+upserted as a Recipe tagged with its canonical source URL, with the
+ingredient lines normalized by services/ingredients.py, so later pantry
+queries are answered by the local recommender and full-text search
+instead of another Google search and page scrape.
+
+The canonical URL is the dedupe key: scheme, "www." and trailing slashes,
+fragments and tracking parameters don't make a different recipe. A
+re-scraped page updates its row in place.
+
+WEB_PROMOTE=0 turns promotion off; `flask --app app promote-web-cache`
+backfills from the rows already in web_recipe_cache.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from models import Recipe, RecipeIngredient, WebRecipeCache, db
+from services.database import write_behind
+from services.ingredients import parse_ingredient_line
+from services.metrics import Counter
+from services.webcache import decode_items
+
+WEB_PROMOTE = os.getenv("WEB_PROMOTE", "1").lower() in ("1", "true", "yes", "on")
+# Results with fewer parsed ingredients are usually listing pages, not recipes
+WEB_PROMOTE_MIN_INGREDIENTS = int(os.getenv("WEB_PROMOTE_MIN_INGREDIENTS", "3"))
+
+MAX_RECIPE_NAME = 100
+MAX_SOURCE_URL = 500
+MAX_QTY_LENGTH = 50
+
+PROMOTED = Counter(
+    "smarteats_web_recipes_promoted_total",
+    "Web recipes promoted into the local catalog by outcome (created, updated, skipped).",
+    ("result",),
+)
+
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref|ref_src)$", re.IGNORECASE)
+# "Easy Beef Stir Fry Recipe - BBC Good Food" -> "Easy Beef Stir Fry Recipe"
+_SITE_SUFFIX = re.compile(r"\s+[|\-–—]\s+[^|\-–—]+$")
+
+
+def canonical_url(url: str) -> Optional[str]:
+    """Normalized http(s) URL used to dedupe recipes, or None if `url` isn't one."""
+    try:
+        parts = urlsplit((url or "").strip())
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.match(k)
+    ))
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def _recipe_name(title: str) -> str:
+    name = (title or "").strip()
+    trimmed = _SITE_SUFFIX.sub("", name)
+    if len(trimmed) >= 3:
+        name = trimmed
+    return name[:MAX_RECIPE_NAME].strip() or "Untitled Recipe"
+
+
+def _candidate(item: Dict[str, Any], cuisine: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Catalog fields for one web result, or None when it isn't worth keeping."""
+    source_url = canonical_url(item.get("url") or "")
+    if not source_url or len(source_url) > MAX_SOURCE_URL:
+        return None
+
+    ingredients: Dict[str, Optional[str]] = {}
+    for line in item.get("ingredients") or []:
+        parsed = parse_ingredient_line(line) if isinstance(line, str) else None
+        if parsed is None:
+            continue
+        name, qty = parsed
+        # Same ingredient listed twice (e.g. "for the sauce"): keep the first amount
+        ingredients.setdefault(name, qty[:MAX_QTY_LENGTH] if qty else None)
+    if len(ingredients) < WEB_PROMOTE_MIN_INGREDIENTS:
+        return None
+    # Real ingredient lists mostly come with amounts; link lists and captions don't
+    if sum(1 for qty in ingredients.values() if qty) * 2 < len(ingredients):
+        return None
+
+    instructions = item.get("instructions") or []
+    steps = "\n".join(s.strip() for s in instructions if isinstance(s, str) and s.strip())
+    return {
+        "source_url": source_url,
+        "name": _recipe_name(item.get("name") or ""),
+        "cuisine": (cuisine or "").strip().title()[:50] or None,
+        "steps": steps,
+        "ingredients": list(ingredients.items()),
+    }
+
+
+def promote_web_recipes(items: List[Dict[str, Any]], cuisine: Optional[str] = None) -> bool:
+    """
+    Queue web results (as returned by discover_recipes_from_web) for
+    promotion into the local catalog. Returns False if promotion is off or
+    the write queue is full.
+    """
+    if not WEB_PROMOTE or not items:
+        return False
+    return write_behind(_promote_batch, list(items), cuisine)
+
+
+def _promote_batch(items: List[Dict[str, Any]], cuisine: Optional[str]):
+    seen = set()
+    for item in items:
+        candidate = _candidate(item, cuisine)
+        if candidate is None or candidate["source_url"] in seen:
+            PROMOTED.inc(result="skipped")
+            continue
+        seen.add(candidate["source_url"])
+        PROMOTED.inc(result=_upsert_recipe(candidate))
+
+
+def _upsert_recipe(candidate: Dict[str, Any]) -> str:
+    """Stage the Recipe for `candidate` on db.session; returns "created" or "updated"."""
+    recipe = Recipe.query.filter_by(source_url=candidate["source_url"]).first()
+    rows = [RecipeIngredient(name=name, qty=qty) for name, qty in candidate["ingredients"]]
+    if recipe is None:
+        db.session.add(Recipe(
+            name=candidate["name"],
+            cuisine=candidate["cuisine"],
+            steps=candidate["steps"],
+            source_url=candidate["source_url"],
+            ingredients=rows,
+        ))
+        return "created"
+
+    recipe.name = candidate["name"]
+    # A search without a cuisine doesn't erase the one we already know
+    recipe.cuisine = candidate["cuisine"] or recipe.cuisine
+    recipe.steps = candidate["steps"] or recipe.steps
+    if [(i.name, i.qty) for i in recipe.ingredients] != candidate["ingredients"]:
+        recipe.ingredients = rows
+    return "updated"
+
+
+def _cuisine_from_cache_key(key: str) -> Optional[str]:
+    # "beef,egg|italian|p11" -> "italian"; see webrecipes._make_cache_key
+    for part in key.split("|")[1:]:
+        if not re.fullmatch(r"p\d+", part):
+            return part
+    return None
+
+
+def promote_cached_web_recipes(batch_size: int = 200) -> Dict[str, int]:
+    """Promote every result stored in web_recipe_cache (synchronously); counts by outcome."""
+    counts = {"created": 0, "updated": 0, "skipped": 0}
+    seen = set()
+    pending = 0
+    rows = WebRecipeCache.query.order_by(WebRecipeCache.created_at.desc()).all()
+    for row in rows:
+        try:
+            items = decode_items(row)
+        except ValueError:
+            continue
+        cuisine = _cuisine_from_cache_key(row.key)
+        for item in items if isinstance(items, list) else []:
+            candidate = _candidate(item, cuisine) if isinstance(item, dict) else None
+            # Newest rows come first, so older copies of a page never win
+            if candidate is None or candidate["source_url"] in seen:
+                counts["skipped"] += 1
+                continue
+            seen.add(candidate["source_url"])
+            counts[_upsert_recipe(candidate)] += 1
+            pending += 1
+            if pending >= batch_size:
+                db.session.commit()
+                pending = 0
+    db.session.commit()
+    return counts
@@ -0,0 +1,143 @@
+"""
+Shared outbound HTTP clients.
+
+Every service module talks to its upstream through a pooled
+requests.Session from get_session(<upstream>) instead of bare
+requests.get/post, so TCP+TLS setup is paid once per connection rather than
+once per call. Sessions retry with jittered exponential backoff: GETs on
+connection errors, read timeouts and 502/503/504, POSTs (billed Vision and
+Places calls) only on connection errors and 429/503, so a slow response is
+never paid for twice (see UpstreamRetry in services/http_adapter.py). A
+GET's 429 is not retried unless the upstream sends Retry-After, so quota
+errors surface to callers (webrecipes falls back to stale cache on those).
+
+The Anthropic SDK client is created once and shared as well. The SDK takes
+about two seconds to import, so it is only loaded on the first LLM call;
+requests is likewise only imported when the first session is built.
+It reads ANTHROPIC_BASE_URL itself; the Google upstreams take their base
+URL from *_BASE_URL settings in their service modules (see
+benchmarks/fake_upstream.py).
+"""
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict
+
+if TYPE_CHECKING:
+    import anthropic
+    import requests
+
+    from services.http_adapter import CountingAdapter
+
+
+# Per-upstream pool settings.
+# pool_connections = number of distinct hosts kept, pool_maxsize = keep-alive
+# connections per host (should be >= the number of threads hitting it).
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    "vision": {"pool_connections": 1, "pool_maxsize": 16, "retries": 2},
+    "places": {"pool_connections": 1, "pool_maxsize": 16, "retries": 2},
+    "geocoding": {"pool_connections": 1, "pool_maxsize": 8, "retries": 2},
+    "nominatim": {"pool_connections": 1, "pool_maxsize": 4, "retries": 1},
+    "cse": {"pool_connections": 1, "pool_maxsize": 8, "retries": 2},
+    # Recipe page scraping hits many different sites
+    "pages": {"pool_connections": 32, "pool_maxsize": 4, "retries": 1},
+}
+
+_DEFAULT_UPSTREAM = {"pool_connections": 4, "pool_maxsize": 8, "retries": 1}
+
+
+_sessions: Dict[str, "requests.Session"] = {}
+_adapters: Dict[str, "CountingAdapter"] = {}
+_sessions_lock = threading.Lock()
+
+_anthropic_client = None
+_anthropic_lock = threading.Lock()
+_anthropic_calls = 0
+
+
+def _build_session(name: str) -> "requests.Session":
+    import requests
+
+    from services.http_adapter import CountingAdapter, UpstreamRetry
+
+    cfg = UPSTREAMS.get(name, _DEFAULT_UPSTREAM)
+    retry = UpstreamRetry(
+        total=cfg["retries"],
+        connect=cfg["retries"],
+        read=cfg["retries"],
+        status=cfg["retries"],
+        backoff_factor=0.3,
+        backoff_jitter=0.25,
+        status_forcelist=(502, 503, 504),
+        # Idempotent methods only; POST is handled by UpstreamRetry.is_retry
+        allowed_methods=UpstreamRetry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = CountingAdapter(
+        name,
+        pool_connections=cfg["pool_connections"],
+        pool_maxsize=cfg["pool_maxsize"],
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        }
+    )
+    _adapters[name] = adapter
+    return session
+
+
+def get_session(name: str) -> "requests.Session":
+    """Return the shared, pooled session for an upstream (created on first use)."""
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _build_session(name)
+            _sessions[name] = session
+        return session
+
+
+def get_anthropic_client() -> "anthropic.Anthropic":
+    """Return the process-wide Anthropic client (it keeps its own connection pool)."""
+    global _anthropic_client, _anthropic_calls
+    with _anthropic_lock:
+        if _anthropic_client is None:
+            import anthropic
+
+            _anthropic_client = anthropic.Anthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                max_retries=2,
+            )
+        _anthropic_calls += 1
+        return _anthropic_client
+
+
+def connection_stats() -> Dict[str, Any]:
+    """
+    Requests sent vs. connections opened per upstream.
+
+    reused = requests that went out on an already-open keep-alive connection.
+    """
+    out: Dict[str, Any] = {}
+    for name, adapter in list(_adapters.items()):
+        reqs = adapter.request_count
+        opened = adapter.connections_opened()
+        out[name] = {
+            "requests": reqs,
+            "connections_opened": opened,
+            "reused": max(0, reqs - opened),
+        }
+    out["anthropic"] = {
+        "client_created": _anthropic_client is not None,
+        "calls": _anthropic_calls,
+    }
+    return out
@@ -2,18 +2,105 @@
 Cooking guide routes - generate AI tutorial videos and detailed steps
 """
 import os
+import io
+import re
 import logging
 import json
+import hashlib
+import shutil
+import tempfile
 import time
+from datetime import datetime, timedelta
 from pathlib import Path
 import subprocess
-from anthropic import Anthropic
-from flask import send_from_directory, request, Blueprint
+import threading
+import multiprocessing
+import functools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flask import send_file, request, Blueprint, Response, stream_with_context
+
+from models import db, CookingGuideCache
+from services.clients import get_anthropic_client
+from services.database import write_behind
+from services.jobs import get_queue, find_job, QueueFull
+from services.metrics import STAGE_SECONDS, UPSTREAM_ERRORS, UPSTREAM_SECONDS, cache_lookup, timed
 
 cooking_guide_bp = Blueprint('cooking_guide', __name__)
 
 logger = logging.getLogger(__name__)
 
+GUIDE_MODEL = "claude-sonnet-4-6"
+# Bump to invalidate every cached guide (e.g. after changing the prompt)
+GUIDE_CACHE_VERSION = 1
+GUIDE_CACHE_TTL_DAYS = int(os.getenv("GUIDE_CACHE_TTL_DAYS", "30"))
+
+VIDEO_DIR = Path(
+    os.getenv("VIDEO_DIR", Path(__file__).resolve().parent.parent / "generated_videos")
+).resolve()
+# Everything that changes the rendered output; part of the video cache key.
+# Bump "renderer" when slide layout code changes.
+RENDER_SETTINGS = {
+    "renderer": 1,
+    "width": 1280,
+    "height": 720,
+    "slide_seconds": 7,
+}
+# x264 settings per encoding profile; the chosen profile is part of the
+# cache key too. Slides are static for slide_seconds, so "still" encodes at
+# 1 fps with one keyframe per slide, which is enough to seek to any step.
+ENCODING_PROFILES = {
+    "still": {
+        "fps": 1,
+        "preset": "medium",
+        "tune": "stillimage",
+        "crf": 28,
+        "gop_seconds": 7,
+    },
+    "quality": {
+        "fps": 24,
+        "preset": "medium",
+        "tune": "stillimage",
+        "crf": 20,
+        "gop_seconds": 2,
+    },
+}
+VIDEO_PROFILE = os.getenv("VIDEO_PROFILE", "still")
+VIDEO_CACHE_MAX_MB = int(os.getenv("VIDEO_CACHE_MAX_MB", "1024"))
+VIDEO_CACHE_MAX_AGE_DAYS = int(os.getenv("VIDEO_CACHE_MAX_AGE_DAYS", "30"))
+
+# /videos delivery. Content-addressed names never change content, so they
+# are cached by browsers for a year. VIDEO_SENDFILE hands the file body to
+# the front proxy instead of streaming it from a Python worker:
+#   "x-sendfile" -> X-Sendfile: <absolute path>        (Apache, lighttpd)
+#   "x-accel"    -> X-Accel-Redirect: <prefix><name>  (nginx internal location
+#                   aliased to VIDEO_DIR, e.g. `location /_videos/ { internal; alias ...; }`)
+VIDEO_SENDFILE = os.getenv("VIDEO_SENDFILE", "").lower()
+VIDEO_ACCEL_PREFIX = os.getenv("VIDEO_ACCEL_PREFIX", "/_videos/")
+VIDEO_IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+VIDEO_MAX_AGE = 3600
+# No leading dot: that is the ".{key}.tmp.mp4" name a render in progress writes to
+_VIDEO_NAME_RE = re.compile(r"^[\w-][\w.-]*\.mp4$")
+_CONTENT_ADDRESSED_RE = re.compile(r"^([0-9a-f]{32})\.mp4$")
+
+# One render per video key at a time within this process
+_render_locks = {}
+_render_locks_guard = threading.Lock()
+
+# Background rendering: job threads supervise renders running in a process
+# pool (Pillow + ffmpeg are CPU bound and must not block request workers)
+VIDEO_RENDER_WORKERS = int(os.getenv("VIDEO_RENDER_WORKERS", "2"))
+video_jobs = get_queue(
+    "video",
+    max_workers=VIDEO_RENDER_WORKERS,
+    max_pending=int(os.getenv("VIDEO_MAX_PENDING", "32")),
+)
+_render_pool = None
+_render_pool_lock = threading.Lock()
+_progress_queue = None
+# Set inside render worker processes by _init_render_worker
+_worker_progress_queue = None
+_in_render_worker = False
+
 
 def normalize_ingredient(ingredient):
     """Normalize ingredient name"""
@@ -34,14 +121,77 @@ def normalize_ingredient(ingredient):
     return normalized
 
 
-def optimize_cooking_steps(recipe_name, ingredients, steps):
-    """Use Claude to optimize cooking steps"""
-    client = Anthropic()
+def _prompt_inputs(recipe_name, ingredients, steps):
+    """
+    Normalize the parts of the request that end up in the prompt, so that
+    case/whitespace/ordering differences share one cache entry.
+    """
+    def clean(text):
+        return " ".join(str(text).split())
+
+    name = clean(recipe_name or "")
+    ings = sorted(clean(i).lower() for i in (ingredients or [])[:10] if clean(i))
+    stps = [clean(s) for s in (steps or [])[:3] if clean(s)]
+    return name, ings, stps
 
-    ingredients_str = ', '.join(ingredients[:10]) if ingredients else "not specified"
-    steps_str = '; '.join(steps[:3]) if steps else "no steps provided"
 
-    prompt = f"""
+def _guide_cache_key(name, ings, stps, model=GUIDE_MODEL):
+    raw = json.dumps(
+        {"v": GUIDE_CACHE_VERSION, "model": model, "name": name.lower(), "ings": ings, "steps": stps},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _read_guide_cache(key):
+    try:
+        row = CookingGuideCache.query.filter_by(key=key).first()
+    except Exception:
+        return None
+    if not row or row.version != GUIDE_CACHE_VERSION:
+        cache_lookup("cooking_guide", "miss")
+        return None
+    if row.created_at < datetime.utcnow() - timedelta(days=GUIDE_CACHE_TTL_DAYS):
+        cache_lookup("cooking_guide", "stale")
+        return None
+    try:
+        result = json.loads(row.steps_json)
+    except Exception:
+        cache_lookup("cooking_guide", "miss")
+        return None
+    cache_lookup("cooking_guide", "hit")
+    return result
+
+
+def _write_guide_cache(key, result, model=GUIDE_MODEL):
+    """Best-effort upsert, applied by the write-behind thread."""
+    write_behind(_upsert_guide_cache, key, json.dumps(result, ensure_ascii=False), model)
+
+
+def _upsert_guide_cache(key, payload, model):
+    row = CookingGuideCache.query.filter_by(key=key).first()
+    if row:
+        row.model = model
+        row.version = GUIDE_CACHE_VERSION
+        row.steps_json = payload
+        row.created_at = datetime.utcnow()
+    else:
+        db.session.add(
+            CookingGuideCache(
+                key=key,
+                model=model,
+                version=GUIDE_CACHE_VERSION,
+                steps_json=payload,
+            )
+        )
+
+
+def _build_steps_prompt(recipe_name, ingredients, steps):
+    ingredients_str = ', '.join(ingredients) if ingredients else "not specified"
+    steps_str = '; '.join(steps) if steps else "no steps provided"
+
+    return f"""
     Recipe name: {recipe_name}
     Ingredients: {ingredients_str}
     Original steps: {steps_str}
@@ -66,12 +216,188 @@ def optimize_cooking_steps(recipe_name, ingredients, steps):
     Please generate 4-6 detailed steps.
     """
 
+
+def _default_steps():
+    """Generic guide used when Claude is unavailable or returns bad JSON."""
+    return {
+        "steps": [
+            {
+                "step_num": 1,
+                "title": "Prepare Ingredients",
+                "description": "Gather and prepare all required ingredients and seasonings",
+                "duration_minutes": 10,
+                "tips": "Make sure all ingredients are weighed or measured",
+                "tools": ["cutting board", "knife"]
+            },
+            {
+                "step_num": 2,
+                "title": "Cook",
+                "description": "Cook using the traditional method",
+                "duration_minutes": 20,
+                "tips": "Keep medium heat and stir regularly",
+                "tools": ["pot", "spatula"]
+            },
+            {
+                "step_num": 3,
+                "title": "Plate and Serve",
+                "description": "Plate the dish and serve",
+                "duration_minutes": 5,
+                "tips": "Keep warm and plate nicely",
+                "tools": ["plate"]
+            }
+        ],
+        "total_time_minutes": 35,
+        "difficulty": "easy"
+    }
+
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def _clean_step(step, num):
+    """Validate one generated step and coerce it to the shape the renderer expects."""
+    if not isinstance(step, dict):
+        raise ValueError("step is not an object")
+    title = str(step.get("title") or "").strip()
+    description = str(step.get("description") or "").strip()
+    if not title or not description:
+        raise ValueError(f"step {num} is missing a title or description")
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        duration = max(0, int(step.get("duration_minutes") or 0))
+    except (TypeError, ValueError):
+        duration = 0
+    tools = step.get("tools")
+    if not isinstance(tools, list):
+        tools = []
+    return {
+        "step_num": num,
+        "title": title,
+        "description": description,
+        "duration_minutes": duration,
+        "tips": str(step.get("tips") or "").strip(),
+        "tools": [str(t) for t in tools if t],
+    }
+
+
+def _validate_guide(result):
+    """Validate a parsed guide; raises ValueError when it is unusable."""
+    if not isinstance(result, dict) or not isinstance(result.get("steps"), list) or not result["steps"]:
+        raise ValueError("guide has no steps")
+    steps = [_clean_step(step, i + 1) for i, step in enumerate(result["steps"])]
+    try:
+        total = int(result.get("total_time_minutes") or 0)
+    except (TypeError, ValueError):
+        total = 0
+    difficulty = result.get("difficulty")
+    return {
+        "steps": steps,
+        "total_time_minutes": total or sum(s["duration_minutes"] for s in steps),
+        "difficulty": difficulty if difficulty in DIFFICULTIES else "medium",
+    }
+
+
+class StepStreamParser:
+    """
+    Incremental parser for the guide JSON while it streams in.
+
+    feed() returns every object of the top-level "steps" array whose closing
+    brace has arrived, so steps can be shown before the rest of the response
+    exists. Anything before the root object (prose, a ```json fence) and
+    after it is ignored. finish() parses the complete root object.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._str_start = 0
+        self._last_key = None
+        self._in_steps = False
+        self._obj_start = None
+        self._root = None
+        self._closed = False
+
+    def feed(self, chunk):
+        if self._closed:
+            return []
+        self.text += chunk
+        text = self.text
+        steps = []
+        for i in range(self._pos, len(text)):
+            if self._closed:
+                break
+            c = text[i]
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == '\\':
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        self._last_key = text[self._str_start + 1:i]
+                continue
+            if self._root is None and c != '{':
+                continue
+
+            if c == '"':
+                self._in_str = True
+                self._str_start = i
+            elif c in '{[':
+                if self._root is None:
+                    self._root = i
+                self._depth += 1
+                if c == '[' and self._depth == 2 and self._last_key == "steps":
+                    self._in_steps = True
+                elif c == '{' and self._in_steps and self._depth == 3:
+                    self._obj_start = i
+            elif c in '}]':
+                if c == '}' and self._in_steps and self._depth == 3 and self._obj_start is not None:
+                    steps.append(json.loads(text[self._obj_start:i + 1]))
+                    self._obj_start = None
+                elif c == ']' and self._in_steps and self._depth == 2:
+                    self._in_steps = False
+                self._depth -= 1
+                if self._depth == 0:
+                    self._closed = True
+                    self.text = text[:i + 1]
+        self._pos = len(self.text)
+        return steps
+
+    def finish(self):
+        if not self._closed:
+            raise ValueError("response ended before the JSON object was complete")
+        return json.loads(self.text[self._root:])
+
+
+def optimize_cooking_steps(recipe_name, ingredients, steps):
+    """
+    Use Claude to optimize cooking steps.
+
+    Results are cached in SQLite keyed by a hash of the normalized prompt
+    inputs + model, so a popular recipe only costs one LLM call per
+    GUIDE_CACHE_TTL_DAYS. The fallback guide is never cached.
+    """
+    name, ings, stps = _prompt_inputs(recipe_name, ingredients, steps)
+    cache_key = _guide_cache_key(name, ings, stps)
+
+    cached = _read_guide_cache(cache_key)
+    if cached:
+        logger.info(f"Cooking guide cache hit for {name!r}")
+        return cached
+
+    prompt = _build_steps_prompt(name, ings, stps)
+
+    try:
+        client = get_anthropic_client()
+        with timed(UPSTREAM_SECONDS, errors=UPSTREAM_ERRORS, upstream="claude"):
+            response = client.messages.create(
+                model=GUIDE_MODEL,
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}]
+            )
 
         content = response.content[0].text
 
@@ -80,44 +406,101 @@ def optimize_cooking_steps(recipe_name, ingredients, steps):
         elif '```' in content:
             content = content.split('```')[1].split('```')[0]
 
-        result = json.loads(content.strip())
-        return result
+        result = _validate_guide(json.loads(content.strip()))
 
     except Exception as e:
         logger.error(f"Claude API call failed: {str(e)}")
-        return {
-            "steps": [
-                {
-                    "step_num": 1,
-                    "title": "Prepare Ingredients",
-                    "description": "Gather and prepare all required ingredients and seasonings",
-                    "duration_minutes": 10,
-                    "tips": "Make sure all ingredients are weighed or measured",
-                    "tools": ["cutting board", "knife"]
-                },
-                {
-                    "step_num": 2,
-                    "title": "Cook",
-                    "description": "Cook using the traditional method",
-                    "duration_minutes": 20,
-                    "tips": "Keep medium heat and stir regularly",
-                    "tools": ["pot", "spatula"]
-                },
-                {
-                    "step_num": 3,
-                    "title": "Plate and Serve",
-                    "description": "Plate the dish and serve",
-                    "duration_minutes": 5,
-                    "tips": "Keep warm and plate nicely",
-                    "tools": ["plate"]
-                }
-            ],
-            "total_time_minutes": 35,
-            "difficulty": "easy"
-        }
+        return _default_steps()
+
+    _write_guide_cache(cache_key, result)
+    return result
+
+
+def iter_cooking_steps(recipe_name, ingredients, steps):
+    """
+    Streaming version of optimize_cooking_steps.
+
+    Yields {"event": "step", "step": {...}} for each step as soon as Claude
+    has finished writing it, then one {"event": "done", "enhanced_steps":
+    <full guide>, "cached": bool, "fallback": bool, "timings": {...}}.
+    On any failure (API error, bad JSON, invalid steps) the done event
+    carries the default guide with fallback=True and clients should replace
+    whatever steps they have shown so far.
+    """
+    t0 = time.perf_counter()
+    timings = {}
+    name, ings, stps = _prompt_inputs(recipe_name, ingredients, steps)
+    cache_key = _guide_cache_key(name, ings, stps)
+
+    cached = _read_guide_cache(cache_key)
+    if cached:
+        for step in cached.get("steps", []):
+            yield {"event": "step", "step": step}
+        timings["total"] = round(time.perf_counter() - t0, 4)
+        yield {"event": "done", "enhanced_steps": cached, "cached": True, "fallback": False, "timings": timings}
+        return
+
+    parser = StepStreamParser()
+    count = 0
+    try:
+        client = get_anthropic_client()
+        # Includes the time the SSE consumer takes per step, which is negligible
+        with timed(UPSTREAM_SECONDS, errors=UPSTREAM_ERRORS, upstream="claude_stream"), client.messages.stream(
+            model=GUIDE_MODEL,
+            max_tokens=2000,
+            messages=[{"role": "user", "content": _build_steps_prompt(name, ings, stps)}]
+        ) as stream:
+            for text in stream.text_stream:
+                for step in parser.feed(text):
+                    count += 1
+                    if count == 1:
+                        timings["first_step"] = round(time.perf_counter() - t0, 4)
+                    yield {"event": "step", "step": _clean_step(step, count)}
+
+        result = _validate_guide(parser.finish())
+    except Exception as e:
+        logger.error(f"Claude streaming call failed after {count} steps: {str(e)}")
+        timings["total"] = round(time.perf_counter() - t0, 4)
+        yield {"event": "done", "enhanced_steps": _default_steps(), "cached": False, "fallback": True, "timings": timings}
+        return
+
+    _write_guide_cache(cache_key, result)
+    timings["total"] = round(time.perf_counter() - t0, 4)
+    logger.info(f"Streamed {count} cooking steps for {name!r} ({timings})")
+    yield {"event": "done", "enhanced_steps": result, "cached": False, "fallback": False, "timings": timings}
+
+
+# Slide layout
+FONT_PATH = "/System/Library/Fonts/Helvetica.ttc"
+PAD = 60
+ACCENT = (255, 107, 53)       # orange
+BG = (245, 245, 242)          # off-white
+CARD_BG = (255, 255, 255)
+DARK = (30, 30, 30)
+MUTED = (110, 110, 110)
+TIP_BG = (255, 248, 230)
+TIP_BORDER = (255, 193, 7)
+TRACK = (220, 220, 215)
+
+# Processes used to draw slides of one video in parallel (1 = sequential)
+# when it is rendered in this process. Background renders already run
+# VIDEO_RENDER_WORKERS at a time, so render workers draw their slides
+# sequentially instead of starting a pool of their own.
+SLIDE_RENDER_WORKERS = int(os.getenv("SLIDE_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# zlib level for slide PNGs; they are decoded once by ffmpeg, so favor speed
+SLIDE_PNG_COMPRESS_LEVEL = 1
 
+# "pipe": write raw RGB frames straight into ffmpeg's stdin (no temp files)
+# "files": the older PNG-per-slide + concat list path
+VIDEO_RENDER_MODE = os.getenv("VIDEO_RENDER_MODE", "pipe")
 
+_slide_pool = None
+_slide_pool_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
 def _load_font(path, size):
+    """TrueType fonts are parsed once per process and reused for every slide."""
     from PIL import ImageFont
     try:
         return ImageFont.truetype(path, size)
@@ -125,6 +508,28 @@ def _load_font(path, size):
         return ImageFont.load_default()
 
 
+def _fonts():
+    return {
+        "step_label": _load_font(FONT_PATH, 22),
+        "title": _load_font(FONT_PATH, 42),
+        "body": _load_font(FONT_PATH, 26),
+        "tip": _load_font(FONT_PATH, 23),
+        "meta": _load_font(FONT_PATH, 21),
+    }
+
+
+@functools.lru_cache(maxsize=4)
+def _base_slide(W, H):
+    """Static layers shared by every slide: background, accent bar, progress track."""
+    from PIL import Image, ImageDraw
+
+    img = Image.new('RGB', (W, H), BG)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, W, 8], fill=ACCENT)
+    draw.rectangle([0, H - 20, W, H], fill=TRACK)
+    return img
+
+
 def _wrap_text(text, font, draw, max_width):
     import textwrap
     # Estimate chars per line based on average char width
@@ -146,138 +551,334 @@ def _draw_rounded_rect(draw, xy, radius, fill):
     draw.ellipse([x1 - 2*radius, y1 - 2*radius, x1, y1], fill=fill)
 
 
-def create_video_from_steps(recipe_name, steps, output_path):
-    """Render each cooking step as a slide image and combine into an MP4."""
-    try:
-        from PIL import Image, ImageDraw
-        import shutil, textwrap, tempfile
-
-        FONT_PATH = "/System/Library/Fonts/Helvetica.ttc"
-        W, H = 1280, 720
-        PAD = 60
-        ACCENT = (255, 107, 53)       # orange
-        BG = (245, 245, 242)          # off-white
-        CARD_BG = (255, 255, 255)
-        DARK = (30, 30, 30)
-        MUTED = (110, 110, 110)
-        TIP_BG = (255, 248, 230)
-        TIP_BORDER = (255, 193, 7)
-
-        font_step_label = _load_font(FONT_PATH, 22)
-        font_title      = _load_font(FONT_PATH, 42)
-        font_body       = _load_font(FONT_PATH, 26)
-        font_tip        = _load_font(FONT_PATH, 23)
-        font_meta       = _load_font(FONT_PATH, 21)
-
-        temp_dir = tempfile.mkdtemp()
-        image_files = []
-        total = len(steps)
+def _render_slide(idx, step, total):
+    """Draw one step slide and return it as a PIL image."""
+    from PIL import ImageDraw
+
+    W, H = RENDER_SETTINGS["width"], RENDER_SETTINGS["height"]
+    fonts = _fonts()
+    font_step_label = fonts["step_label"]
+    font_title = fonts["title"]
+    font_body = fonts["body"]
+    font_tip = fonts["tip"]
+    font_meta = fonts["meta"]
+
+    img = _base_slide(W, H).copy()
+    draw = ImageDraw.Draw(img)
+
+    # Step badge (top-left)
+    badge_text = f"STEP {step.get('step_num', idx+1)} / {total}"
+    _draw_rounded_rect(draw, [PAD, 28, PAD + 160, 60], 10, ACCENT)
+    draw.text((PAD + 14, 32), badge_text, fill=(255, 255, 255), font=font_step_label)
+
+    # Duration badge (top-right)
+    dur = step.get('duration_minutes', 5)
+    dur_text = f"⏱  {dur} min"
+    draw.text((W - PAD - 120, 32), dur_text, fill=MUTED, font=font_step_label)
+
+    # Title
+    title = step.get('title', 'Cooking')
+    draw.text((PAD, 78), title, fill=DARK, font=font_title)
+
+    # Divider line
+    draw.rectangle([PAD, 132, W - PAD, 134], fill=TRACK)
+
+    # Description card
+    desc = step.get('description', '')
+    desc_lines = _wrap_text(desc, font_body, draw, W - PAD * 2 - 40)
+    card_h = 20 + len(desc_lines) * 36 + 20
+    card_h = min(card_h, 260)
+    _draw_rounded_rect(draw, [PAD, 148, W - PAD, 148 + card_h], 12, CARD_BG)
+    y = 168
+    for line in desc_lines:
+        if y + 36 > 148 + card_h:
+            break
+        draw.text((PAD + 20, y), line, fill=DARK, font=font_body)
+        y += 36
+
+    tip_top = 148 + card_h + 18
+
+    # Tip box
+    tip = step.get('tips', '')
+    if tip:
+        tip_lines = _wrap_text("Tip: " + tip, font_tip, draw, W - PAD * 2 - 50)
+        tip_h = 16 + len(tip_lines) * 30 + 16
+        tip_h = min(tip_h, 110)
+        _draw_rounded_rect(draw, [PAD, tip_top, W - PAD, tip_top + tip_h], 10, TIP_BG)
+        draw.rectangle([PAD, tip_top, PAD + 5, tip_top + tip_h], fill=TIP_BORDER)
+        ty = tip_top + 16
+        for line in tip_lines:
+            if ty + 30 > tip_top + tip_h:
+                break
+            draw.text((PAD + 18, ty), line, fill=(90, 70, 10), font=font_tip)
+            ty += 30
+        tools_top = tip_top + tip_h + 14
+    else:
+        tools_top = tip_top
+
+    # Tools row
+    tools = step.get('tools', [])
+    if tools:
+        draw.text((PAD, tools_top), "Tools:", fill=MUTED, font=font_meta)
+        tx = PAD + 75
+        for tool in tools[:5]:
+            tw = int(font_meta.getlength(tool)) + 24 if hasattr(font_meta, 'getlength') else 120
+            if tx + tw > W - PAD:
+                break
+            _draw_rounded_rect(draw, [tx, tools_top - 2, tx + tw, tools_top + 26], 8, (230, 230, 225))
+            draw.text((tx + 12, tools_top), tool, fill=DARK, font=font_meta)
+            tx += tw + 10
+
+    # Bottom progress bar (the track itself is part of the base slide)
+    bar_y = H - 20
+    progress = int(W * (idx + 1) / total)
+    draw.rectangle([0, bar_y, progress, H], fill=ACCENT)
+
+    return img
+
+
+def _render_slide_to_file(idx, step, total, path):
+    """Process-pool entry point: render a slide and write it as a fast PNG."""
+    _render_slide(idx, step, total).save(path, compress_level=SLIDE_PNG_COMPRESS_LEVEL)
+    return path
+
+
+def _get_slide_pool():
+    global _slide_pool
+    with _slide_pool_lock:
+        if _slide_pool is None:
+            _slide_pool = ProcessPoolExecutor(
+                max_workers=SLIDE_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _slide_pool
+
+
+def _parallel_slides(total):
+    return SLIDE_RENDER_WORKERS > 1 and total > 1 and not _in_render_worker
+
+
+def _render_slides(steps, temp_dir, on_progress):
+    """Write every slide PNG into temp_dir (in parallel when worthwhile)."""
+    total = len(steps)
+    paths = [os.path.join(temp_dir, f"step_{idx:03d}.png") for idx in range(total)]
+
+    if not _parallel_slides(total):
+        for idx, step in enumerate(steps):
+            _render_slide_to_file(idx, step, total, paths[idx])
+            on_progress(phase="slides", slides_rendered=idx + 1, total_slides=total)
+        return paths
+
+    pool = _get_slide_pool()
+    futures = [
+        pool.submit(_render_slide_to_file, idx, step, total, paths[idx])
+        for idx, step in enumerate(steps)
+    ]
+    for done, future in enumerate(as_completed(futures), start=1):
+        future.result()
+        on_progress(phase="slides", slides_rendered=done, total_slides=total)
+    return paths
+
+
+def _render_slide_rgb(idx, step, total):
+    """Process-pool entry point for pipe mode: one slide as raw RGB24 bytes."""
+    return _render_slide(idx, step, total).tobytes()
+
 
+def _iter_slide_frames(steps):
+    """Raw frames in slide order, drawn in parallel when worthwhile."""
+    total = len(steps)
+    if not _parallel_slides(total):
         for idx, step in enumerate(steps):
-            img = Image.new('RGB', (W, H), BG)
-            draw = ImageDraw.Draw(img)
-
-            # Top accent bar
-            draw.rectangle([0, 0, W, 8], fill=ACCENT)
-
-            # Step badge (top-left)
-            badge_text = f"STEP {step.get('step_num', idx+1)} / {total}"
-            _draw_rounded_rect(draw, [PAD, 28, PAD + 160, 60], 10, ACCENT)
-            draw.text((PAD + 14, 32), badge_text, fill=(255, 255, 255), font=font_step_label)
-
-            # Duration badge (top-right)
-            dur = step.get('duration_minutes', 5)
-            dur_text = f"⏱  {dur} min"
-            draw.text((W - PAD - 120, 32), dur_text, fill=MUTED, font=font_step_label)
-
-            # Title
-            title = step.get('title', 'Cooking')
-            draw.text((PAD, 78), title, fill=DARK, font=font_title)
-
-            # Divider line
-            draw.rectangle([PAD, 132, W - PAD, 134], fill=(220, 220, 215))
-
-            # Description card
-            desc = step.get('description', '')
-            desc_lines = _wrap_text(desc, font_body, draw, W - PAD * 2 - 40)
-            card_h = 20 + len(desc_lines) * 36 + 20
-            card_h = min(card_h, 260)
-            _draw_rounded_rect(draw, [PAD, 148, W - PAD, 148 + card_h], 12, CARD_BG)
-            y = 168
-            for line in desc_lines:
-                if y + 36 > 148 + card_h:
-                    break
-                draw.text((PAD + 20, y), line, fill=DARK, font=font_body)
-                y += 36
-
-            tip_top = 148 + card_h + 18
-
-            # Tip box
-            tip = step.get('tips', '')
-            if tip:
-                tip_lines = _wrap_text("Tip: " + tip, font_tip, draw, W - PAD * 2 - 50)
-                tip_h = 16 + len(tip_lines) * 30 + 16
-                tip_h = min(tip_h, 110)
-                _draw_rounded_rect(draw, [PAD, tip_top, W - PAD, tip_top + tip_h], 10, TIP_BG)
-                draw.rectangle([PAD, tip_top, PAD + 5, tip_top + tip_h], fill=TIP_BORDER)
-                ty = tip_top + 16
-                for line in tip_lines:
-                    if ty + 30 > tip_top + tip_h:
-                        break
-                    draw.text((PAD + 18, ty), line, fill=(90, 70, 10), font=font_tip)
-                    ty += 30
-                tools_top = tip_top + tip_h + 14
+            yield _render_slide_rgb(idx, step, total)
+        return
+    # Executor.map yields results in submission order
+    yield from _get_slide_pool().map(_render_slide_rgb, range(total), steps, [total] * total)
+
+
+def _pump_ffmpeg_progress(stdout, total_seconds, on_progress):
+    """Turn `-progress pipe:1` key=value lines into ffmpeg_percent updates."""
+    last_pct = -1
+    for line in stdout:
+        key, _, value = line.strip().partition('=')
+        if key in ('out_time_us', 'out_time_ms') and value.isdigit() and total_seconds:
+            pct = min(100, int(int(value) / 1e6 / total_seconds * 100))
+            if pct != last_pct:
+                last_pct = pct
+                on_progress(phase="encoding", ffmpeg_percent=pct)
+        elif key == 'progress' and value == 'end':
+            on_progress(phase="encoding", ffmpeg_percent=100)
+
+
+def _resolve_profile(profile):
+    profile = profile or VIDEO_PROFILE
+    if profile not in ENCODING_PROFILES:
+        raise ValueError(f"Unknown video profile: {profile}")
+    return profile
+
+
+def _ffmpeg_cmd(input_args, output_path, profile):
+    W, H = RENDER_SETTINGS["width"], RENDER_SETTINGS["height"]
+    enc = ENCODING_PROFILES[profile]
+    return [
+        'ffmpeg', '-y', '-progress', 'pipe:1', '-nostats', '-loglevel', 'error',
+        *input_args,
+        '-vf', f"scale={W}:{H},fps={enc['fps']}",
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+        '-preset', enc['preset'],
+        '-tune', enc['tune'],
+        '-crf', str(enc['crf']),
+        '-g', str(max(1, enc['fps'] * enc['gop_seconds'])),
+        # moov atom up front so playback starts before the download finishes
+        '-movflags', '+faststart',
+        str(output_path)
+    ]
+
+
+def _run_ffmpeg(cmd, total_seconds, on_progress, frames=None):
+    """
+    Run ffmpeg, reporting encode progress as ffmpeg_percent (0-100).
+    If `frames` is given, each item is written to ffmpeg's stdin (the
+    progress reader then runs on its own thread). ffmpeg is killed if
+    anything goes wrong. Returns (returncode, stderr text).
+    """
+    with tempfile.TemporaryFile(mode='w+') as err_f:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if frames is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=err_f,
+            text=False,
+        )
+        stdout = io.TextIOWrapper(proc.stdout)
+        try:
+            if frames is None:
+                _pump_ffmpeg_progress(stdout, total_seconds, on_progress)
             else:
-                tools_top = tip_top
-
-            # Tools row
-            tools = step.get('tools', [])
-            if tools:
-                draw.text((PAD, tools_top), "Tools:", fill=MUTED, font=font_meta)
-                tx = PAD + 75
-                for tool in tools[:5]:
-                    tw = int(font_meta.getlength(tool)) + 24 if hasattr(font_meta, 'getlength') else 120
-                    if tx + tw > W - PAD:
-                        break
-                    _draw_rounded_rect(draw, [tx, tools_top - 2, tx + tw, tools_top + 26], 8, (230, 230, 225))
-                    draw.text((tx + 12, tools_top), tool, fill=DARK, font=font_meta)
-                    tx += tw + 10
-
-            # Bottom progress bar
-            bar_y = H - 20
-            draw.rectangle([0, bar_y, W, H], fill=(220, 220, 215))
-            progress = int(W * (idx + 1) / total)
-            draw.rectangle([0, bar_y, progress, H], fill=ACCENT)
-
-            img_path = os.path.join(temp_dir, f"step_{idx:03d}.png")
-            img.save(img_path)
-            image_files.append(img_path)
-
-        if not image_files:
-            return False
+                reader = threading.Thread(
+                    target=_pump_ffmpeg_progress,
+                    args=(stdout, total_seconds, on_progress),
+                    daemon=True,
+                )
+                reader.start()
+                try:
+                    for frame in frames:
+                        proc.stdin.write(frame)
+                except BrokenPipeError:
+                    # ffmpeg exited early; its return code and stderr say why
+                    pass
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                reader.join()
+            proc.wait()
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            stdout.close()
+
+        err_f.seek(0)
+        return proc.returncode, err_f.read()
+
+
+def _encode_from_files(steps, output_path, on_progress, timings, profile):
+    """PNG per slide in a temp dir, then ffmpeg concat. The dir is always removed."""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        t0 = time.perf_counter()
+        image_files = _render_slides(steps, temp_dir, on_progress)
+        timings["slides"] = round(time.perf_counter() - t0, 4)
 
         list_file = os.path.join(temp_dir, "images.txt")
         with open(list_file, 'w') as f:
             for img_file in image_files:
-                f.write(f"file '{img_file}'\nduration 7\n")
-
-        cmd = [
-            'ffmpeg', '-y',
-            '-f', 'concat', '-safe', '0', '-i', list_file,
-            '-vf', 'scale=1280:720,fps=24',
-            '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
-            '-preset', 'fast',
-            str(output_path)
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+                f.write(f"file '{img_file}'\nduration {RENDER_SETTINGS['slide_seconds']}\n")
+
+        t0 = time.perf_counter()
+        result = _run_ffmpeg(
+            _ffmpeg_cmd(['-f', 'concat', '-safe', '0', '-i', list_file], output_path, profile),
+            len(image_files) * RENDER_SETTINGS['slide_seconds'],
+            on_progress,
+        )
+        timings["encode"] = round(time.perf_counter() - t0, 4)
+        return result
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _encode_from_pipe(steps, output_path, on_progress, timings, profile):
+    """
+    Raw RGB frames written straight to ffmpeg's stdin: one frame per slide at
+    a 1/slide_seconds input rate, so no PNG encode/decode and no disk I/O.
+    Slide drawing overlaps with encoding; "slides" is the time spent drawing.
+    """
+    W, H = RENDER_SETTINGS["width"], RENDER_SETTINGS["height"]
+    total = len(steps)
+    drawn = {"seconds": 0.0, "count": 0}
 
-        shutil.rmtree(temp_dir)
+    def frames():
+        it = _iter_slide_frames(steps)
+        while True:
+            t0 = time.perf_counter()
+            frame = next(it, None)
+            drawn["seconds"] += time.perf_counter() - t0
+            if frame is None:
+                return
+            drawn["count"] += 1
+            on_progress(phase="slides", slides_rendered=drawn["count"], total_slides=total)
+            yield frame
+
+    input_args = [
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{W}x{H}",
+        '-framerate', f"1/{RENDER_SETTINGS['slide_seconds']}",
+        '-i', 'pipe:0',
+    ]
+    t0 = time.perf_counter()
+    result = _run_ffmpeg(
+        _ffmpeg_cmd(input_args, output_path, profile),
+        total * RENDER_SETTINGS['slide_seconds'],
+        on_progress,
+        frames=frames(),
+    )
+    timings["encode"] = round(time.perf_counter() - t0, 4)
+    timings["slides"] = round(drawn["seconds"], 4)
+    return result
+
+
+def create_video_from_steps(recipe_name, steps, output_path, on_progress=None, timings=None,
+                            mode=None, profile=None):
+    """
+    Render each cooking step as a slide image and combine into an MP4.
 
-        if result.returncode == 0:
-            logger.info(f"Video generated: {output_path}")
+    on_progress, if given, is called with keyword updates: phase,
+    slides_rendered / total_slides while drawing, ffmpeg_percent while encoding.
+    If `timings` is given, seconds per phase are recorded into it
+    ("slides", "encode"). mode is "pipe" or "files" (default VIDEO_RENDER_MODE);
+    profile is a key of ENCODING_PROFILES (default VIDEO_PROFILE).
+    """
+    if on_progress is None:
+        on_progress = lambda **kw: None
+    if timings is None:
+        timings = {}
+    if not steps:
+        return False
+    mode = mode or VIDEO_RENDER_MODE
+    try:
+        profile = _resolve_profile(profile)
+        if mode == "files":
+            returncode, stderr = _encode_from_files(steps, output_path, on_progress, timings, profile)
+        else:
+            returncode, stderr = _encode_from_pipe(steps, output_path, on_progress, timings, profile)
+
+        if returncode == 0:
+            logger.debug(f"Video encoded: {output_path} ({mode} mode, {profile} profile, phases: {timings})")
             return True
         else:
-            logger.error(f"FFmpeg error: {result.stderr}")
+            logger.error(f"FFmpeg error: {stderr}")
             return False
 
     except Exception as e:
@@ -285,30 +886,288 @@ def create_video_from_steps(recipe_name, steps, output_path):
         return False
 
 
-def generate_tutorial_video(recipe_name, steps):
-    """Generate tutorial video"""
-    video_dir = Path('generated_videos')
-    video_dir.mkdir(exist_ok=True)
+def video_cache_key(steps, profile=None):
+    """Hash of the step JSON that gets rendered plus the render and encoding settings."""
+    profile = _resolve_profile(profile)
+    raw = json.dumps(
+        {"steps": steps, "settings": RENDER_SETTINGS, "encoding": ENCODING_PROFILES[profile]},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
 
-    safe_name = "".join(c for c in recipe_name if c.isalnum() or c in (' ', '-', '_')).strip()
-    safe_name = safe_name.replace(' ', '_')[:50]
-    video_path = video_dir / f"{safe_name}_{int(time.time())}.mp4"
 
-    success = create_video_from_steps(recipe_name, steps['steps'], str(video_path))
+def _render_lock(key):
+    with _render_locks_guard:
+        return _render_locks.setdefault(key, threading.Lock())
 
-    if success and video_path.exists():
-        return f"/videos/{video_path.name}"
-    else:
+
+def evict_videos(keep=None):
+    """
+    Trim generated_videos/: drop files older than VIDEO_CACHE_MAX_AGE_DAYS
+    (by last access, since hits bump mtime), then the least recently used
+    ones until the directory is under VIDEO_CACHE_MAX_MB. Only
+    content-addressed videos are cache entries; other files are left alone.
+    """
+    try:
+        files = [
+            (p.stat().st_mtime, p.stat().st_size, p)
+            for p in VIDEO_DIR.glob('*.mp4')
+            if _CONTENT_ADDRESSED_RE.match(p.name) and p.name != keep
+        ]
+    except OSError:
+        return
+
+    cutoff = time.time() - VIDEO_CACHE_MAX_AGE_DAYS * 86400
+    limit = VIDEO_CACHE_MAX_MB * 1024 * 1024
+    total = sum(size for _, size, _ in files)
+    if keep:
+        try:
+            total += (VIDEO_DIR / keep).stat().st_size
+        except OSError:
+            pass
+
+    for mtime, size, path in sorted(files):
+        if mtime >= cutoff and total <= limit:
+            break
+        try:
+            path.unlink()
+            total -= size
+            logger.info(f"Evicted cached video {path.name}")
+        except OSError:
+            continue
+
+
+def _encoding_info(video_path, profile, encode_seconds=None):
+    """What the API reports about an encoded video."""
+    try:
+        size = video_path.stat().st_size
+    except OSError:
+        size = None
+    return {
+        "profile": profile,
+        "cached": encode_seconds is None,
+        "encode_seconds": encode_seconds,
+        "size_bytes": size,
+    }
+
+
+def cached_video(steps, profile=None):
+    """(url, encoding info) of an already rendered video for these steps, or None."""
+    profile = _resolve_profile(profile)
+    video_path = VIDEO_DIR / f"{video_cache_key(steps['steps'], profile)}.mp4"
+    if not video_path.exists():
+        cache_lookup("video", "miss")
+        return None
+    cache_lookup("video", "hit")
+    try:
+        os.utime(video_path)
+    except OSError:
+        pass
+    return f"/videos/{video_path.name}", _encoding_info(video_path, profile)
+
+
+def generate_tutorial_video(recipe_name, steps, profile=None, render=create_video_from_steps):
+    """
+    Generate tutorial video. Returns (video_url, encoding info).
+
+    Output is content-addressed: the file name is a hash of the step JSON,
+    RENDER_SETTINGS and the encoding profile, so the same guide is only
+    rendered once per profile and later requests get the existing file
+    immediately.
+
+    render(recipe_name, steps, output_path, timings=..., profile=...) does
+    the actual work; the background job passes one that runs in the render
+    process pool.
+    """
+    VIDEO_DIR.mkdir(parents=True, exist_ok=True)
+
+    profile = _resolve_profile(profile)
+    key = video_cache_key(steps['steps'], profile)
+    video_path = VIDEO_DIR / f"{key}.mp4"
+    timings = {}
+
+    with _render_lock(key):
+        if video_path.exists():
+            os.utime(video_path)
+            logger.info(f"Video cache hit: {video_path.name}")
+            return f"/videos/{video_path.name}", _encoding_info(video_path, profile)
+
+        # Render to a temp name so nobody is ever served a half-written file
+        tmp_path = VIDEO_DIR / f".{key}.tmp.mp4"
+        success = render(recipe_name, steps['steps'], str(tmp_path), timings=timings, profile=profile)
+        # Rendering may run in another process; record its phase timings here
+        for phase, seconds in timings.items():
+            STAGE_SECONDS.observe(seconds, stage=f"video_{phase}")
+
+        if success and tmp_path.exists():
+            os.replace(tmp_path, video_path)
+            logger.info(f"Video generated: {video_path} ({profile} profile, phases: {timings})")
+        elif tmp_path.exists():
+            tmp_path.unlink()
+
+    if not video_path.exists():
         raise Exception("Video generation failed")
 
+    evict_videos(keep=video_path.name)
+    return f"/videos/{video_path.name}", _encoding_info(video_path, profile, timings.get("encode", 0.0))
+
+
+def _init_render_worker(progress_queue):
+    global _worker_progress_queue, _in_render_worker
+    _worker_progress_queue = progress_queue
+    _in_render_worker = True
+
+
+def _render_worker(job_id, recipe_name, steps, output_path, profile):
+    """
+    Runs in a render process; progress goes back through the shared queue.
+    Returns (success, per-phase timings).
+    """
+    def progress(**update):
+        _worker_progress_queue.put(dict(update, job_id=job_id))
+
+    timings = {}
+    success = create_video_from_steps(
+        recipe_name, steps, output_path, on_progress=progress, timings=timings, profile=profile
+    )
+    return success, timings
+
+
+def _pump_progress():
+    """Parent-side thread: route progress messages from render processes to jobs."""
+    while True:
+        try:
+            update = _progress_queue.get()
+        except (EOFError, OSError):
+            return
+        job = find_job(update.pop("job_id", None) or "")
+        if job:
+            job.update(**update)
+
+
+def _get_render_pool():
+    global _render_pool, _progress_queue
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: forking a threaded web server process is not safe
+            ctx = multiprocessing.get_context("spawn")
+            _progress_queue = ctx.Queue()
+            _render_pool = ProcessPoolExecutor(
+                max_workers=VIDEO_RENDER_WORKERS,
+                mp_context=ctx,
+                initializer=_init_render_worker,
+                initargs=(_progress_queue,),
+            )
+            threading.Thread(target=_pump_progress, name="video-progress", daemon=True).start()
+        return _render_pool
+
+
+def shutdown_render_pool(wait=True):
+    """Stop the render process pool and the slide pool used by in-process renders."""
+    global _render_pool, _slide_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=wait)
+            _render_pool = None
+    with _slide_pool_lock:
+        if _slide_pool is not None:
+            _slide_pool.shutdown(wait=wait)
+            _slide_pool = None
+
+
+def _video_job(job, recipe_name, steps, profile):
+    job.update(phase="waiting", slides_rendered=0, total_slides=len(steps['steps']), ffmpeg_percent=0)
+
+    def render_in_pool(name, step_list, output_path, timings, profile):
+        future = _get_render_pool().submit(_render_worker, job.id, name, step_list, output_path, profile)
+        success, worker_timings = future.result()
+        timings.update(worker_timings)
+        job.stages.update(worker_timings)
+        return success
+
+    with job.stage("render"):
+        video_url, encoding = generate_tutorial_video(recipe_name, steps, profile, render=render_in_pool)
+    job.update(phase="done")
+    return {"video_url": video_url, "encoding": encoding}
+
+
+def _video_fields(recipe_name, enhanced_steps, profile, run_async=True):
+    """
+    video_url + encoding for a cached (or, when run_async is False, freshly
+    rendered) video; otherwise queue a render job and return its ids.
+    Raises QueueFull when the render queue is saturated.
+    """
+    video = cached_video(enhanced_steps, profile)
+    if video is None and not run_async:
+        video = generate_tutorial_video(recipe_name, enhanced_steps, profile)
+
+    if video is not None:
+        video_url, encoding = video
+        return {'video_url': video_url, 'encoding': encoding, 'job_id': None}
+
+    job = video_jobs.submit("video", _video_job, recipe_name, enhanced_steps, profile)
+    return {
+        'video_url': None,
+        'job_id': job.id,
+        'status_url': f"/api/jobs/{job.id}",
+        'events_url': f"/api/jobs/{job.id}/events",
+    }
+
+
+def _stream_cooking_guide(recipe_name, ingredients, original_steps, profile):
+    """SSE: a "step" event per generated step, then "done" with the guide and video fields."""
+    def generate():
+        for event in iter_cooking_steps(recipe_name, ingredients, original_steps):
+            if event["event"] == "done":
+                try:
+                    event.update(_video_fields(recipe_name, event["enhanced_steps"], profile))
+                except QueueFull as e:
+                    event.update({'video_url': None, 'job_id': None, 'video_error': str(e)})
+                event["success"] = True
+            yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @cooking_guide_bp.route('/api/generate-cooking-guide', methods=['POST'])
 def generate_cooking_guide():
-    """Generate detailed cooking steps and tutorial video"""
-    data = request.get_json()
+    """
+    Generate detailed cooking steps and tutorial video.
+
+    By default the video is rendered in the background: the response carries
+    the enhanced steps plus a job_id right away (202), and the video_url
+    arrives in the job result (GET /api/jobs/<id> or its /events stream).
+    A cached video is returned directly. Send "async": false to wait for the
+    render inline as before.
+
+    "profile" picks an ENCODING_PROFILES entry ("still" by default, or
+    "quality"); the response's "encoding" reports profile, encode_seconds
+    and size_bytes of the video.
+
+    With "stream": true (or ?stream=1) the response is Server-Sent Events
+    instead: a "step" event per step as Claude writes it, then "done" with
+    the full enhanced_steps and the same video fields.
+    """
+    data = request.get_json() or {}
     recipe_name = data.get('recipe_name', 'Unknown Recipe')
     ingredients = data.get('ingredients', [])
     original_steps = data.get('steps', [])
+    run_async = data.get('async', True) is not False
+    stream = data.get('stream') is True or request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+    profile = data.get('profile') or VIDEO_PROFILE
+    if profile not in ENCODING_PROFILES:
+        return {
+            'success': False,
+            'error': f"Unknown profile '{profile}', expected one of {sorted(ENCODING_PROFILES)}",
+        }, 400
+
+    if stream:
+        return _stream_cooking_guide(recipe_name, ingredients, original_steps, profile)
 
     try:
         enhanced_steps = optimize_cooking_steps(
@@ -317,26 +1176,74 @@ def generate_cooking_guide():
             original_steps
         )
 
-        video_url = generate_tutorial_video(
-            recipe_name,
-            enhanced_steps
-        )
+        try:
+            fields = _video_fields(recipe_name, enhanced_steps, profile, run_async)
+        except QueueFull as e:
+            return {'success': False, 'error': str(e), 'enhanced_steps': enhanced_steps}, 503
 
         return {
             'success': True,
             'enhanced_steps': enhanced_steps,
-            'video_url': video_url
-        }, 200
+            **fields,
+        }, 202 if fields['job_id'] else 200
     except Exception as e:
         logger.error(f"Failed to generate tutorial video: {str(e)}")
         return {'success': False, 'error': str(e)}, 500
 
 
+def _offload_video(video_path, etag, max_age, immutable):
+    """Empty response telling the front proxy to send the file itself."""
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(mimetype='video/mp4')
+        if VIDEO_SENDFILE == 'x-accel':
+            resp.headers['X-Accel-Redirect'] = VIDEO_ACCEL_PREFIX + video_path.name
+        else:
+            resp.headers['X-Sendfile'] = str(video_path)
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = max_age
+    resp.cache_control.immutable = immutable
+    return resp
+
+
 @cooking_guide_bp.route('/videos/<filename>')
 def serve_video(filename):
-    """Serve video file"""
+    """
+    Serve video file.
+
+    Supports byte ranges (seeking) and If-None-Match / If-Modified-Since.
+    Content-addressed videos get their hash as a strong ETag and an
+    immutable, year-long Cache-Control; older timestamp-named files fall
+    back to Werkzeug's mtime/size ETag and a short max-age.
+    """
+    if not _VIDEO_NAME_RE.match(filename):
+        return {'error': 'Video not found'}, 404
+    video_path = VIDEO_DIR / filename
+    if not video_path.is_file():
+        return {'error': 'Video not found'}, 404
+
+    match = _CONTENT_ADDRESSED_RE.match(filename)
+    immutable = match is not None
+    max_age = VIDEO_IMMUTABLE_MAX_AGE if immutable else VIDEO_MAX_AGE
+
     try:
-        return send_from_directory(os.path.abspath('generated_videos'), filename)
-    except Exception as e:
+        if VIDEO_SENDFILE in ('x-sendfile', 'x-accel'):
+            etag = match.group(1) if match else f"{int(video_path.stat().st_mtime)}-{video_path.stat().st_size}"
+            return _offload_video(video_path, etag, max_age, immutable)
+
+        resp = send_file(
+            video_path,
+            mimetype='video/mp4',
+            conditional=True,
+            etag=match.group(1) if match else True,
+            max_age=max_age,
+        )
+    except OSError as e:
         logger.error(f"Failed to retrieve video: {str(e)}")
         return {'error': 'Video not found'}, 404
+
+    resp.cache_control.public = True
+    resp.cache_control.immutable = immutable
+    return resp
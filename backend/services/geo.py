@@ -0,0 +1,113 @@
+"""
+Small geo helpers shared by the restaurant search.
+
+Geohash tiles are used as cache keys: a tile at precision 6 is roughly
+1.2 km x 0.6 km, so users a few hundred meters apart land in the same (or a
+neighboring) tile.
+
+haversine_km_vec works on NumPy coordinate arrays so distance filtering
+stays fast once cached place sets reach thousands of rows (see
+benchmarks/bench_geo.py).
+"""
+import math
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 6) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    out = []
+    bits, ch, even = 0, 0, True
+
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+
+    return "".join(out)
+
+
+def geohash_bbox(gh: str) -> Tuple[float, float, float, float]:
+    """Return (lat_min, lat_max, lng_min, lng_max) of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+
+    for c in gh:
+        v = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = (v >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+
+    return lat_lo, lat_hi, lng_lo, lng_hi
+
+
+def geohash_neighbors(gh: str) -> List[str]:
+    """The cell itself plus its 8 neighbors (fewer near the poles)."""
+    lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(gh)
+    dlat, dlng = lat_hi - lat_lo, lng_hi - lng_lo
+    clat, clng = (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2
+
+    cells = []
+    for dy in (-1, 0, 1):
+        lat = clat + dy * dlat
+        if lat < -90.0 or lat > 90.0:
+            continue
+        for dx in (-1, 0, 1):
+            lng = clng + dx * dlng
+            lng = (lng + 180.0) % 360.0 - 180.0
+            cell = geohash_encode(lat, lng, len(gh))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def haversine_km_vec(lat: float, lng: float, lats, lngs) -> "np.ndarray":
+    """Great-circle distance (km) from one origin to arrays of points."""
+    import numpy as np
+
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lngs = np.radians(np.asarray(lngs, dtype=np.float64))
+    p1 = math.radians(lat)
+    dphi = lats - p1
+    dl = lngs - math.radians(lng)
+    a = np.sin(dphi / 2) ** 2 + math.cos(p1) * np.cos(lats) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
@@ -0,0 +1,63 @@
+"""
+requests transport adapter and retry policy used by the pooled sessions in
+services/clients.py.
+
+Kept in its own module so requests/urllib3 are only imported when the
+first session is built, not at app startup.
+"""
+import threading
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from services.metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS, timed
+
+
+class UpstreamRetry(Retry):
+    """
+    Retry that never re-sends a POST the upstream may have processed.
+
+    Vision images:annotate and Places searchText are POSTs billed per call,
+    so POST is left out of allowed_methods: a read timeout is not retried.
+    Connection errors are (nothing was sent), and so are 429 / 503, which
+    the upstream returns without doing the work.
+    """
+
+    POST_RETRY_STATUSES = frozenset([429, 503])
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method and method.upper() == "POST":
+            return bool(self.total) and status_code in self.POST_RETRY_STATUSES
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts requests so we can report connection reuse, and
+    records each call's latency under its upstream name (services.metrics).
+    """
+
+    def __init__(self, name: str, *args, **kwargs):
+        self.name = name
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        with self._count_lock:
+            self.request_count += 1
+        with timed(UPSTREAM_SECONDS, errors=UPSTREAM_ERRORS, upstream=self.name):
+            response = super().send(request, *args, **kwargs)
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc(upstream=self.name)
+        return response
+
+    def connections_opened(self) -> int:
+        """Number of new TCP connections opened by the live host pools."""
+        pools = self.poolmanager.pools
+        total = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total += getattr(pool, "num_connections", 0)
+        return total
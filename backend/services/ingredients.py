@@ -0,0 +1,280 @@
+"""
+Ingredient line parsing shared by the web-recipe promotion and shopping lists.
+
+Scraped lines look like "2 large tomatoes, diced" or "1/2 cup (120 ml)
+heavy cream"; the local catalog and the recommender want the bare
+ingredient ("tomato", "heavy cream") with the amount kept separately.
+parse_ingredient_line() splits a line into (name, qty), where qty is the
+leading amount plus unit as written ("1/2 cup"), or None.
+
+For shopping lists, parse_quantity() reads a qty string ("120g",
+"1 1/2 tbsp", "2-3") into (amount, canonical unit) and to_base() converts
+volumes to ml and weights to g so amounts from different recipes can be
+summed; format_quantity() turns a total back into a readable string.
+"""
+import html
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Canonical unit -> spellings seen in recipes (all lowercase, without the trailing period)
+UNIT_ALIASES = {
+    "tsp": ("tsp", "tsps", "teaspoon", "teaspoons", "t"),
+    "tbsp": ("tbsp", "tbsps", "tbs", "tbl", "tablespoon", "tablespoons", "T"),
+    "cup": ("cup", "cups", "c"),
+    "fl oz": ("fl oz", "fl. oz", "fluid ounce", "fluid ounces"),
+    "pint": ("pint", "pints", "pt"),
+    "quart": ("quart", "quarts", "qt"),
+    "gallon": ("gallon", "gallons", "gal"),
+    "ml": ("ml", "milliliter", "milliliters", "millilitre", "millilitres"),
+    "l": ("l", "liter", "liters", "litre", "litres"),
+    "g": ("g", "gram", "grams", "gr"),
+    "kg": ("kg", "kilogram", "kilograms"),
+    "oz": ("oz", "ounce", "ounces"),
+    "lb": ("lb", "lbs", "pound", "pounds"),
+    "clove": ("clove", "cloves"),
+    "slice": ("slice", "slices"),
+    "can": ("can", "cans"),
+    "package": ("package", "packages", "pkg"),
+    "stick": ("stick", "sticks"),
+    "bunch": ("bunch", "bunches"),
+    "pinch": ("pinch", "pinches"),
+    "dash": ("dash", "dashes"),
+    "handful": ("handful", "handfuls"),
+    "sprig": ("sprig", "sprigs"),
+}
+_UNIT_LOOKUP = {alias: unit for unit, aliases in UNIT_ALIASES.items() for alias in aliases}
+
+# Units written in the plural for amounts other than one ("2 cups", but "2 tbsp")
+_PLURAL_UNITS = {
+    "cup", "pint", "quart", "gallon", "clove", "slice", "can", "package",
+    "stick", "bunch", "pinch", "dash", "handful", "sprig",
+}
+
+# Canonical unit -> (base unit, base units per unit); US customary measures.
+# Other units (clove, can, ...) are counted as they are.
+UNIT_CONVERSIONS = {
+    "tsp": ("ml", 4.92892),
+    "tbsp": ("ml", 14.7868),
+    "cup": ("ml", 236.588),
+    "fl oz": ("ml", 29.5735),
+    "pint": ("ml", 473.176),
+    "quart": ("ml", 946.353),
+    "gallon": ("ml", 3785.41),
+    "ml": ("ml", 1.0),
+    "l": ("ml", 1000.0),
+    "g": ("g", 1.0),
+    "kg": ("g", 1000.0),
+    "oz": ("g", 28.3495),
+    "lb": ("g", 453.592),
+}
+
+_FRACTIONS = "¼½¾⅓⅔⅛⅜⅝⅞"
+_FRACTION_VALUES = {"¼": 0.25, "½": 0.5, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3, "⅛": 0.125, "⅜": 0.375, "⅝": 0.625, "⅞": 0.875}
+_FRACTION_TEXT = {"¼": "1/4", "½": "1/2", "¾": "3/4", "⅓": "1/3", "⅔": "2/3", "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8"}
+# "1,000" (a comma before exactly three digits) is a thousands separator,
+# any other comma a decimal one ("1,5")
+_THOUSANDS = r"\d{1,3}(?:,\d{3})+(?!\d)(?:\.\d+)?"
+_THOUSANDS_RE = re.compile(rf"^{_THOUSANDS}$")
+# Mixed numbers and fractions before plain integers, so "1/2" isn't read as "1"
+_NUMBER = rf"(?:\d+\s+\d+\s*/\s*\d+|\d+\s*/\s*\d+|\d*\s*[{_FRACTIONS}]|{_THOUSANDS}|\d+(?:[.,]\d+)?)"
+_AMOUNT_RE = re.compile(rf"^(?P<amount>{_NUMBER}(?:\s*(?:-|–|to)\s*{_NUMBER})?)\s*", re.UNICODE)
+# Longest spellings first so "fl oz" wins over "fl"
+_UNIT_RE = re.compile(
+    r"^(?P<unit>"
+    + "|".join(re.escape(a) for a in sorted(_UNIT_LOOKUP, key=len, reverse=True))
+    + r")\.?(?=\s|$|\))\s*",
+)
+
+# Sizes and preparation words that are not part of the ingredient itself
+_DESCRIPTORS = re.compile(
+    r"\b(large|small|medium|extra|heaping|heaped|level|fresh|freshly|finely|roughly|thinly|coarsely|"
+    r"chopped|minced|diced|sliced|grated|shredded|crushed|peeled|seeded|halved|cubed|"
+    r"boneless|skinless|softened|melted|beaten|divided|optional|packed|ground|to taste)\b"
+    # "olive oil for frying", "parsley for the garnish"
+    r"|\bfor (the )?\w+\b.*$"
+)
+_LEADING_FILLER = re.compile(r"^(of|about|approximately|approx|plus|a|an)\s+")
+
+# Plurals that the suffix rules below would mangle
+_PLURAL_EXCEPTIONS = {
+    "tomatoes": "tomato",
+    "potatoes": "potato",
+    "leaves": "leaf",
+    "loaves": "loaf",
+    "berries": "berry",
+    "cherries": "cherry",
+    "anchovies": "anchovy",
+}
+# Page furniture that scrapers pick up next to the ingredient list
+_NOT_AN_INGREDIENT = re.compile(r"\d|https?\b|\bwww\b|\b(prep|cook|total) time\b|\bminutes?\b|\bservings?\b|\byield\b")
+
+_NO_SINGULAR = {"asparagus", "molasses", "hummus", "couscous", "swiss", "grits", "oats", "peas", "greens", "chips"}
+
+MAX_NAME_LENGTH = 50
+
+
+def singularize(word: str) -> str:
+    if word in _PLURAL_EXCEPTIONS:
+        return _PLURAL_EXCEPTIONS[word]
+    if word in _NO_SINGULAR or len(word) <= 3 or word.endswith("ss") or word.endswith("us"):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "oes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def _split_quantity(text: str) -> Tuple[Optional[str], Optional[str], str]:
+    """(amount, canonical unit, rest) for the start of a line."""
+    amount = unit = None
+    m = _AMOUNT_RE.match(text)
+    if m:
+        amount = re.sub(r"\s*/\s*", "/", re.sub(r"\s+", " ", m.group("amount"))).strip()
+        text = text[m.end():]
+        # "1 (14 oz) can tomatoes": the parenthetical describes the unit
+        text = re.sub(r"^\([^)]*\)\s*", "", text)
+        # "1 heaped tsp": the measure qualifier belongs to the unit
+        text = re.sub(r"^(heaped|heaping|level|scant|rounded|generous)\s+", "", text, flags=re.IGNORECASE)
+    m = _UNIT_RE.match(text) or _UNIT_RE.match(text.lower())
+    if m and (amount or m.group("unit").lower() in ("pinch", "dash", "handful", "bunch")):
+        unit = _UNIT_LOOKUP.get(m.group("unit")) or _UNIT_LOOKUP.get(m.group("unit").lower())
+        text = text[m.end():]
+    return amount, unit, text
+
+
+@lru_cache(maxsize=8192)
+def normalize_ingredient_name(text: str) -> str:
+    """Bare ingredient name: lowercase, no sizes / prep words / notes, singular last word."""
+    s = unicodedata.normalize("NFKC", html.unescape(text or "")).lower()
+    s = re.sub(r"\([^)]*\)", " ", s)
+    s = re.sub(r"^[^\w(]+", "", s)
+    # After the first comma or semicolon come preparation notes, unless the
+    # part before it was all descriptors ("boneless, skinless chicken thighs")
+    for part in re.split(r"[,;]", s):
+        part = _DESCRIPTORS.sub(" ", part)
+        part = re.sub(r"[^\w\s'&-]", " ", part)
+        part = re.sub(r"\s+", " ", part).strip(" -")
+        if part:
+            s = part
+            break
+    else:
+        return ""
+    s = _LEADING_FILLER.sub("", s)
+    if " or " in s:
+        s = s.split(" or ", 1)[0].strip()
+    words = s.split()
+    if not words:
+        return ""
+    words[-1] = singularize(words[-1])
+    return " ".join(words)[:MAX_NAME_LENGTH].strip()
+
+
+def parse_ingredient_line(line: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Split a recipe ingredient line into (name, qty).
+
+        "2 large tomatoes, diced"  -> ("tomato", "2")
+        "1/2 cup heavy cream"      -> ("heavy cream", "1/2 cup")
+        "1½ cups flour"            -> ("flour", "1 1/2 cup")
+        "2¾ oz dark chocolate"     -> ("dark chocolate", "2 3/4 oz")
+        "Salt and pepper to taste" -> ("salt and pepper", None)
+
+    Returns None for lines with no usable ingredient name.
+    """
+    text = html.unescape(line or "")
+    # Before NFKC, which would turn "1½" into "11⁄2" and lose the whole part
+    for char, fraction in _FRACTION_TEXT.items():
+        text = text.replace(char, f" {fraction}")
+    text = unicodedata.normalize("NFKC", text).replace("\xa0", " ").strip()
+    # Bullets and checkboxes ("•", "▢", "-")
+    text = re.sub(r"^[^\w(]+", "", text)
+    if not text:
+        return None
+    # Other vulgar fractions ("⅙") come out of NFKC with a fraction slash
+    text = text.replace("⁄", "/")
+    amount, unit, rest = _split_quantity(text)
+    name = normalize_ingredient_name(rest)
+    if len(name) < 2 or not re.search(r"[a-z]", name) or _NOT_AN_INGREDIENT.search(name):
+        return None
+    qty = " ".join(p for p in (amount, unit) if p) or None
+    return name, qty
+
+
+def _number_value(text: str) -> Optional[float]:
+    """"2", "1.5", "1,5", "1,000", "1/2", "2 1/2", "1½" -> float."""
+    total = 0.0
+    for part in text.split():
+        part = part.replace(",", "") if _THOUSANDS_RE.match(part) else part.replace(",", ".")
+        if part[-1] in _FRACTION_VALUES:
+            total += float(part[:-1] or 0) + _FRACTION_VALUES[part[-1]]
+        elif "/" in part:
+            num, _, den = part.partition("/")
+            if not num.isdigit() or not den.isdigit() or int(den) == 0:
+                return None
+            total += int(num) / int(den)
+        else:
+            try:
+                total += float(part)
+            except ValueError:
+                return None
+    return total
+
+
+@lru_cache(maxsize=4096)
+def parse_quantity(qty: Optional[str]) -> Optional[Tuple[float, Optional[str]]]:
+    """
+    (amount, canonical unit) for a qty string, or None when it has no
+    amount ("to taste", "few leaves"). A range counts as its upper end,
+    which is what you need to buy. unit is None for plain counts.
+
+        "120g"     -> (120.0, "g")
+        "1,000 g"  -> (1000.0, "g")
+        "1 tbsp"   -> (1.0, "tbsp")
+        "2-3"      -> (3.0, None)
+        "pinch"    -> (1.0, "pinch")
+    """
+    text = unicodedata.normalize("NFC", html.unescape(qty or "")).strip()
+    if not text:
+        return None
+    text = text.replace("⁄", "/")
+    amount, unit, _ = _split_quantity(text)
+    if amount is None:
+        return (1.0, unit) if unit else None
+    upper = re.split(r"\s*(?:-|–|to)\s*", amount)[-1]
+    value = _number_value(upper)
+    if value is None or value <= 0:
+        return None
+    return value, unit
+
+
+def to_base(amount: float, unit: Optional[str]) -> Tuple[float, Optional[str]]:
+    """Convert to ml / g where possible; other units are returned unchanged."""
+    if unit in UNIT_CONVERSIONS:
+        base, factor = UNIT_CONVERSIONS[unit]
+        return amount * factor, base
+    return amount, unit
+
+
+def _fmt_number(value: float) -> str:
+    if value >= 100:
+        return str(round(value))
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def format_quantity(amount: float, unit: Optional[str]) -> str:
+    """Readable "<amount> <unit>"; ml and g totals switch to l and kg from 1000."""
+    if unit == "ml" and amount >= 1000:
+        amount, unit = amount / 1000, "l"
+    elif unit == "g" and amount >= 1000:
+        amount, unit = amount / 1000, "kg"
+    number = _fmt_number(amount)
+    if not unit:
+        return number
+    if unit in _PLURAL_UNITS and number != "1":
+        unit += "es" if unit.endswith(("ch", "sh")) else "s"
+    return f"{number} {unit}"
@@ -0,0 +1,309 @@
+"""
+Background job queues for slow endpoints.
+
+A JobQueue runs submitted work on a bounded thread pool and keeps a small
+in-memory registry of jobs so the API can return a job id right away and
+let the client poll GET /api/jobs/<id> or follow GET /api/jobs/<id>/events
+(Server-Sent Events).
+
+Each job records per-stage timings (time spent queued, plus any stages the
+worker reports through job.stage(...)) so we can size the pools under load.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from services.metrics import register_collector
+
+
+# How long finished jobs stay pollable before they are dropped
+FINISHED_JOB_TTL_SECONDS = 600
+
+
+class QueueFull(Exception):
+    """Raised when a queue already holds max_pending unfinished jobs."""
+
+
+class Job:
+    """
+    A single unit of background work.
+
+    status goes queued -> running -> done | error.
+    """
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+        # Bumped on every change so SSE followers can wait for updates
+        self._version = 0
+        self._cond = threading.Condition()
+
+    def _touch(self):
+        with self._cond:
+            self._version += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a named stage of the job, e.g. `with job.stage("vision"): ...`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - t0, 4)
+            self._touch()
+
+    def update(self, **progress):
+        """Merge progress fields (e.g. slides_rendered=3) and notify followers."""
+        self.progress.update(progress)
+        self._touch()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stages": dict(self.stages),
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+        }
+
+    def events(self, timeout: float = 120.0, keepalive: float = 15.0) -> Iterator[str]:
+        """
+        Yield SSE-formatted messages for every change until the job finishes
+        (or `timeout` seconds pass). Comment lines keep proxies from closing
+        an idle connection.
+        """
+        deadline = time.monotonic() + timeout
+        seen = -1
+        while True:
+            with self._cond:
+                if self._version == seen:
+                    self._cond.wait(timeout=keepalive)
+                version = self._version
+
+            if version != seen:
+                seen = version
+                event = "done" if self.finished else "progress"
+                yield f"event: {event}\ndata: {json.dumps(self.to_dict(), default=str)}\n\n"
+                if self.finished:
+                    return
+            else:
+                yield ": keepalive\n\n"
+
+            if time.monotonic() >= deadline:
+                yield "event: timeout\ndata: {}\n\n"
+                return
+
+
+class JobQueue:
+    """
+    Bounded worker pool + job registry.
+
+    max_workers caps concurrency; max_pending caps queued+running jobs so a
+    burst of uploads is rejected (503) instead of growing memory without limit.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_pending: int = 64):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"{name}-job",
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        # Recent finished jobs, used for the timing averages in stats()
+        self._recent = deque(maxlen=200)
+        self._completed = 0
+        self._failed = 0
+        self._closed = False
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queue fn(job, *args, **kwargs). Its return value becomes job.result;
+        an exception marks the job as failed with the error message.
+        """
+        self._prune()
+        with self._lock:
+            if self._closed:
+                raise QueueFull(f"{self.name} queue is shutting down")
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{self.name} queue is full ({pending} pending jobs)")
+            job = Job(kind)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs):
+        job.started_at = time.time()
+        job.stages["queued"] = round(job.started_at - job.created_at, 4)
+        job.status = "running"
+        job._touch()
+        try:
+            result, error = fn(job, *args, **kwargs), None
+        except Exception as e:
+            result, error = None, str(e)
+
+        with self._lock:
+            if job.finished:
+                # drain() gave up on this job and already failed it
+                return
+            job.result, job.error = result, error
+            job.status = "done" if error is None else "error"
+            job.finished_at = time.time()
+            job.stages["total"] = round(job.finished_at - job.created_at, 4)
+            self._recent.append(dict(job.stages))
+            if job.status == "done":
+                self._completed += 1
+            else:
+                self._failed += 1
+        job._touch()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - FINISHED_JOB_TTL_SECONDS
+        with self._lock:
+            stale = [
+                jid for jid, j in self._jobs.items()
+                if j.finished and (j.finished_at or 0) < cutoff
+            ]
+            for jid in stale:
+                del self._jobs[jid]
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and average per-stage timings over recent jobs."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            recent = list(self._recent)
+            completed, failed = self._completed, self._failed
+
+        totals: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        for stages in recent:
+            for name, secs in stages.items():
+                totals[name] = totals.get(name, 0.0) + secs
+                counts[name] = counts.get(name, 0) + 1
+
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "queued": sum(1 for j in jobs if j.status == "queued"),
+            "running": sum(1 for j in jobs if j.status == "running"),
+            "completed": completed,
+            "failed": failed,
+            "avg_stage_seconds": {
+                name: round(totals[name] / counts[name], 4) for name in totals
+            },
+        }
+
+    def unfinished(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if not j.finished)
+
+    def drain(self, timeout: float) -> int:
+        """
+        Refuse new jobs, wait up to `timeout` seconds for queued and running
+        ones, then shut the pool down (jobs that never started are
+        cancelled). Jobs still unfinished are marked as failed so pollers
+        and SSE followers stop waiting on them. Returns how many there were.
+        """
+        with self._lock:
+            self._closed = True
+        deadline = time.monotonic() + timeout
+        while self.unfinished() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        # Under the lock, so a _run finishing right now either records its
+        # result first (and is skipped here) or sees the job already failed
+        with self._lock:
+            left = [j for j in self._jobs.values() if j.status in ("queued", "running")]
+            now = time.time()
+            for job in left:
+                job.error = "cancelled: server shutting down"
+                job.status = "error"
+                job.finished_at = now
+            self._failed += len(left)
+        for job in left:
+            job._touch()
+        return len(left)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+# Registered queues, looked up by the generic /api/jobs routes
+_queues: Dict[str, JobQueue] = {}
+
+
+def get_queue(name: str, max_workers: int = 4, max_pending: int = 64) -> JobQueue:
+    """Return the named queue, creating it on first use."""
+    queue = _queues.get(name)
+    if queue is None:
+        queue = _queues.setdefault(name, JobQueue(name, max_workers, max_pending))
+    return queue
+
+
+def find_job(job_id: str) -> Optional[Job]:
+    for queue in list(_queues.values()):
+        job = queue.get(job_id)
+        if job:
+            return job
+    return None
+
+
+def all_stats() -> Dict[str, Any]:
+    return {name: q.stats() for name, q in list(_queues.items())}
+
+
+def _job_gauges() -> List[str]:
+    lines = [
+        "# HELP smarteats_jobs Background jobs currently queued or running.",
+        "# TYPE smarteats_jobs gauge",
+    ]
+    for name, stats in all_stats().items():
+        for state in ("queued", "running"):
+            lines.append(f'smarteats_jobs{{queue="{name}",state="{state}"}} {stats[state]}')
+    return lines
+
+
+register_collector(_job_gauges)
+
+
+def drain_all(timeout: float) -> Dict[str, int]:
+    """Drain every queue within one shared deadline; unfinished jobs per queue."""
+    deadline = time.monotonic() + timeout
+    return {
+        name: q.drain(max(0.0, deadline - time.monotonic()))
+        for name, q in list(_queues.items())
+    }
@@ -0,0 +1,225 @@
+"""
+In-process metrics with a Prometheus text exposition (GET /metrics).
+
+Everything is recorded through a handful of shared series:
+- REQUEST_SECONDS: per-route latency, recorded by init_request_metrics()
+- UPSTREAM_SECONDS / UPSTREAM_ERRORS: outbound calls; the pooled sessions
+  from services.clients time themselves, Claude calls use timed()
+- STAGE_SECONDS: named internal stages (HTML parsing, SQLite, slide
+  drawing, ffmpeg encode, ...)
+- CACHE_LOOKUPS: hit / miss / stale per cache layer
+
+    with timed(STAGE_SECONDS, stage="webrecipes_parse"):
+        ...
+    cache_lookup("geocode", "hit")
+
+Series live in process memory, so with several gunicorn workers each
+worker reports its own numbers.
+"""
+import abc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for every label set recorded so far."""
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_label_str(self.labels, k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> [per-bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, seconds: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += seconds
+            row[-1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, row):
+                cumulative += n
+                le = f'le="{_fmt(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_fmt(row[-2])}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {row[-1]}")
+        return lines
+
+
+_registry: List[_Metric] = []
+# Callables returning extra exposition lines, evaluated at scrape time
+_collectors: List[Callable[[], List[str]]] = []
+
+
+REQUEST_SECONDS = Histogram(
+    "smarteats_http_request_duration_seconds",
+    "Time to produce a response (headers) per route.",
+    ("method", "route", "status"),
+)
+UPSTREAM_SECONDS = Histogram(
+    "smarteats_upstream_request_duration_seconds",
+    "Outbound call latency per upstream, including retries.",
+    ("upstream",),
+)
+UPSTREAM_ERRORS = Counter(
+    "smarteats_upstream_errors_total",
+    "Outbound calls that raised or returned an HTTP error status.",
+    ("upstream",),
+)
+STAGE_SECONDS = Histogram(
+    "smarteats_stage_duration_seconds",
+    "Duration of internal processing stages.",
+    ("stage",),
+)
+CACHE_LOOKUPS = Counter(
+    "smarteats_cache_lookups_total",
+    "Cache lookups per layer and result (hit, miss, stale).",
+    ("cache", "result"),
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, errors: Optional[Counter] = None, **labels) -> Iterator[None]:
+    """
+    Observe the duration of the block in `histogram`. The time is recorded
+    even when the block raises; `errors`, if given, is incremented then,
+    except for GeneratorExit: a generator timing a stream is closed that way
+    when its consumer (e.g. an SSE client) goes away, which is not an error.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    except GeneratorExit:
+        raise
+    except BaseException:
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - t0, **labels)
+
+
+def cache_lookup(cache: str, result: str):
+    CACHE_LOOKUPS.inc(cache=cache, result=result)
+
+
+def register_collector(fn: Callable[[], List[str]]):
+    """Add a callable producing extra exposition lines (e.g. gauges) at scrape time."""
+    _collectors.append(fn)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    for fn in list(_collectors):
+        try:
+            lines.extend(fn())
+        except Exception:
+            continue
+    return "\n".join(lines) + "\n"
+
+
+def init_request_metrics(app):
+    """Record REQUEST_SECONDS for every request handled by `app`."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_t0 = time.perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        t0 = g.pop("_metrics_t0", None)
+        if t0 is not None:
+            rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - t0,
+                method=request.method,
+                route=rule,
+                status=str(response.status_code),
+            )
+        return response
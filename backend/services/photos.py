@@ -0,0 +1,264 @@
+"""
+Places photo proxy with an on-disk thumbnail cache.
+
+Restaurant rows point at /api/places/photo/<id> instead of the Places media
+URL, so the API key never reaches the browser and each photo is fetched
+from Google only once. <id> is the Places photo name
+("places/<place>/photos/<ref>") in URL-safe base64.
+
+Layout under PHOTO_CACHE_DIR:
+- objects/<sha256>.<ext>: image bytes, named by their content hash (also the ETag)
+- refs/<sha1 of photo name + variant>: name of the object for that variant
+
+The original (fetched at ORIGINAL_WIDTH) is kept as an object too, so new
+thumbnail sizes are resized locally. Object mtime is bumped on every hit and
+the least recently used objects are evicted once the cache grows past
+PHOTO_CACHE_MAX_MB; the same pass removes the refs left pointing at them.
+"""
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from services.clients import get_session
+from services.metrics import STAGE_SECONDS, cache_lookup, timed
+
+GOOGLE_KEY = os.getenv("GOOGLE_API_KEY")
+# Same setting as services.places (not imported from there: places imports us)
+PLACES_BASE_URL = os.getenv("PLACES_BASE_URL", "https://places.googleapis.com").rstrip("/")
+
+PHOTO_CACHE_DIR = Path(
+    os.getenv("PHOTO_CACHE_DIR", Path(__file__).resolve().parent.parent / "photo_cache")
+)
+PHOTO_CACHE_MAX_MB = int(os.getenv("PHOTO_CACHE_MAX_MB", "200"))
+
+# Thumbnail widths are snapped to these buckets so clients share variants
+WIDTH_BUCKETS = (160, 400, 800)
+ORIGINAL_WIDTH = 800
+
+PHOTO_MAX_AGE = 7 * 24 * 3600
+
+_PHOTO_NAME_RE = re.compile(r"^places/[A-Za-z0-9_-]+/photos/[A-Za-z0-9_-]+$")
+
+_MIMETYPES = {"webp": "image/webp", "jpg": "image/jpeg"}
+
+_evict_lock = threading.Lock()
+_last_evict = 0.0
+
+
+class PhotoError(Exception):
+    """Photo could not be served; `status` is the HTTP status to return."""
+
+    def __init__(self, message: str, status: int = 502):
+        super().__init__(message)
+        self.status = status
+
+
+def photo_proxy_path(photo_name: str) -> str:
+    photo_id = base64.urlsafe_b64encode(photo_name.encode("utf-8")).decode("ascii").rstrip("=")
+    return f"/api/places/photo/{photo_id}"
+
+
+def _decode_photo_id(photo_id: str) -> str:
+    try:
+        padded = photo_id + "=" * (-len(photo_id) % 4)
+        name = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise PhotoError("invalid photo id", 400)
+    if not _PHOTO_NAME_RE.match(name):
+        raise PhotoError("invalid photo id", 400)
+    return name
+
+
+def _snap_width(width: Optional[int]) -> int:
+    if not width:
+        return 400
+    for bucket in WIDTH_BUCKETS:
+        if width <= bucket:
+            return bucket
+    return WIDTH_BUCKETS[-1]
+
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _ref_path(photo_name: str, variant: str) -> Path:
+    digest = hashlib.sha1(f"{photo_name}|{variant}".encode("utf-8")).hexdigest()
+    return PHOTO_CACHE_DIR / "refs" / digest
+
+
+def _lookup(photo_name: str, variant: str) -> Optional[Path]:
+    ref = _ref_path(photo_name, variant)
+    try:
+        obj = PHOTO_CACHE_DIR / "objects" / ref.read_text().strip()
+    except OSError:
+        return None
+    if not obj.exists():
+        # Object was evicted; drop the dangling ref
+        try:
+            ref.unlink()
+        except OSError:
+            pass
+        return None
+    try:
+        os.utime(obj)
+    except OSError:
+        pass
+    return obj
+
+
+def _store(photo_name: str, variant: str, data: bytes, ext: str) -> Path:
+    sha = hashlib.sha256(data).hexdigest()
+    obj = PHOTO_CACHE_DIR / "objects" / f"{sha}.{ext}"
+    if not obj.exists():
+        _atomic_write(obj, data)
+    _atomic_write(_ref_path(photo_name, variant), obj.name.encode("ascii"))
+    _maybe_evict()
+    return obj
+
+
+def _sweep_refs() -> int:
+    """Delete refs whose object is gone; returns how many."""
+    objects_dir = PHOTO_CACHE_DIR / "objects"
+    removed = 0
+    for entry in os.scandir(PHOTO_CACHE_DIR / "refs"):
+        if not entry.is_file() or entry.name.startswith(".tmp-"):
+            continue
+        try:
+            with open(entry.path) as f:
+                if (objects_dir / f.read().strip()).exists():
+                    continue
+            os.unlink(entry.path)
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def _maybe_evict(min_interval: float = 30.0):
+    """
+    Trim the cache to ~90% of PHOTO_CACHE_MAX_MB, oldest access first, and
+    drop the refs of evicted objects.
+    """
+    global _last_evict
+    now = time.monotonic()
+    if now - _last_evict < min_interval or not _evict_lock.acquire(blocking=False):
+        return
+    try:
+        _last_evict = now
+        objects_dir = PHOTO_CACHE_DIR / "objects"
+        entries = []
+        total = 0
+        for entry in os.scandir(objects_dir):
+            if not entry.is_file() or entry.name.startswith(".tmp-"):
+                continue
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+
+        limit = PHOTO_CACHE_MAX_MB * 1024 * 1024
+        if total <= limit:
+            return
+        target = int(limit * 0.9)
+        for _, size, path in sorted(entries):
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                continue
+            if total <= target:
+                break
+        _sweep_refs()
+    except OSError:
+        pass
+    finally:
+        _evict_lock.release()
+
+
+def _fetch_original(photo_name: str) -> Tuple[bytes, str]:
+    if not GOOGLE_KEY:
+        raise PhotoError("GOOGLE_API_KEY not set", 503)
+    url = f"{PLACES_BASE_URL}/v1/{photo_name}/media"
+    try:
+        resp = get_session("places").get(
+            url,
+            params={"maxWidthPx": ORIGINAL_WIDTH, "key": GOOGLE_KEY},
+            timeout=15,
+        )
+    except Exception as e:
+        raise PhotoError(f"photo fetch failed: {e}")
+    if resp.status_code == 404:
+        raise PhotoError("photo not found", 404)
+    if resp.status_code != 200:
+        raise PhotoError(f"photo fetch failed: HTTP {resp.status_code}")
+    ext = "webp" if "webp" in resp.headers.get("Content-Type", "") else "jpg"
+    return resp.content, ext
+
+
+def _resize(data: bytes, width: int, fmt: str) -> bytes:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB")
+        if img.width > width:
+            img.thumbnail((width, width * 4))
+        out = io.BytesIO()
+        if fmt == "webp":
+            img.save(out, "WEBP", quality=80, method=4)
+        else:
+            img.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+def get_photo(photo_id: str, width: Optional[int] = None, accept: str = "") -> Tuple[Path, str, str]:
+    """
+    Return (path, mimetype, etag) for a cached thumbnail, fetching and
+    resizing it on first use. WebP is served when the client accepts it.
+    """
+    photo_name = _decode_photo_id(photo_id)
+    fmt = "webp" if "image/webp" in (accept or "") else "jpg"
+    variant = f"{_snap_width(width)}.{fmt}"
+
+    obj = _lookup(photo_name, variant)
+    cache_lookup("photo", "hit" if obj is not None else "miss")
+    if obj is None:
+        original = _lookup(photo_name, "orig")
+        cache_lookup("photo_original", "hit" if original is not None else "miss")
+        data = None
+        if original is not None:
+            try:
+                data = original.read_bytes()
+            except OSError:
+                # Evicted between the lookup and the read
+                pass
+        if data is None:
+            data, ext = _fetch_original(photo_name)
+            _store(photo_name, "orig", data, ext)
+        try:
+            with timed(STAGE_SECONDS, stage="photo_resize"):
+                thumb = _resize(data, _snap_width(width), fmt)
+        except Exception as e:
+            raise PhotoError(f"could not decode photo: {e}")
+        obj = _store(photo_name, variant, thumb, fmt)
+
+    etag = obj.name.split(".", 1)[0]
+    return obj, _MIMETYPES[fmt], etag
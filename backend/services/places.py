@@ -1,17 +1,40 @@
+import hashlib
+import json
 import math
 import os
-from typing import Any, Dict, List, Optional
-
-import requests
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from models import db, GeocodeCache, PlacesTileCache
+from services.clients import get_session
+from services.database import write_behind
+from services.metrics import STAGE_SECONDS, cache_lookup, timed
+from services.photos import photo_proxy_path
+from services.geo import (
+    geohash_bbox,
+    geohash_encode,
+    geohash_neighbors,
+    haversine_km_vec,
+)
 
 GOOGLE_KEY = os.getenv("GOOGLE_API_KEY")
 
+# Base URLs are overridable so benchmarks can point at benchmarks/fake_upstream.py
+PLACES_BASE_URL = os.getenv("PLACES_BASE_URL", "https://places.googleapis.com").rstrip("/")
+GEOCODING_BASE_URL = os.getenv("GEOCODING_BASE_URL", "https://maps.googleapis.com").rstrip("/")
+NOMINATIM_BASE_URL = os.getenv("NOMINATIM_BASE_URL", "https://nominatim.openstreetmap.org").rstrip("/")
+
 # Places API (New) — avoids legacy Nearby/Text endpoints disabled on many new projects
-PLACES_SEARCH_TEXT_URL = "https://places.googleapis.com/v1/places:searchText"
+PLACES_SEARCH_TEXT_URL = f"{PLACES_BASE_URL}/v1/places:searchText"
 
 # Legacy Geocoding (optional); Nominatim used as fallback when disabled or failing
-GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+GEOCODE_URL = f"{GEOCODING_BASE_URL}/maps/api/geocode/json"
+NOMINATIM_URL = f"{NOMINATIM_BASE_URL}/search"
 
 # Field mask required by Places API (New)
 _PLACES_FIELD_MASK = ",".join(
@@ -32,6 +55,24 @@ _PLACES_FIELD_MASK = ",".join(
 
 NOMINATIM_UA = "SmartEats-SeniorDesign/1.0 (https://github.com/; student demo)"
 
+# Coordinates for a town don't move: keep hits for a month, misses for a day
+GEOCODE_CACHE_TTL_DAYS = int(os.getenv("GEOCODE_CACHE_TTL_DAYS", "30"))
+GEOCODE_NEGATIVE_TTL_HOURS = int(os.getenv("GEOCODE_NEGATIVE_TTL_HOURS", "24"))
+
+# Restaurant results per (cuisine, geohash tile); precision 6 is ~1.2 x 0.6 km
+PLACES_TILE_PRECISION = int(os.getenv("PLACES_TILE_PRECISION", "6"))
+# Largest circle Places accepts in locationBias
+PLACES_MAX_RADIUS_M = 50000
+PLACES_CACHE_TTL_HOURS = int(os.getenv("PLACES_CACHE_TTL_HOURS", "24"))
+
+# Multi-cuisine search: concurrent Places calls, and caps on the fan-out
+PLACES_FANOUT_WORKERS = int(os.getenv("PLACES_FANOUT_WORKERS", "4"))
+MAX_CUISINES = 5
+MAX_PAGES = 3
+
+# Nominatim usage policy: at most 1 request per second
+NOMINATIM_MIN_INTERVAL = float(os.getenv("NOMINATIM_MIN_INTERVAL", "1.0"))
+
 
 def _haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     r = 6371.0
@@ -62,6 +103,7 @@ def _new_place_to_row(
     place: Dict[str, Any],
     origin_lat: float,
     origin_lng: float,
+    distance_km: Optional[float] = None,
 ) -> Optional[Dict[str, Any]]:
     loc = place.get("location") or {}
     plat = loc.get("latitude")
@@ -71,7 +113,8 @@ def _new_place_to_row(
         return None
 
     plat_f, plng_f = float(plat), float(plng)
-    distance_km = _haversine_km(origin_lat, origin_lng, plat_f, plng_f)
+    if distance_km is None:
+        distance_km = _haversine_km(origin_lat, origin_lng, plat_f, plng_f)
 
     dn = place.get("displayName") or {}
     name = dn.get("text") if isinstance(dn, dict) else str(dn or "")
@@ -83,16 +126,13 @@ def _new_place_to_row(
     hours = place.get("currentOpeningHours") or {}
     open_now = hours.get("openNow")
 
-    # Build photo URL — stays server-side so the key never leaves the backend response
+    # Photos go through our caching proxy so the API key never reaches the client
     photo_url = None
     photos = place.get("photos") or []
     if photos and GOOGLE_KEY:
         photo_name = (photos[0] or {}).get("name")
         if photo_name:
-            photo_url = (
-                f"https://places.googleapis.com/v1/{photo_name}/media"
-                f"?maxWidthPx=400&key={GOOGLE_KEY}"
-            )
+            photo_url = photo_proxy_path(photo_name)
 
     return {
         "name": name or "Restaurant",
@@ -113,29 +153,30 @@ def _new_place_to_row(
     }
 
 
-def search_restaurants(
-    cuisine: str,
-    lat: float,
-    lng: float,
-    radius: int = 2000,
-) -> Dict[str, Any]:
+def _places_error(resp) -> Dict[str, Any]:
+    try:
+        payload = resp.json()
+        err = payload.get("error") or {}
+        error_message = err.get("message") or resp.text[:500]
+        status = err.get("status") or f"HTTP_{resp.status_code}"
+    except Exception:
+        error_message = resp.text[:500] if resp.text else str(resp.status_code)
+        status = f"HTTP_{resp.status_code}"
+    return {"results": [], "status": status, "error_message": error_message}
+
+
+def _fetch_places(cuisine: str, lat: float, lng: float, radius_m: float, pages: int = 1):
     """
-    Restaurant search via Places API (New) Text Search + location restriction.
+    Places Text Search for one cuisine, following nextPageToken up to `pages`
+    pages of 20 results.
+    Returns (places, None) on success or (None, error_payload) on failure.
     """
-    if not GOOGLE_KEY:
-        return {
-            "results": [],
-            "status": "NO_API_KEY",
-            "error_message": "Set GOOGLE_API_KEY in backend/.env",
-        }
-
-    radius_m = float(max(500, min(int(radius), 50000)))
     text_query = f"{cuisine.strip()} restaurant"
 
     headers = {
         "Content-Type": "application/json",
         "X-Goog-Api-Key": GOOGLE_KEY,
-        "X-Goog-FieldMask": _PLACES_FIELD_MASK,
+        "X-Goog-FieldMask": _PLACES_FIELD_MASK + ",nextPageToken",
     }
 
     # Places API (New): locationRestriction only accepts rectangle; circle is
@@ -152,46 +193,351 @@ def search_restaurants(
         },
     }
 
+    places: List[Dict[str, Any]] = []
+    for page in range(max(1, pages)):
+        try:
+            resp = get_session("places").post(
+                PLACES_SEARCH_TEXT_URL,
+                headers=headers,
+                json=body,
+                timeout=15,
+            )
+        except Exception as e:
+            if page:
+                break
+            return None, {"results": [], "status": "HTTP_ERROR", "error_message": str(e)}
+
+        if resp.status_code != 200:
+            # Keep what earlier pages returned rather than failing the search
+            if page:
+                break
+            return None, _places_error(resp)
+
+        data = resp.json()
+        places.extend(data.get("places") or [])
+        token = data.get("nextPageToken")
+        if not token:
+            break
+        body["pageToken"] = token
+
+    return places, None
+
+
+def _rows_from_places(
+    places: List[Dict[str, Any]],
+    lat: float,
+    lng: float,
+    radius_m: float,
+    limit: int = 15,
+) -> List[Dict[str, Any]]:
+    """
+    Distance, radius filter and ranking, always relative to this request's origin.
+
+    Distances are computed with NumPy over all candidates at once (see
+    benchmarks/bench_geo.py); response rows are only built for the places
+    that survive the filter.
+    """
+    import numpy as np
+
+    located: List[Dict[str, Any]] = []
+    seen = set()
+    for p in places:
+        pid = p.get("id")
+        if pid and pid in seen:
+            continue
+        loc = p.get("location") or {}
+        if loc.get("latitude") is None or loc.get("longitude") is None:
+            continue
+        located.append(p)
+        if pid:
+            seen.add(pid)
+
+    if not located:
+        return []
+
+    lats = [float(p["location"]["latitude"]) for p in located]
+    lngs = [float(p["location"]["longitude"]) for p in located]
+    max_km = radius_m * 1.15 / 1000
+
+    dist_all = haversine_km_vec(lat, lng, lats, lngs)
+    idx = np.flatnonzero(dist_all <= max_km)
+    idx = idx[np.argsort(dist_all[idx], kind="stable")]
+    dist = dist_all[idx]
+
+    rows: List[Dict[str, Any]] = []
+    for i, d in zip(idx[:limit].tolist(), dist[:limit].tolist()):
+        row = _new_place_to_row(located[i], lat, lng, distance_km=round(d, 2))
+        if row:
+            rows.append(row)
+    return rows
+
+
+def _tile_diagonal_m(tile: str) -> float:
+    lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(tile)
+    return _haversine_km(lat_lo, lng_lo, lat_hi, lng_hi) * 1000
+
+
+def _fetch_radius_m(tile: str, radius_m: float) -> float:
+    """
+    Radius to ask Places for on a miss: padded by the tile diagonal, so the
+    cached circle also covers this radius around any other origin in the tile.
+    """
+    # +20 m: _haversine_km rounds to 10 m
+    return float(min(math.ceil(radius_m + _tile_diagonal_m(tile)) + 20, PLACES_MAX_RADIUS_M))
+
+
+def _tile_covers(entry: PlacesTileCache, lat: float, lng: float, radius_m: float) -> bool:
+    """
+    True if the entry's query circle surely contains our circle. Rows
+    written before the origin was stored only know their tile, so assume
+    the worst spot in it.
+    """
+    if entry.lat is not None and entry.lng is not None:
+        return entry.radius_m >= radius_m + _haversine_km(lat, lng, entry.lat, entry.lng) * 1000
+    lat_lo, lat_hi, lng_lo, lng_hi = geohash_bbox(entry.tile)
+    clat, clng = (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2
+    dist_m = _haversine_km(lat, lng, clat, clng) * 1000
+    return entry.radius_m >= radius_m + dist_m + _tile_diagonal_m(entry.tile) / 2
+
+
+def _read_tile_cache(
+    cuisine_key: str,
+    tile: str,
+    lat: float,
+    lng: float,
+    radius_m: float,
+    pages: int = 1,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return raw places for a query whose origin falls in `tile`, or None on a miss.
+
+    It is a hit when a fresh entry of this or a neighboring tile was fetched
+    with at least this page count and its circle covers the whole requested
+    circle. Fresh entries of all 9 tiles are merged in as candidates.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=PLACES_CACHE_TTL_HOURS)
     try:
-        resp = requests.post(
-            PLACES_SEARCH_TEXT_URL,
-            headers=headers,
-            json=body,
-            timeout=15,
+        entries = (
+            PlacesTileCache.query
+            .filter(PlacesTileCache.cuisine == cuisine_key)
+            .filter(PlacesTileCache.tile.in_(geohash_neighbors(tile)))
+            .filter(PlacesTileCache.created_at >= cutoff)
+            .all()
         )
-    except Exception as e:
-        return {"results": [], "status": "HTTP_ERROR", "error_message": str(e)}
+    except Exception:
+        return None
 
-    if resp.status_code != 200:
+    covered = any((e.pages or 1) >= pages and _tile_covers(e, lat, lng, radius_m) for e in entries)
+    if not covered:
+        return None
+
+    places: List[Dict[str, Any]] = []
+    for entry in entries:
         try:
-            payload = resp.json()
-            err = payload.get("error") or {}
-            error_message = err.get("message") or resp.text[:500]
-            status = err.get("status") or f"HTTP_{resp.status_code}"
+            places.extend(json.loads(entry.places_json))
         except Exception:
-            error_message = resp.text[:500] if resp.text else str(resp.status_code)
-            status = f"HTTP_{resp.status_code}"
-        return {"results": [], "status": status, "error_message": error_message}
+            continue
+    return places
 
-    places = resp.json().get("places") or []
 
-    rows: List[Dict[str, Any]] = []
-    for p in places:
-        row = _new_place_to_row(p, lat, lng)
-        if row and (row["distance_km"] * 1000) <= radius_m * 1.15:
-            rows.append(row)
+def _write_tile_cache(
+    cuisine_key: str,
+    tile: str,
+    lat: float,
+    lng: float,
+    radius_m: float,
+    places: List[Dict[str, Any]],
+    pages: int = 1,
+):
+    """Best-effort upsert of the raw places for (cuisine, tile), applied by the write-behind thread."""
+    payload = json.dumps(places, ensure_ascii=False)
+    write_behind(
+        _upsert_tile_cache, cuisine_key, tile, float(lat), float(lng), int(radius_m), int(pages), payload
+    )
+
+
+def _upsert_tile_cache(
+    cuisine_key: str, tile: str, lat: float, lng: float, radius_m: int, pages: int, payload: str
+):
+    row = PlacesTileCache.query.filter_by(cuisine=cuisine_key, tile=tile).first()
+    fresh_after = datetime.utcnow() - timedelta(hours=PLACES_CACHE_TTL_HOURS)
+    if row and row.created_at >= fresh_after and row.radius_m > radius_m and (row.pages or 1) >= pages:
+        # A fresh, wider entry still answers more queries than this one would
+        return
+    if row:
+        row.lat = lat
+        row.lng = lng
+        row.radius_m = radius_m
+        row.pages = pages
+        row.places_json = payload
+        row.created_at = datetime.utcnow()
+    else:
+        db.session.add(
+            PlacesTileCache(
+                cuisine=cuisine_key,
+                tile=tile,
+                lat=lat,
+                lng=lng,
+                radius_m=radius_m,
+                pages=pages,
+                places_json=payload,
+            )
+        )
 
-    rows.sort(key=lambda x: x.get("distance_km", 9999))
-    rows = rows[:15]
 
-    if not rows:
-        return {
+def iter_restaurant_search(
+    cuisines: List[str],
+    lat: float,
+    lng: float,
+    radius: int = 2000,
+    pages: int = 1,
+    limit: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Restaurant search via Places API (New) Text Search, for one or more cuisines.
+
+    Raw places are cached per (cuisine, geohash tile) so nearby users with the
+    same cuisine share one paid Places call: a miss is fetched with the
+    radius padded by the tile diagonal, and distance_km and the radius filter
+    are recomputed locally for each request origin. Cache misses for
+    different cuisines are fetched concurrently.
+
+    Yields one {"event": "cuisine", ...} dict per cuisine as soon as its
+    places are in (only rows not already sent for an earlier cuisine), then a
+    final {"event": "done", ...} with the merged ranking, deduped by place_id.
+
+    Cache reads/writes happen on the calling thread (it holds the app
+    context); worker threads only make HTTP calls.
+    """
+    cuisines = list(dict.fromkeys(c.strip() for c in cuisines if c and c.strip()))[:MAX_CUISINES]
+    if not cuisines:
+        cuisines = ["Italian"]
+    pages = max(1, min(int(pages), MAX_PAGES))
+    if limit is None:
+        limit = 15 * len(cuisines)
+
+    if not GOOGLE_KEY:
+        yield {
+            "event": "done",
             "results": [],
-            "status": "ZERO_RESULTS",
-            "error_message": "",
+            "status": "NO_API_KEY",
+            "error_message": "Set GOOGLE_API_KEY in backend/.env",
+            "cache": {},
+        }
+        return
+
+    radius_m = float(max(500, min(int(radius), PLACES_MAX_RADIUS_M)))
+    tile = geohash_encode(float(lat), float(lng), PLACES_TILE_PRECISION)
+    fetch_radius_m = _fetch_radius_m(tile, radius_m)
+
+    all_places: List[Dict[str, Any]] = []
+    cuisine_of: Dict[str, str] = {}
+    sent = set()
+    cache_status: Dict[str, str] = {}
+    errors: List[Dict[str, Any]] = []
+
+    def _arrived(cuisine: str, places: List[Dict[str, Any]]) -> Dict[str, Any]:
+        for p in places:
+            pid = p.get("id")
+            if pid and pid not in cuisine_of:
+                cuisine_of[pid] = cuisine
+        all_places.extend(places)
+
+        rows = []
+        for row in _rows_from_places(places, lat, lng, radius_m, limit=limit):
+            if row["place_id"] in sent:
+                continue
+            sent.add(row["place_id"])
+            row["cuisine"] = cuisine
+            rows.append(row)
+        return {
+            "event": "cuisine",
+            "cuisine": cuisine,
+            "status": "OK" if rows else "ZERO_RESULTS",
+            "cache": cache_status[cuisine],
+            "results": rows,
         }
 
-    return {"results": rows, "status": "OK", "error_message": ""}
+    misses = []
+    for cuisine in cuisines:
+        places = _read_tile_cache(cuisine.lower(), tile, lat, lng, radius_m, pages)
+        if places is None:
+            cache_lookup("places_tile", "miss")
+            misses.append(cuisine)
+            continue
+        cache_lookup("places_tile", "hit")
+        cache_status[cuisine] = "hit"
+        yield _arrived(cuisine, places)
+
+    if misses:
+        with ThreadPoolExecutor(max_workers=min(PLACES_FANOUT_WORKERS, len(misses))) as executor:
+            futures = {
+                executor.submit(_fetch_places, cuisine, lat, lng, fetch_radius_m, pages): cuisine
+                for cuisine in misses
+            }
+            for future in as_completed(futures):
+                cuisine = futures[future]
+                cache_status[cuisine] = "miss"
+                places, error = future.result()
+                if error:
+                    errors.append(error)
+                    yield {
+                        "event": "cuisine",
+                        "cuisine": cuisine,
+                        "status": error["status"],
+                        "error_message": error["error_message"],
+                        "cache": "miss",
+                        "results": [],
+                    }
+                    continue
+                _write_tile_cache(cuisine.lower(), tile, lat, lng, fetch_radius_m, places, pages)
+                yield _arrived(cuisine, places)
+
+    with timed(STAGE_SECONDS, stage="places_rank"):
+        rows = _rows_from_places(all_places, lat, lng, radius_m, limit=limit)
+    for row in rows:
+        row["cuisine"] = cuisine_of.get(row["place_id"])
+
+    if rows:
+        status, error_message = "OK", ""
+    elif errors and len(errors) == len(cuisines):
+        status, error_message = errors[0]["status"], errors[0]["error_message"]
+    else:
+        status, error_message = "ZERO_RESULTS", ""
+
+    yield {
+        "event": "done",
+        "results": rows,
+        "status": status,
+        "error_message": error_message,
+        "cache": cache_status,
+    }
+
+
+def search_restaurants(
+    cuisine: str,
+    lat: float,
+    lng: float,
+    radius: int = 2000,
+    pages: int = 1,
+) -> Dict[str, Any]:
+    """
+    Restaurant search for a single cuisine (see iter_restaurant_search).
+    A comma-separated cuisine ("Italian,Thai") searches several at once.
+    """
+    cuisines = cuisine.split(",") if isinstance(cuisine, str) else list(cuisine)
+    final: Dict[str, Any] = {}
+    for final in iter_restaurant_search(cuisines, lat, lng, radius=radius, pages=pages):
+        pass
+
+    cache = final.get("cache") or {}
+    return {
+        "results": final.get("results", []),
+        "status": final.get("status"),
+        "error_message": final.get("error_message", ""),
+        # Single cuisine: "hit" / "miss"; several: per-cuisine dict
+        "cache": next(iter(cache.values())) if len(cache) == 1 else cache,
+    }
 
 
 def _geocode_google(address: str) -> Optional[Dict[str, Any]]:
@@ -199,7 +545,7 @@ def _geocode_google(address: str) -> Optional[Dict[str, Any]]:
         return None
     params = {"address": address.strip(), "key": GOOGLE_KEY}
     try:
-        resp = requests.get(GEOCODE_URL, params=params, timeout=12)
+        resp = get_session("geocoding").get(GEOCODE_URL, params=params, timeout=12)
         resp.raise_for_status()
         data = resp.json()
     except Exception:
@@ -222,13 +568,42 @@ def _geocode_google(address: str) -> Optional[Dict[str, Any]]:
     }
 
 
+class _GeocodeUnavailable(Exception):
+    """The provider could not be reached, so a miss must not be cached."""
+
+
+class _RateLimiter:
+    """
+    Spaces calls at least `interval` seconds apart within this process.
+    Callers block (sleep) until their slot comes up.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+_nominatim_limiter = _RateLimiter(NOMINATIM_MIN_INTERVAL)
+
+
 def _geocode_nominatim(address: str) -> Optional[Dict[str, Any]]:
-    """Free fallback; respects Nominatim usage policy (identifying User-Agent)."""
+    """Free fallback; respects Nominatim usage policy (identifying User-Agent, 1 req/s)."""
     q = (address or "").strip()
     if not q:
         return None
+    _nominatim_limiter.wait()
     try:
-        resp = requests.get(
+        resp = get_session("nominatim").get(
             NOMINATIM_URL,
             params={"q": q, "format": "json", "limit": 1},
             headers={"User-Agent": NOMINATIM_UA},
@@ -236,8 +611,8 @@ def _geocode_nominatim(address: str) -> Optional[Dict[str, Any]]:
         )
         resp.raise_for_status()
         data = resp.json()
-    except Exception:
-        return None
+    except Exception as e:
+        raise _GeocodeUnavailable(str(e)) from e
     if not data:
         return None
     item = data[0]
@@ -250,15 +625,89 @@ def _geocode_nominatim(address: str) -> Optional[Dict[str, Any]]:
     }
 
 
+def _normalize_address(address: str) -> str:
+    """
+    Build a stable cache key from free text.
+    Example: "  Mansfield,  CT, USA " -> "mansfield ct usa"
+    """
+    text = unicodedata.normalize("NFKC", str(address)).lower()
+    text = re.sub(r"[^\w#]+", " ", text)
+    key = " ".join(text.split())
+    if len(key) > 255:
+        key = key[:200] + "#" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return key
+
+
+def _read_geocode_cache(key: str):
+    """
+    Return (hit, result). hit is False when there is no fresh entry;
+    result is None for a fresh negative entry. A row that can't be read
+    (DB error, bad timestamp or JSON) is a miss, so the caller asks upstream.
+    """
+    try:
+        row = GeocodeCache.query.filter_by(key=key).first()
+        if not row:
+            cache_lookup("geocode", "miss")
+            return False, None
+
+        now = datetime.utcnow()
+        if row.result_json is None:
+            fresh = row.created_at >= now - timedelta(hours=GEOCODE_NEGATIVE_TTL_HOURS)
+            cache_lookup("geocode", "hit" if fresh else "stale")
+            return (True, None) if fresh else (False, None)
+
+        if row.created_at < now - timedelta(days=GEOCODE_CACHE_TTL_DAYS):
+            cache_lookup("geocode", "stale")
+            return False, None
+        result = json.loads(row.result_json)
+    except Exception:
+        cache_lookup("geocode", "miss")
+        return False, None
+    cache_lookup("geocode", "hit")
+    return True, result
+
+
+def _write_geocode_cache(key: str, result: Optional[Dict[str, Any]]):
+    """Best-effort upsert, applied by the write-behind thread."""
+    payload = json.dumps(result) if result is not None else None
+    write_behind(_upsert_geocode_cache, key, payload)
+
+
+def _upsert_geocode_cache(key: str, payload: Optional[str]):
+    row = GeocodeCache.query.filter_by(key=key).first()
+    if row:
+        row.result_json = payload
+        row.created_at = datetime.utcnow()
+    else:
+        db.session.add(GeocodeCache(key=key, result_json=payload))
+
+
 def geocode_address(address: str) -> Optional[Dict[str, Any]]:
     """
     Resolve free text to coordinates.
     Tries Google Geocoding first (if key + API enabled), then OpenStreetMap Nominatim.
+
+    Results are cached in SQLite under a normalized address key, including
+    negative entries for queries nobody could resolve, so repeat lookups never
+    reach either provider.
     """
     if not address or not str(address).strip():
         return None
 
+    key = _normalize_address(address)
+    if key:
+        hit, cached = _read_geocode_cache(key)
+        if hit:
+            return cached
+
     out = _geocode_google(address)
-    if out:
-        return out
-    return _geocode_nominatim(address)
+    if not out:
+        try:
+            out = _geocode_nominatim(address)
+        except _GeocodeUnavailable:
+            # Network / throttling problem: answer "not found" but don't remember it
+            return None
+
+    if key:
+        _write_geocode_cache(key, out)
+    return out
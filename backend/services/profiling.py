@@ -0,0 +1,314 @@
+"""
+Opt-in profiling of live requests.
+
+Both modes are off unless ADMIN_TOKEN is set.
+
+Single request: send `X-Profile: 1` (or `?_profile=1`) together with
+`X-Admin-Token: <ADMIN_TOKEN>` and that one request runs under cProfile.
+The stats are saved to PROFILE_DIR/<id>.prof (load with pstats or
+snakeviz) and the id comes back in the X-Profile-Id header; fetch it from
+GET /api/admin/profiles/<id>. `X-Profile: text` returns the top functions
+as plain text instead of the normal response. Streamed (SSE) responses
+are profiled until the stream closes and are always stored.
+
+Continuous sampling: with PROFILE_SAMPLING=1 a background thread samples
+the stacks of threads serving PROFILE_SAMPLE_ROUTES every
+PROFILE_SAMPLE_INTERVAL_MS and aggregates them per route. Aggregates are
+written every PROFILE_FLUSH_SECONDS to PROFILE_DIR/samples-<route>.folded
+in the folded-stack format read by flamegraph.pl and speedscope, and are
+served live by GET /api/admin/profiles/samples/<route>. Sampling costs
+one stack walk per busy thread per interval; request threads do nothing.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter as _StackCounter
+from pathlib import Path
+from typing import Dict, Optional
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+PROFILE_DIR = Path(
+    os.getenv("PROFILE_DIR", Path(__file__).resolve().parent.parent / "profiles")
+)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_TEXT_LINES = 40
+
+PROFILE_SAMPLING = os.getenv("PROFILE_SAMPLING", "0").lower() in ("1", "true", "yes", "on")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "10"))
+PROFILE_FLUSH_SECONDS = float(os.getenv("PROFILE_FLUSH_SECONDS", "60"))
+# View function names (endpoint without the blueprint prefix)
+PROFILE_SAMPLE_ROUTES = tuple(
+    r.strip()
+    for r in os.getenv(
+        "PROFILE_SAMPLE_ROUTES", "search_web,recognize_ingredients,generate_cooking_guide"
+    ).split(",")
+    if r.strip()
+)
+# Deeper frames are cut off; keeps folded lines bounded for recursive code
+_MAX_STACK_DEPTH = 80
+
+# One cProfile session at a time: profilers hook the interpreter, and
+# overlapping sessions would also skew each other's timings
+_profile_lock = threading.Lock()
+
+
+def check_admin_token(token: Optional[str]) -> bool:
+    """True when profiling is enabled and `token` matches ADMIN_TOKEN."""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode())
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    """Path of a stored profile, or None for unknown / malformed ids."""
+    if not profile_id or not all(c in "0123456789abcdef" for c in profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}.prof"
+    return path if path.exists() else None
+
+
+def list_profiles():
+    """Stored single-request profiles, newest first."""
+    try:
+        entries = [e for e in os.scandir(PROFILE_DIR) if e.name.endswith(".prof")]
+    except OSError:
+        return []
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    return [
+        {"id": e.name[:-5], "size_bytes": e.stat().st_size, "created": round(e.stat().st_mtime, 3)}
+        for e in entries
+    ]
+
+
+def stats_text(profile: cProfile.Profile, title: str = "") -> str:
+    out = io.StringIO()
+    if title:
+        out.write(title + "\n\n")
+    stats = pstats.Stats(profile, stream=out)
+    stats.sort_stats("cumulative").print_stats(PROFILE_TEXT_LINES)
+    return out.getvalue()
+
+
+def _save(profile: cProfile.Profile) -> str:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+    fd, tmp = tempfile.mkstemp(dir=PROFILE_DIR, prefix=".tmp-")
+    os.close(fd)
+    profile.dump_stats(tmp)
+    os.replace(tmp, PROFILE_DIR / f"{profile_id}.prof")
+    _prune()
+    return profile_id
+
+
+def _prune():
+    for entry in list_profiles()[PROFILE_KEEP:]:
+        try:
+            os.unlink(PROFILE_DIR / f"{entry['id']}.prof")
+        except OSError:
+            pass
+
+
+class _ProfiledStream:
+    """Response iterable that keeps the profiler running while each chunk is produced."""
+
+    def __init__(self, iterable, profile: cProfile.Profile):
+        self._it = iter(iterable)
+        self._profile = profile
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._profile.enable()
+        try:
+            return next(self._it)
+        finally:
+            self._profile.disable()
+
+    def close(self):
+        # stream_with_context pops the request context when its generator closes
+        close = getattr(self._it, "close", None)
+        if close is not None:
+            close()
+
+
+# --- continuous sampling ---
+
+
+class StackSampler:
+    """
+    Periodically walks sys._current_frames() for threads registered with
+    track() and counts their stacks per route.
+    """
+
+    def __init__(self, interval: float, flush_every: float, out_dir: Path):
+        self.interval = interval
+        self.flush_every = flush_every
+        self.out_dir = out_dir
+        self._active: Dict[int, str] = {}
+        self._stacks: Dict[str, _StackCounter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def track(self, route: str):
+        self._active[threading.get_ident()] = route
+
+    def untrack(self):
+        self._active.pop(threading.get_ident(), None)
+
+    def folded(self, route: str) -> str:
+        with self._lock:
+            counts = dict(self._stacks.get(route) or {})
+        return "".join(f"{stack} {n}\n" for stack, n in sorted(counts.items()))
+
+    def routes(self) -> Dict[str, int]:
+        with self._lock:
+            return {route: sum(c.values()) for route, c in self._stacks.items()}
+
+    def flush(self):
+        for route in self.routes():
+            data = self.folded(route).encode("utf-8")
+            try:
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.out_dir, prefix=".tmp-")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, self.out_dir / f"samples-{route}.folded")
+            except OSError:
+                continue
+
+    def sample(self):
+        active = dict(self._active)
+        if not active:
+            return
+        frames = sys._current_frames()
+        taken = []
+        for ident, route in active.items():
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < _MAX_STACK_DEPTH:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            taken.append((route, ";".join(reversed(names))))
+        with self._lock:
+            for route, stack in taken:
+                self._stacks.setdefault(route, _StackCounter())[stack] += 1
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_every
+        while not self._stop.wait(self.interval):
+            self.sample()
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_every
+
+
+sampler = StackSampler(PROFILE_SAMPLE_INTERVAL_MS / 1000.0, PROFILE_FLUSH_SECONDS, PROFILE_DIR)
+
+
+def _route_name(endpoint: Optional[str]) -> str:
+    return (endpoint or "").rsplit(".", 1)[-1]
+
+
+def init_profiling(app):
+    """Hook single-request profiling and, if PROFILE_SAMPLING is on, the sampler into `app`."""
+    from flask import Response, g, request
+
+    if not ADMIN_TOKEN:
+        return
+
+    @app.before_request
+    def _start_profile():
+        if PROFILE_SAMPLING and _route_name(request.endpoint) in PROFILE_SAMPLE_ROUTES:
+            # Started lazily so the thread lives in the worker, not a pre-fork master
+            sampler.start()
+            sampler.track(_route_name(request.endpoint))
+            g._sampled = True
+
+        mode = (request.headers.get("X-Profile") or request.args.get("_profile") or "").lower()
+        if not mode or mode in ("0", "false", "no", "off"):
+            return None
+        if not check_admin_token(request.headers.get("X-Admin-Token")):
+            return None
+        if not _profile_lock.acquire(blocking=False):
+            g._profile_busy = True
+            return None
+        g._profile = cProfile.Profile()
+        g._profile_mode = mode
+        g._profile_t0 = time.perf_counter()
+        g._profile.enable()
+        return None
+
+    @app.after_request
+    def _finish_profile(response):
+        if g.pop("_profile_busy", False):
+            response.headers["X-Profile"] = "busy"
+            return response
+        profile = g.pop("_profile", None)
+        if profile is None:
+            return response
+        profile.disable()
+        mode = g.pop("_profile_mode")
+        elapsed = time.perf_counter() - g.pop("_profile_t0")
+
+        if response.is_streamed:
+            # Keep profiling while the body is generated, save once it is done
+            profile_id = uuid.uuid4().hex
+            response.response = _ProfiledStream(response.response, profile)
+
+            def _close():
+                try:
+                    path = PROFILE_DIR / f"{profile_id}.prof"
+                    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+                    profile.dump_stats(path)
+                    _prune()
+                finally:
+                    _profile_lock.release()
+
+            response.call_on_close(_close)
+            response.headers["X-Profile-Id"] = profile_id
+            return response
+
+        try:
+            if mode == "text":
+                title = f"{request.method} {request.full_path.rstrip('?')} -> {response.status_code} in {elapsed * 1000:.1f} ms"
+                return Response(stats_text(profile, title), mimetype="text/plain")
+            response.headers["X-Profile-Id"] = _save(profile)
+            response.headers["X-Profile-Duration-Ms"] = f"{elapsed * 1000:.1f}"
+            return response
+        finally:
+            _profile_lock.release()
+
+    @app.teardown_request
+    def _untrack(exc):
+        if g.pop("_sampled", False):
+            sampler.untrack()
+        # The view raised before after_request ran: don't leave the profiler on
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            profile.disable()
+            _profile_lock.release()
@@ -1,9 +1,15 @@
-from models import Recipe, db
-from schemas.dto import RecipeItem, ShoppingListItem
+from collections import Counter
+
+from sqlalchemy.orm import selectinload
+
+from models import Recipe, RecipeIngredient, db
+from schemas.dto import AggregatedShoppingItem, RecipeItem, ShoppingListItem, ShoppingQuantity
+from services.ingredients import UNIT_CONVERSIONS, format_quantity, normalize_ingredient_name, parse_quantity, to_base
 
 def recommend_recipes(user_ingredients: list[str], threshold=0.5):
     user_set = set(i.lower().strip() for i in user_ingredients)
-    all_recipes = Recipe.query.all()
+    # Ingredients for all recipes in one extra query instead of one per recipe
+    all_recipes = Recipe.query.options(selectinload(Recipe.ingredients)).all()
     results = []
 
     for r in all_recipes:
@@ -24,7 +30,8 @@ def recommend_recipes(user_ingredients: list[str], threshold=0.5):
                 cuisine=r.cuisine or "General",
                 match_ratio=round(ratio, 2),
                 required_ingredients=req_list,
-                steps=r.steps or ""
+                steps=r.steps or "",
+                source_url=r.source_url
             ))
             
     results.sort(key=lambda x: x.match_ratio, reverse=True)
@@ -48,4 +55,82 @@ def get_shopping_missing(recipe_id: int, user_ingredients: list[str]):
                 qty=item.qty
             ))
             
-    return missing
\ No newline at end of file
+    return missing
+
+
+def _ingredient_key(name: str) -> str:
+    return normalize_ingredient_name(name) or name.strip().lower()
+
+
+def get_shopping_plan(recipe_ids: list[int], user_ingredients: list[str]):
+    """
+    One merged shopping list for several recipes (a weekly plan).
+
+    All ingredients are loaded in a single query. Ingredients are matched
+    by normalized name ("Tomatoes" == "tomato"), pantry items are left out,
+    and amounts are summed per ingredient: volumes in ml, weights in g,
+    anything else (cloves, cans, plain counts) per unit. A recipe listed
+    twice counts twice. Quantities without an amount ("to taste") are
+    listed as they are.
+
+    Returns (items, missing_recipe_ids).
+    """
+    servings = Counter(recipe_ids)
+    rows = (
+        db.session.query(Recipe.id, RecipeIngredient.name, RecipeIngredient.qty)
+        .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+        .filter(Recipe.id.in_(list(servings)))
+        .order_by(Recipe.id, RecipeIngredient.id)
+        .all()
+    )
+    pantry = {_ingredient_key(i) for i in user_ingredients if i.strip()}
+
+    found = set()
+    merged: dict[str, dict] = {}
+    for recipe_id, name, qty in rows:
+        found.add(recipe_id)
+        if not name:
+            continue
+        key = _ingredient_key(name)
+        if key in pantry:
+            continue
+        entry = merged.get(key)
+        if entry is None:
+            entry = merged[key] = {"recipes": {}, "totals": {}, "units": {}, "unparsed": {}}
+        entry["recipes"][recipe_id] = True
+
+        parsed = parse_quantity(qty)
+        if parsed is None:
+            if qty and qty.strip():
+                entry["unparsed"][qty.strip().lower()] = True
+            continue
+        amount, unit = parsed
+        value, base = to_base(amount * servings[recipe_id], unit)
+        entry["totals"][base] = entry["totals"].get(base, 0.0) + value
+        entry["units"].setdefault(base, set()).add(unit)
+
+    items = []
+    for key in sorted(merged):
+        entry = merged[key]
+        quantities = []
+        for base, total in entry["totals"].items():
+            units = entry["units"][base]
+            # Everything was in one unit (say tbsp): keep it instead of ml
+            if len(units) == 1 and next(iter(units)) in UNIT_CONVERSIONS:
+                unit = next(iter(units))
+                total /= UNIT_CONVERSIONS[unit][1]
+                base = unit
+            quantities.append((total, base))
+        unparsed = list(entry["unparsed"])
+        labels = [format_quantity(amount, unit) for amount, unit in quantities] + unparsed
+        items.append(AggregatedShoppingItem(
+            ingredient=key,
+            qty=" + ".join(labels) or None,
+            quantities=[ShoppingQuantity(amount=round(a, 3), unit=u) for a, u in quantities],
+            unparsed=unparsed,
+            recipe_ids=list(entry["recipes"]),
+        ))
+
+    missing_ids = [rid for rid in servings if rid not in found]
+    return items, missing_ids
+
@@ -0,0 +1,219 @@
+"""
+Full-text search over the local recipe catalog (SQLite FTS5).
+
+recipes_fts holds one row per recipe (rowid = recipes.id) with its name,
+cuisine, ingredient names and steps. Triggers on recipes and
+recipe_ingredients keep it in sync with every insert, update and delete,
+whichever code path writes them; ensure_search_index() creates the table
+and triggers and (re)builds the index when it is out of step, and runs
+from init_db().
+
+Queries are tokenized here and every term is matched as a quoted prefix
+("tom" finds "tomato"), ranked with BM25 weighted towards the name and
+ingredients. On other databases search_recipes() falls back to a LIKE scan.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, text
+
+from models import Recipe, RecipeIngredient, db
+from services.metrics import STAGE_SECONDS, timed
+
+# BM25 column weights: name, cuisine, ingredients, steps
+_BM25_WEIGHTS = (10.0, 2.0, 5.0, 1.0)
+MAX_QUERY_TERMS = 12
+MAX_LIMIT = 50
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+_INGREDIENTS_OF = "(SELECT coalesce(group_concat(name, ' '), '') FROM recipe_ingredients WHERE recipe_id = {id})"
+
+# Index rows for the recipes matching {where}
+_INDEX_ROWS = f"""
+    INSERT INTO recipes_fts(rowid, name, cuisine, ingredients, steps)
+    SELECT r.id, r.name, coalesce(r.cuisine, ''), {_INGREDIENTS_OF.format(id="r.id")}, coalesce(r.steps, '')
+    FROM recipes r WHERE {{where}};
+"""
+
+_SCHEMA = [
+    # The triggers look ingredients up by recipe; older databases predate this index
+    "CREATE INDEX IF NOT EXISTS ix_recipe_ingredients_recipe_id ON recipe_ingredients (recipe_id)",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+        name, cuisine, ingredients, steps,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_ai AFTER INSERT ON recipes BEGIN
+        {_INDEX_ROWS.format(where="r.id = new.id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_au AFTER UPDATE ON recipes BEGIN
+        DELETE FROM recipes_fts WHERE rowid = old.id;
+        {_INDEX_ROWS.format(where="r.id = new.id")}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recipes_fts_ad AFTER DELETE ON recipes BEGIN
+        DELETE FROM recipes_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipe_ingredients_fts_ai AFTER INSERT ON recipe_ingredients BEGIN
+        DELETE FROM recipes_fts WHERE rowid = new.recipe_id;
+        {_INDEX_ROWS.format(where="r.id = new.recipe_id")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipe_ingredients_fts_au AFTER UPDATE ON recipe_ingredients BEGIN
+        DELETE FROM recipes_fts WHERE rowid IN (old.recipe_id, new.recipe_id);
+        {_INDEX_ROWS.format(where="r.id IN (old.recipe_id, new.recipe_id)")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS recipe_ingredients_fts_ad AFTER DELETE ON recipe_ingredients BEGIN
+        DELETE FROM recipes_fts WHERE rowid = old.recipe_id;
+        {_INDEX_ROWS.format(where="r.id = old.recipe_id")}
+    END
+    """,
+]
+
+
+def _is_sqlite() -> bool:
+    return db.engine.dialect.name == "sqlite"
+
+
+def ensure_search_index():
+    """Create the FTS table and triggers if missing; rebuild when the row counts disagree."""
+    if not _is_sqlite():
+        return
+    with db.engine.begin() as conn:
+        for statement in _SCHEMA:
+            conn.exec_driver_sql(statement)
+        indexed = conn.exec_driver_sql("SELECT count(*) FROM recipes_fts").scalar()
+        total = conn.exec_driver_sql("SELECT count(*) FROM recipes").scalar()
+        if indexed != total:
+            _rebuild(conn)
+
+
+def rebuild_search_index():
+    """Re-index every recipe (e.g. after bulk edits made with triggers disabled)."""
+    if not _is_sqlite():
+        return
+    with db.engine.begin() as conn:
+        _rebuild(conn)
+
+
+def _rebuild(conn):
+    conn.exec_driver_sql("DELETE FROM recipes_fts")
+    conn.exec_driver_sql(_INDEX_ROWS.format(where="1"))
+
+
+def _query_terms(query: str) -> List[str]:
+    return list(dict.fromkeys(_TERM_RE.findall((query or "").lower())))[:MAX_QUERY_TERMS]
+
+
+def build_match_query(query: str, match: str = "all") -> str:
+    """
+    FTS5 MATCH expression for free text: every term becomes a quoted prefix
+    query, joined with AND ("all") or OR ("any"). Operators and punctuation
+    in the input are never interpreted. Empty when there are no terms.
+    """
+    joiner = " OR " if match == "any" else " AND "
+    return joiner.join(f'"{t}"*' for t in _query_terms(query))
+
+
+def _ingredients_by_recipe(ids: List[int]) -> Dict[int, List[str]]:
+    out: Dict[int, List[str]] = {i: [] for i in ids}
+    if not ids:
+        return out
+    rows = (
+        db.session.query(RecipeIngredient.recipe_id, RecipeIngredient.name)
+        .filter(RecipeIngredient.recipe_id.in_(ids))
+        .order_by(RecipeIngredient.id)
+        .all()
+    )
+    for recipe_id, name in rows:
+        out[recipe_id].append(name.lower())
+    return out
+
+
+def search_recipes(
+    query: str,
+    cuisine: Optional[str] = None,
+    match: str = "all",
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Local recipes matching `query` (and `cuisine`, case-insensitive), best
+    first. With no query terms, recipes of `cuisine` are listed by name.
+    Each item has id, name, cuisine, score (higher is better),
+    required_ingredients, steps and source_url (promoted web recipes).
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    cuisine = (cuisine or "").strip().lower() or None
+    expr = build_match_query(query, match)
+    if not expr and not cuisine:
+        return []
+
+    with timed(STAGE_SECONDS, stage="recipe_search"):
+        if not expr:
+            hits = [
+                (r.id, r.name, r.cuisine, r.steps, r.source_url, 0.0)
+                for r in Recipe.query.filter(db.func.lower(Recipe.cuisine) == cuisine)
+                .order_by(Recipe.name)
+                .limit(limit)
+            ]
+        elif _is_sqlite():
+            hits = _fts_search(expr, cuisine, limit)
+        else:
+            hits = _like_search(query, cuisine, match, limit)
+
+        ingredients = _ingredients_by_recipe([h[0] for h in hits])
+        return [
+            {
+                "id": rid,
+                "name": name,
+                "cuisine": rcuisine or "General",
+                "score": round(score, 4),
+                "required_ingredients": ingredients.get(rid, []),
+                "steps": steps or "",
+                "source_url": source_url,
+            }
+            for rid, name, rcuisine, steps, source_url, score in hits
+        ]
+
+
+def _fts_search(expr: str, cuisine: Optional[str], limit: int):
+    weights = ", ".join(str(w) for w in _BM25_WEIGHTS)
+    sql = (
+        f"SELECT r.id, r.name, r.cuisine, r.steps, r.source_url, bm25(recipes_fts, {weights}) AS rank "
+        "FROM recipes_fts JOIN recipes r ON r.id = recipes_fts.rowid "
+        "WHERE recipes_fts MATCH :expr "
+    )
+    params: Dict[str, Any] = {"expr": expr, "limit": limit}
+    if cuisine:
+        sql += "AND lower(r.cuisine) = :cuisine "
+        params["cuisine"] = cuisine
+    sql += "ORDER BY rank LIMIT :limit"
+    # bm25() is lower-is-better; flip it so callers sort descending
+    return [(*row[:-1], -row[-1]) for row in db.session.execute(text(sql), params)]
+
+
+def _like_search(query: str, cuisine: Optional[str], match: str, limit: int):
+    term_filters = [
+        or_(
+            Recipe.name.ilike(f"%{t}%"),
+            Recipe.steps.ilike(f"%{t}%"),
+            Recipe.ingredients.any(RecipeIngredient.name.ilike(f"%{t}%")),
+        )
+        for t in _query_terms(query)
+    ]
+    q = Recipe.query.filter(or_(*term_filters) if match == "any" else db.and_(*term_filters))
+    if cuisine:
+        q = q.filter(db.func.lower(Recipe.cuisine) == cuisine)
+    return [(r.id, r.name, r.cuisine, r.steps, r.source_url, 0.0) for r in q.order_by(Recipe.name).limit(limit)]
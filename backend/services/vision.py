@@ -1,21 +1,14 @@
 import base64
 import os
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
 
-import anthropic
-import requests
+from services.clients import get_session, get_anthropic_client
+from services.metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS, timed
 
 VISION_API_KEY = os.getenv("VISION_API_KEY")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-
-_anthropic_client = None
-
-
-def _get_anthropic_client() -> anthropic.Anthropic:
-    global _anthropic_client
-    if _anthropic_client is None:
-        _anthropic_client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    return _anthropic_client
+VISION_BASE_URL = os.getenv("VISION_BASE_URL", "https://vision.googleapis.com").rstrip("/")
 
 # Normalize API label variants to canonical ingredient names
 LABEL_MAP = {
@@ -316,38 +309,39 @@ def _extract_candidates(data: Dict[str, Any]) -> List[str]:
 
 def _claude_fallback(image_bytes: bytes) -> List[str]:
     """Use Claude Haiku to identify ingredients when Google Vision returns nothing useful."""
-    client = _get_anthropic_client()
+    client = get_anthropic_client()
     base64_image = base64.b64encode(image_bytes).decode("utf-8")
 
-    message = client.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=256,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/jpeg",
-                            "data": base64_image,
+    with timed(UPSTREAM_SECONDS, errors=UPSTREAM_ERRORS, upstream="claude"):
+        message = client.messages.create(
+            model="claude-haiku-4-5-20251001",
+            max_tokens=256,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": "image/jpeg",
+                                "data": base64_image,
+                            },
                         },
-                    },
-                    {
-                        "type": "text",
-                        "text": (
-                            "List only the food ingredients visible in this image. "
-                            "If the image is too blurry or unclear to identify any ingredients, "
-                            "reply with exactly: UNCLEAR_IMAGE\n"
-                            "Otherwise reply with a comma-separated list of ingredient names only, "
-                            "no explanations. Example: tomato, onion, garlic"
-                        ),
-                    },
-                ],
-            }
-        ],
-    )
+                        {
+                            "type": "text",
+                            "text": (
+                                "List only the food ingredients visible in this image. "
+                                "If the image is too blurry or unclear to identify any ingredients, "
+                                "reply with exactly: UNCLEAR_IMAGE\n"
+                                "Otherwise reply with a comma-separated list of ingredient names only, "
+                                "no explanations. Example: tomato, onion, garlic"
+                            ),
+                        },
+                    ],
+                }
+            ],
+        )
 
     text = message.content[0].text.strip()
     if text == "UNCLEAR_IMAGE":
@@ -361,7 +355,7 @@ def detect_ingredients(image_bytes: bytes) -> List[str]:
         raise RuntimeError("VISION_API_KEY is not set in environment variables.")
 
     base64_image = base64.b64encode(image_bytes).decode("utf-8")
-    url = f"https://vision.googleapis.com/v1/images:annotate?key={VISION_API_KEY}"
+    url = f"{VISION_BASE_URL}/v1/images:annotate?key={VISION_API_KEY}"
 
     payload = {
         "requests": [
@@ -375,7 +369,7 @@ def detect_ingredients(image_bytes: bytes) -> List[str]:
         ]
     }
 
-    response = requests.post(url, json=payload, timeout=20)
+    response = get_session("vision").post(url, json=payload, timeout=20)
     response.raise_for_status()
     data = response.json()
 
@@ -390,12 +384,20 @@ def detect_ingredients(image_bytes: bytes) -> List[str]:
     return ingredients
 
 
-def debug_detect_all(image_bytes: bytes) -> Dict[str, Any]:
+def debug_detect_all(image_bytes: bytes, timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Run recognition and also return the raw Vision labels/objects.
+
+    If `timings` is given, seconds spent in each upstream call are recorded
+    into it ("vision", and "claude_fallback" when the fallback runs).
+    """
+    if timings is None:
+        timings = {}
     if not VISION_API_KEY:
         raise RuntimeError("VISION_API_KEY is not set in environment variables.")
 
     base64_image = base64.b64encode(image_bytes).decode("utf-8")
-    url = f"https://vision.googleapis.com/v1/images:annotate?key={VISION_API_KEY}"
+    url = f"{VISION_BASE_URL}/v1/images:annotate?key={VISION_API_KEY}"
 
     payload = {
         "requests": [
@@ -409,9 +411,11 @@ def debug_detect_all(image_bytes: bytes) -> Dict[str, Any]:
         ]
     }
 
-    response = requests.post(url, json=payload, timeout=20)
+    t0 = time.perf_counter()
+    response = get_session("vision").post(url, json=payload, timeout=20)
     response.raise_for_status()
     data = response.json()
+    timings["vision"] = round(time.perf_counter() - t0, 4)
 
     if "error" in data:
         raise RuntimeError(data["error"].get("message", "Google Vision API error"))
@@ -422,7 +426,9 @@ def debug_detect_all(image_bytes: bytes) -> Dict[str, Any]:
     used_fallback = False
 
     if not ingredients and ANTHROPIC_API_KEY:
+        t0 = time.perf_counter()
         ingredients = _claude_fallback(image_bytes)
+        timings["claude_fallback"] = round(time.perf_counter() - t0, 4)
         used_fallback = True
 
     return {
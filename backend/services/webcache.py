@@ -0,0 +1,371 @@
+"""
+Storage and upkeep for web_recipe_cache.
+
+Payloads are stored as zlib-compressed compact JSON in the `payload`
+column (recipe lists with scraped ingredients shrink to about a third);
+rows written before that keep their JSON in items_json until the next
+compaction recompresses them. Reads go through decode_items(), writes through
+encode_items() and upsert(), which inserts or replaces the row of a key
+(key is unique; ensure_unique_keys() migrates databases created before).
+
+Cache hits refresh last_accessed_at (at most once per
+WEB_CACHE_TOUCH_SECONDS per row, through the write-behind queue) so the
+size cap can evict the least recently used keys.
+
+compact_web_cache() runs every WEB_CACHE_COMPACT_SECONDS in each worker
+(0 disables it; `flask --app app compact-web-cache` or
+POST /api/admin/web-cache/compact run it by hand):
+1. delete rows older than WEB_CACHE_RETENTION_DAYS. Entries stop being
+   fresh after CACHE_TTL_DAYS but are kept until then as the fallback for
+   Google quota errors
+2. recompress legacy rows
+3. evict least recently used rows until the table is under
+   WEB_CACHE_MAX_MB (down to 90% of it, so the cap isn't hit again by the
+   next write)
+4. on SQLite, return the freed pages to the filesystem (incremental
+   vacuum, see enable_incremental_vacuum() in services/database.py)
+
+The /metrics gauges don't scan the table on every scrape: they are
+recomputed after each compaction (and on the first scrape) and adjusted by
+each upsert() once its transaction commits. Writes by other worker
+processes show up after this worker's next compaction.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from models import WebRecipeCache, db
+from services.database import incremental_vacuum, write_behind
+from services.metrics import CACHE_LOOKUPS, STAGE_SECONDS, register_collector, timed
+
+logger = logging.getLogger(__name__)
+
+WEB_CACHE_COMPRESS_LEVEL = int(os.getenv("WEB_CACHE_COMPRESS_LEVEL", "6"))
+WEB_CACHE_MAX_MB = float(os.getenv("WEB_CACHE_MAX_MB", "64"))
+WEB_CACHE_RETENTION_DAYS = int(os.getenv("WEB_CACHE_RETENTION_DAYS", "14"))
+WEB_CACHE_TOUCH_SECONDS = int(os.getenv("WEB_CACHE_TOUCH_SECONDS", "300"))
+WEB_CACHE_COMPACT_SECONDS = float(os.getenv("WEB_CACHE_COMPACT_SECONDS", "3600"))
+
+# Evict down to this share of the cap
+_EVICT_TO = 0.9
+_DELETE_CHUNK = 500
+_EPOCH = datetime(1970, 1, 1)
+
+# rows, bytes and the sum of created_at (epoch seconds) for the gauges
+_gauges: Optional[Dict[str, float]] = None
+_gauges_lock = threading.Lock()
+# session.info key for gauge changes waiting for their transaction to commit
+_PENDING_GAUGES = "web_cache_gauge_deltas"
+
+
+def encode_items(items: List[Dict[str, Any]]) -> bytes:
+    data = json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(data, WEB_CACHE_COMPRESS_LEVEL)
+
+
+def decode_items(row: WebRecipeCache) -> List[Dict[str, Any]]:
+    """Recipe list stored in `row`; raises ValueError for corrupt payloads."""
+    if row.payload is not None:
+        try:
+            return json.loads(zlib.decompress(row.payload))
+        except zlib.error as e:
+            raise ValueError(f"corrupt web cache payload: {e}") from e
+    return json.loads(row.items_json)
+
+
+def touch(row: WebRecipeCache, now: datetime):
+    """Record a cache hit on `row` for LRU eviction (throttled, off the request path)."""
+    last = row.last_accessed_at
+    if last is None or (now - last).total_seconds() >= WEB_CACHE_TOUCH_SECONDS:
+        write_behind(_touch, row.id, now)
+
+
+def _insert(table):
+    if db.engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+
+def upsert(key: str, payload: bytes, now: datetime):
+    """Stage the row for `key` (inserted, or replaced if it exists) on db.session."""
+    old = (
+        db.session.query(_row_bytes(), WebRecipeCache.created_at)
+        .filter(WebRecipeCache.key == key)
+        .first()
+    )
+    values = {"payload": payload, "items_json": "", "created_at": now, "last_accessed_at": now}
+    stmt = _insert(WebRecipeCache).values(key=key, **values)
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[WebRecipeCache.key], set_=values))
+
+    rows, size, created = 1, len(payload) + len(key), (now - _EPOCH).total_seconds()
+    if old is not None:
+        rows, size, created = 0, size - old[0], created - (old[1] - _EPOCH).total_seconds()
+    db.session.info.setdefault(_PENDING_GAUGES, []).append((rows, size, created))
+
+
+def _touch(row_id: int, now: datetime):
+    WebRecipeCache.query.filter_by(id=row_id).update({"last_accessed_at": now})
+
+
+def _row_bytes():
+    return (
+        func.coalesce(func.length(WebRecipeCache.payload), 0)
+        + func.coalesce(func.length(WebRecipeCache.items_json), 0)
+        + func.length(WebRecipeCache.key)
+    )
+
+
+def _delete_ids(ids: List[int]) -> int:
+    for i in range(0, len(ids), _DELETE_CHUNK):
+        WebRecipeCache.query.filter(WebRecipeCache.id.in_(ids[i:i + _DELETE_CHUNK])).delete(
+            synchronize_session=False
+        )
+    return len(ids)
+
+
+def _delete_expired(now: datetime) -> int:
+    cutoff = now - timedelta(days=WEB_CACHE_RETENTION_DAYS)
+    return WebRecipeCache.query.filter(WebRecipeCache.created_at < cutoff).delete(synchronize_session=False)
+
+
+def _delete_duplicates() -> int:
+    """Delete all but the newest row of every key."""
+    rows = (
+        db.session.query(WebRecipeCache.id, WebRecipeCache.key)
+        .order_by(WebRecipeCache.key, WebRecipeCache.created_at.desc(), WebRecipeCache.id.desc())
+        .all()
+    )
+    stale, seen = [], set()
+    for row_id, key in rows:
+        if key in seen:
+            stale.append(row_id)
+        seen.add(key)
+    return _delete_ids(stale)
+
+
+def _recompress() -> int:
+    rows = WebRecipeCache.query.filter(WebRecipeCache.payload.is_(None)).all()
+    for row in rows:
+        try:
+            items = json.loads(row.items_json)
+        except ValueError:
+            db.session.delete(row)
+            continue
+        row.payload = encode_items(items)
+        row.items_json = ""
+    return len(rows)
+
+
+def _evict_lru(max_bytes: int) -> int:
+    total = db.session.query(func.coalesce(func.sum(_row_bytes()), 0)).scalar()
+    if total <= max_bytes:
+        return 0
+    last_used = func.coalesce(WebRecipeCache.last_accessed_at, WebRecipeCache.created_at)
+    rows = db.session.query(WebRecipeCache.id, _row_bytes()).order_by(last_used, WebRecipeCache.id).all()
+    victims = []
+    for row_id, size in rows:
+        if total <= max_bytes * _EVICT_TO:
+            break
+        victims.append(row_id)
+        total -= size
+    return _delete_ids(victims)
+
+
+def compact_web_cache(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Run one compaction pass (see the module docstring); returns what it did."""
+    now = now or datetime.utcnow()
+    before = db.session.query(func.coalesce(func.sum(_row_bytes()), 0)).scalar()
+    with timed(STAGE_SECONDS, stage="web_cache_compact"):
+        try:
+            result = {
+                "expired": _delete_expired(now),
+                "recompressed": _recompress(),
+            }
+            db.session.flush()
+            result["evicted"] = _evict_lru(int(WEB_CACHE_MAX_MB * 1024 * 1024))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        result["pages_freed"] = incremental_vacuum()
+    result["bytes_before"] = int(before)
+    result["bytes_after"] = int(db.session.query(func.coalesce(func.sum(_row_bytes()), 0)).scalar())
+    return result
+
+
+def ensure_unique_keys() -> int:
+    """
+    Make web_recipe_cache.key unique in a database created before it was:
+    keep the newest row of every key, then rebuild the key index as UNIQUE.
+    Returns how many duplicate rows were deleted.
+    """
+    table = WebRecipeCache.__tablename__
+    inspector = inspect(db.engine)
+    if not inspector.has_table(table):
+        return 0
+    key_indexes = [i for i in inspector.get_indexes(table) if i["column_names"] == ["key"]]
+    if any(i["unique"] for i in key_indexes):
+        return 0
+
+    removed = _delete_duplicates()
+    db.session.commit()
+    with db.engine.begin() as conn:
+        for index in key_indexes:
+            conn.exec_driver_sql(f"DROP INDEX {index['name']}")
+        for index in WebRecipeCache.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    logger.info("Made %s.key unique (%d duplicate rows deleted)", table, removed)
+    return removed
+
+
+def _created_epoch():
+    if db.engine.dialect.name == "sqlite":
+        return (func.julianday(WebRecipeCache.created_at) - 2440587.5) * 86400
+    return func.extract("epoch", WebRecipeCache.created_at)
+
+
+def refresh_gauges():
+    """Recompute the /metrics gauge values from the table."""
+    global _gauges
+    rows, size, created = db.session.query(
+        func.count(WebRecipeCache.id),
+        func.coalesce(func.sum(_row_bytes()), 0),
+        func.coalesce(func.sum(_created_epoch()), 0),
+    ).one()
+    with _gauges_lock:
+        _gauges = {"rows": rows, "bytes": int(size), "created_sum": float(created)}
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_gauges(session):
+    deltas = session.info.pop(_PENDING_GAUGES, None)
+    if not deltas:
+        return
+    with _gauges_lock:
+        if _gauges is None:
+            return
+        for rows, size, created in deltas:
+            _gauges["rows"] += rows
+            _gauges["bytes"] += size
+            _gauges["created_sum"] += created
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_gauges(session):
+    session.info.pop(_PENDING_GAUGES, None)
+
+
+def _avg_age_seconds():
+    if db.engine.dialect.name == "sqlite":
+        age = (func.julianday("now") - func.julianday(WebRecipeCache.created_at)) * 86400
+    else:
+        age = func.extract("epoch", func.now() - WebRecipeCache.created_at)
+    return func.avg(age)
+
+
+def web_cache_stats() -> Dict[str, Any]:
+    """Size, row count, age and this process' hit rate of web_recipe_cache."""
+    rows, size, compressed, avg_age = db.session.query(
+        func.count(WebRecipeCache.id),
+        func.coalesce(func.sum(_row_bytes()), 0),
+        func.count(WebRecipeCache.payload),
+        _avg_age_seconds(),
+    ).one()
+    lookups = {r: int(CACHE_LOOKUPS.value(cache="web_recipes", result=r)) for r in ("hit", "stale", "miss")}
+    total = sum(lookups.values())
+    return {
+        "rows": rows,
+        "bytes": int(size),
+        "max_bytes": int(WEB_CACHE_MAX_MB * 1024 * 1024),
+        "compressed_rows": compressed,
+        "avg_age_seconds": round(float(avg_age), 1) if avg_age is not None else None,
+        "lookups": lookups,
+        "hit_rate": round(lookups["hit"] / total, 4) if total else None,
+        "last_compaction": compactor.last_result,
+    }
+
+
+def _web_cache_gauges() -> List[str]:
+    if _gauges is None:
+        refresh_gauges()
+    with _gauges_lock:
+        rows, size, created_sum = _gauges["rows"], _gauges["bytes"], _gauges["created_sum"]
+    now = (datetime.utcnow() - _EPOCH).total_seconds()
+    avg_age = round(now - created_sum / rows, 1) if rows else 0
+    lines = []
+    for name, help_text, value in (
+        ("bytes", "Payload bytes stored in web_recipe_cache.", size),
+        ("rows", "Rows in web_recipe_cache.", rows),
+        ("avg_age_seconds", "Average age of web_recipe_cache rows.", avg_age),
+    ):
+        lines += [
+            f"# HELP smarteats_web_cache_{name} {help_text}",
+            f"# TYPE smarteats_web_cache_{name} gauge",
+            f"smarteats_web_cache_{name} {value}",
+        ]
+    return lines
+
+
+register_collector(_web_cache_gauges)
+
+
+class Compactor:
+    """Background thread running compact_web_cache() every `interval` seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+
+    def ensure_started(self):
+        # Started on first use, so it lives in the worker rather than a pre-fork master
+        if self.interval <= 0 or self._app is None:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="web-cache-compactor", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        result = compact_web_cache()
+        result["took_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        result["finished_at"] = datetime.utcnow().isoformat() + "Z"
+        self.last_result = result
+        refresh_gauges()
+        return result
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._app.app_context():
+                try:
+                    self.run_once()
+                except Exception:
+                    logger.exception("Web cache compaction failed")
+                finally:
+                    db.session.remove()
+
+
+compactor = Compactor(WEB_CACHE_COMPACT_SECONDS)
@@ -2,14 +2,19 @@ import os
 import re
 import json
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import requests
-from bs4 import BeautifulSoup
+from models import WebRecipeCache
+from services.catalog import promote_web_recipes
+from services.clients import get_session
+from services.database import write_behind
+from services.metrics import STAGE_SECONDS, cache_lookup, timed
+from services.webcache import compactor, decode_items, encode_items, touch, upsert
 
-from models import db, WebRecipeCache
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 
 # Browser-like UA helps avoid bot/challenge fallback pages.
@@ -24,6 +29,8 @@ UA = {
 # How long a cache entry is considered "fresh"
 CACHE_TTL_DAYS = 3
 
+CSE_BASE_URL = os.getenv("CSE_BASE_URL", "https://www.googleapis.com").rstrip("/")
+
 
 def _make_cache_key(ingredients: List[str], cuisine: Optional[str]) -> str:
     """
@@ -48,7 +55,7 @@ def _google_search(query: str, count: int = 10, start: int = 1) -> List[Dict[str
     if not google_key or not google_cx:
         raise RuntimeError("Google API key or CX not set (GOOGLE_API_KEY / GOOGLE_CSE_ID)")
 
-    url = "https://www.googleapis.com/customsearch/v1"
+    url = f"{CSE_BASE_URL}/customsearch/v1"
     params = {
         "key": google_key,
         "cx": google_cx,
@@ -57,7 +64,7 @@ def _google_search(query: str, count: int = 10, start: int = 1) -> List[Dict[str
         "start": start,
     }
 
-    resp = requests.get(url, params=params, headers=UA, timeout=12)
+    resp = get_session("cse").get(url, params=params, headers=UA, timeout=12)
     resp.raise_for_status()
     return resp.json().get("items") or []
 
@@ -213,7 +220,7 @@ def _extract_recipe_nodes_from_jsonld(data: Any) -> List[Dict[str, Any]]:
     return found
 
 
-def _looks_like_blocked_page(soup: BeautifulSoup) -> bool:
+def _looks_like_blocked_page(soup: "BeautifulSoup") -> bool:
     """
     Detect obvious anti-bot / consent / challenge pages.
     """
@@ -233,6 +240,84 @@ def _looks_like_blocked_page(soup: BeautifulSoup) -> bool:
     return any(sig in hay for sig in blocked_signals)
 
 
+def _parse_ingredients(resp) -> List[str]:
+    """Extract ingredient lines from a fetched recipe page (JSON-LD, then common selectors)."""
+    # Be explicit about decoding to reduce mojibake on badly-declared pages.
+    if not resp.encoding:
+        resp.encoding = resp.apparent_encoding or "utf-8"
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(resp.content, "html.parser", from_encoding=resp.encoding)
+    if _looks_like_blocked_page(soup):
+        return []
+    ingredients: List[str] = []
+
+    # --- Strategy 1: schema.org Recipe JSON-LD ---
+    for script in soup.find_all("script", type="application/ld+json"):
+        raw = script.string or script.get_text(strip=True)
+        if not raw:
+            continue
+
+        try:
+            data = json.loads(raw)
+        except Exception:
+            continue
+
+        for node in _extract_recipe_nodes_from_jsonld(data):
+            recipe_ingredients = node.get("recipeIngredient") or node.get("ingredients") or []
+            if isinstance(recipe_ingredients, list):
+                for item in recipe_ingredients:
+                    if isinstance(item, str):
+                        cleaned = _clean_ingredient_text(item)
+                        if cleaned and cleaned not in ingredients:
+                            ingredients.append(cleaned)
+            elif isinstance(recipe_ingredients, str):
+                cleaned = _clean_ingredient_text(recipe_ingredients)
+                if cleaned and cleaned not in ingredients:
+                    ingredients.append(cleaned)
+
+    if ingredients:
+        return ingredients[:25]
+
+    # --- Strategy 2: common ingredient selectors on recipe sites ---
+    selectors = [
+        '[itemprop="recipeIngredient"]',
+        ".ingredient",
+        ".ingredients-item",
+        ".ingredients-item-name",
+        ".recipe-ingredients li",
+        ".ingredients li",
+        "ul.ingredients li",
+        "ol.ingredients li",
+    ]
+
+    for selector in selectors:
+        for node in soup.select(selector):
+            text = _clean_ingredient_text(node.get_text(" ", strip=True))
+            if _looks_like_ingredient(text) and text not in ingredients:
+                ingredients.append(text)
+
+    if ingredients:
+        return ingredients[:25]
+
+    # --- Strategy 3: constrained fallback ---
+    # Restrict to containers likely related to ingredient blocks.
+    fallback_selectors = [
+        '[class*="ingredient"] li',
+        '[id*="ingredient"] li',
+        '[class*="recipe"] [class*="ingredient"] li',
+        "section.ingredients li",
+        "div.ingredients li",
+    ]
+    for selector in fallback_selectors:
+        for li in soup.select(selector):
+            text = _clean_ingredient_text(li.get_text(" ", strip=True))
+            if _looks_like_ingredient(text) and text not in ingredients:
+                ingredients.append(text)
+
+    return ingredients[:25]
+
+
 def fetch_ingredients_from_page(url: str) -> List[str]:
     """
     Fetch a recipe page and try to extract ingredients.
@@ -241,85 +326,14 @@ def fetch_ingredients_from_page(url: str) -> List[str]:
     but it is much better than always returning [].
     """
     try:
-        resp = requests.get(url, headers=UA, timeout=12, allow_redirects=True)
+        resp = get_session("pages").get(url, headers=UA, timeout=12, allow_redirects=True)
         resp.raise_for_status()
     except Exception:
         return []
 
     try:
-        # Be explicit about decoding to reduce mojibake on badly-declared pages.
-        if not resp.encoding:
-            resp.encoding = resp.apparent_encoding or "utf-8"
-        soup = BeautifulSoup(resp.content, "html.parser", from_encoding=resp.encoding)
-        if _looks_like_blocked_page(soup):
-            return []
-        ingredients: List[str] = []
-
-        # --- Strategy 1: schema.org Recipe JSON-LD ---
-        for script in soup.find_all("script", type="application/ld+json"):
-            raw = script.string or script.get_text(strip=True)
-            if not raw:
-                continue
-
-            try:
-                data = json.loads(raw)
-            except Exception:
-                continue
-
-            for node in _extract_recipe_nodes_from_jsonld(data):
-                recipe_ingredients = node.get("recipeIngredient") or node.get("ingredients") or []
-                if isinstance(recipe_ingredients, list):
-                    for item in recipe_ingredients:
-                        if isinstance(item, str):
-                            cleaned = _clean_ingredient_text(item)
-                            if cleaned and cleaned not in ingredients:
-                                ingredients.append(cleaned)
-                elif isinstance(recipe_ingredients, str):
-                    cleaned = _clean_ingredient_text(recipe_ingredients)
-                    if cleaned and cleaned not in ingredients:
-                        ingredients.append(cleaned)
-
-        if ingredients:
-            return ingredients[:25]
-
-        # --- Strategy 2: common ingredient selectors on recipe sites ---
-        selectors = [
-            '[itemprop="recipeIngredient"]',
-            ".ingredient",
-            ".ingredients-item",
-            ".ingredients-item-name",
-            ".recipe-ingredients li",
-            ".ingredients li",
-            "ul.ingredients li",
-            "ol.ingredients li",
-        ]
-
-        for selector in selectors:
-            for node in soup.select(selector):
-                text = _clean_ingredient_text(node.get_text(" ", strip=True))
-                if _looks_like_ingredient(text) and text not in ingredients:
-                    ingredients.append(text)
-
-        if ingredients:
-            return ingredients[:25]
-
-        # --- Strategy 3: constrained fallback ---
-        # Restrict to containers likely related to ingredient blocks.
-        fallback_selectors = [
-            '[class*="ingredient"] li',
-            '[id*="ingredient"] li',
-            '[class*="recipe"] [class*="ingredient"] li',
-            "section.ingredients li",
-            "div.ingredients li",
-        ]
-        for selector in fallback_selectors:
-            for li in soup.select(selector):
-                text = _clean_ingredient_text(li.get_text(" ", strip=True))
-                if _looks_like_ingredient(text) and text not in ingredients:
-                    ingredients.append(text)
-
-        return ingredients[:25]
-
+        with timed(STAGE_SECONDS, stage="webrecipes_parse"):
+            return _parse_ingredients(resp)
     except Exception:
         return []
 
@@ -346,19 +360,24 @@ def discover_recipes_from_web(
     cutoff = now - timedelta(days=CACHE_TTL_DAYS)
 
     # --- 1) Try cache first ---
-    existing: Optional[WebRecipeCache] = (
-        WebRecipeCache.query
-        .filter_by(key=cache_key)
-        .order_by(WebRecipeCache.created_at.desc())
-        .first()
-    )
+    compactor.ensure_started()
+    with timed(STAGE_SECONDS, stage="webrecipes_cache_read"):
+        existing: Optional[WebRecipeCache] = (
+            WebRecipeCache.query
+            .filter_by(key=cache_key)
+            .order_by(WebRecipeCache.created_at.desc())
+            .first()
+        )
 
     if existing and existing.created_at >= cutoff:
         try:
-            cached_items = json.loads(existing.items_json)
+            cached_items = decode_items(existing)
+            cache_lookup("web_recipes", "hit")
+            touch(existing, now)
             return cached_items[:limit]
         except Exception:
             pass
+    cache_lookup("web_recipes", "stale" if existing else "miss")
 
     # --- 2) Build query string for Google ---
     # Preserve user input order while deduplicating.
@@ -375,12 +394,14 @@ def discover_recipes_from_web(
         query += f" {cuisine.strip().lower()}"
 
     # --- 3) Call Google CSE ---
+    from requests import HTTPError
+
     try:
         raw_items = _google_search(query, count=limit, start=start)
-    except requests.HTTPError as e:
+    except HTTPError as e:
         if existing:
             try:
-                cached_items = json.loads(existing.items_json)
+                cached_items = decode_items(existing)
                 return cached_items[:limit]
             except Exception:
                 pass
@@ -407,7 +428,7 @@ def discover_recipes_from_web(
         )
 
     # Fetch ingredients concurrently to reduce total latency.
-    with ThreadPoolExecutor(max_workers=4) as executor:
+    with timed(STAGE_SECONDS, stage="webrecipes_fetch_pages"), ThreadPoolExecutor(max_workers=4) as executor:
         future_map = {
             executor.submit(fetch_ingredients_from_page, item["url"]): item
             for item in candidates
@@ -424,21 +445,14 @@ def discover_recipes_from_web(
     results.sort(key=lambda x: x.get("score", 0.0), reverse=True)
     results = results[:limit]
 
-    # --- 5) Save / update cache in SQLite (best-effort) ---
-    try:
-        payload = json.dumps(results, ensure_ascii=False)
-        if existing:
-            existing.items_json = payload
-            existing.created_at = now
-        else:
-            cache_row = WebRecipeCache(
-                key=cache_key,
-                items_json=payload,
-                created_at=now,
-            )
-            db.session.add(cache_row)
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
+    # --- 5) Save / update cache in SQLite (best-effort, off the request path) ---
+    write_behind(_upsert_cache, cache_key, encode_items(results), now)
+    # ...and keep the good ones as local recipes (see services/catalog.py)
+    promote_web_recipes(results, cuisine)
+
+    return results
+
 
-    return results
\ No newline at end of file
+def _upsert_cache(cache_key: str, payload: bytes, now: datetime):
+    with timed(STAGE_SECONDS, stage="webrecipes_cache_write"):
+        upsert(cache_key, payload, now)
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Recipe, db
+from services import catalog, webcache
+from services.catalog import canonical_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("http://www.Example.com/Recipes/Stew/", "https://example.com/Recipes/Stew"),
+    ("https://example.com//recipes//stew#method", "https://example.com/recipes/stew"),
+    ("https://example.com/stew?utm_source=x&b=2&fbclid=y&a=1", "https://example.com/stew?a=1&b=2"),
+    ("https://example.com:443/stew", "https://example.com/stew"),
+    ("https://example.com:8080/stew", "https://example.com:8080/stew"),
+    ("https://example.com", "https://example.com/"),
+    ("  https://example.com/stew?ref=home  ", "https://example.com/stew"),
+    ("ftp://example.com/stew", None),
+    ("/recipes/stew", None),
+    ("", None),
+    ("http://[::1", None),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def _item(url, name="Beef Stew - Example Kitchen", extra=None):
+    ingredients = ["500 g beef", "2 carrots", "1 onion", "1 tbsp oil"] + (extra or [])
+    return {"url": url, "name": name, "ingredients": ingredients, "instructions": ["Brown.", " Simmer. "]}
+
+
+def _promoted():
+    return Recipe.query.filter(Recipe.source_url.isnot(None)).order_by(Recipe.id).all()
+
+
+def _outcomes(monkeypatch):
+    counts = {}
+
+    def inc(result):
+        counts[result] = counts.get(result, 0) + 1
+
+    monkeypatch.setattr(catalog.PROMOTED, "inc", inc)
+    return counts
+
+
+def test_promote_batch_dedupes_by_canonical_url(app, monkeypatch):
+    counts = _outcomes(monkeypatch)
+    catalog._promote_batch([
+        _item("http://www.example.com/stew/?utm_source=feed"),
+        _item("https://example.com/stew#comments"),
+        {"url": "https://example.com/list", "name": "Links", "ingredients": ["beef", "carrots", "onion"]},
+    ], "italian")
+    db.session.commit()
+
+    [recipe] = _promoted()
+    assert recipe.source_url == "https://example.com/stew"
+    assert (recipe.name, recipe.cuisine, recipe.steps) == ("Beef Stew", "Italian", "Brown.\nSimmer.")
+    assert [i.name for i in recipe.ingredients] == ["beef", "carrot", "onion", "oil"]
+    assert counts == {"created": 1, "skipped": 2}
+
+
+def test_repromoted_page_updates_in_place(app, monkeypatch):
+    counts = _outcomes(monkeypatch)
+    catalog._promote_batch([_item("https://example.com/stew")], "italian")
+    db.session.commit()
+    better = _item("https://www.example.com/stew/", name="Better Stew", extra=["1 leek"])
+    catalog._promote_batch([better], None)
+    db.session.commit()
+
+    [recipe] = _promoted()
+    assert (recipe.name, recipe.cuisine) == ("Better Stew", "Italian")
+    assert [i.name for i in recipe.ingredients][-1] == "leek"
+    assert counts == {"created": 1, "updated": 1}
+
+
+def test_promote_cached_web_recipes_prefers_newest_copy(app):
+    now = datetime.utcnow()
+    webcache.upsert("beef,carrot|french|p1", webcache.encode_items([
+        _item("https://example.com/stew", name="Old Stew"),
+        _item("https://example.com/ragout", name="Ragout"),
+    ]), now - timedelta(days=1))
+    webcache.upsert("beef,carrot|", webcache.encode_items([
+        _item("https://www.example.com/stew/", name="New Stew"),
+        "not a dict",
+    ]), now)
+    db.session.commit()
+
+    assert catalog.promote_cached_web_recipes() == {"created": 2, "updated": 0, "skipped": 2}
+    assert [(r.name, r.cuisine) for r in _promoted()] == [("New Stew", None), ("Ragout", "French")]
+
+    assert catalog.promote_cached_web_recipes() == {"created": 0, "updated": 2, "skipped": 2}
+    assert len(_promoted()) == 2
@@ -0,0 +1,46 @@
+import threading
+import time
+
+import pytest
+
+from services.jobs import JobQueue, QueueFull
+
+
+def test_drain_waits_for_jobs_that_finish_in_time():
+    queue = JobQueue("test-drain", max_workers=2)
+    jobs = [queue.submit("work", lambda job, n=n: n * 2) for n in range(3)]
+
+    assert queue.drain(timeout=5) == 0
+    assert [(j.status, j.result) for j in jobs] == [("done", 0), ("done", 2), ("done", 4)]
+
+
+def test_drain_fails_jobs_left_unfinished():
+    release = threading.Event()
+    queue = JobQueue("test-drain", max_workers=1)
+    running = queue.submit("work", lambda job: release.wait(5) and "late")
+    queued = queue.submit("work", lambda job: "never")
+
+    assert queue.drain(timeout=0.2) == 2
+    for job in (running, queued):
+        assert job.status == "error"
+        assert job.error == "cancelled: server shutting down"
+        assert job.finished_at is not None
+
+    # The running job completes afterwards but keeps its cancelled outcome
+    release.set()
+    time.sleep(0.2)
+    assert running.status == "error" and running.result is None
+    stats = queue.stats()
+    assert (stats["completed"], stats["failed"]) == (0, 2)
+
+
+def test_drain_keeps_finished_results_and_refuses_new_jobs():
+    queue = JobQueue("test-drain", max_workers=1)
+    failed = queue.submit("work", lambda job: 1 / 0)
+    time.sleep(0.1)
+
+    queue.drain(timeout=1)
+
+    assert failed.status == "error" and "division by zero" in failed.error
+    with pytest.raises(QueueFull, match="shutting down"):
+        queue.submit("work", lambda job: None)
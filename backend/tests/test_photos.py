@@ -0,0 +1,97 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from services import photos
+
+NAME = "places/abc/photos/ref1"
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(photos, "PHOTO_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(photos, "_last_evict", 0.0)
+    return tmp_path
+
+
+def _jpeg(width=1000, color=(200, 80, 40)) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, width // 2), color).save(out, "JPEG")
+    return out.getvalue()
+
+
+def _age(path, seconds):
+    st = path.stat()
+    os.utime(path, (st.st_atime - seconds, st.st_mtime - seconds))
+
+
+def test_store_and_lookup(cache_dir):
+    obj = photos._store(NAME, "400.jpg", b"thumb", "jpg")
+    _age(obj, 100)
+    before = obj.stat().st_mtime
+
+    assert photos._lookup(NAME, "400.jpg") == obj
+    assert obj.stat().st_mtime > before
+    assert photos._lookup(NAME, "160.jpg") is None
+
+
+def test_lookup_drops_ref_of_evicted_object(cache_dir):
+    obj = photos._store(NAME, "400.jpg", b"thumb", "jpg")
+    obj.unlink()
+
+    assert photos._lookup(NAME, "400.jpg") is None
+    assert not photos._ref_path(NAME, "400.jpg").exists()
+
+
+def test_eviction_removes_oldest_objects_and_their_refs(cache_dir, monkeypatch):
+    monkeypatch.setattr(photos, "PHOTO_CACHE_MAX_MB", 1)
+    blob = 400 * 1024
+    old = photos._store("places/a/photos/old", "orig", b"o" * blob, "jpg")
+    new = photos._store("places/a/photos/new", "orig", b"n" * blob, "jpg")
+    _age(old, 1000)
+    photos._store("places/a/photos/newest", "orig", b"x" * blob, "jpg")
+
+    photos._last_evict = 0.0
+    photos._maybe_evict(min_interval=0)
+
+    assert not old.exists()
+    assert new.exists()
+    assert not photos._ref_path("places/a/photos/old", "orig").exists()
+    assert photos._ref_path("places/a/photos/new", "orig").exists()
+
+
+def test_get_photo_resizes_cached_original(cache_dir, monkeypatch):
+    photos._store(NAME, "orig", _jpeg(), "jpg")
+    monkeypatch.setattr(photos, "_fetch_original", lambda name: pytest.fail("should not refetch"))
+
+    path, mimetype, etag = photos.get_photo(photos.photo_proxy_path(NAME).rsplit("/", 1)[1], 160)
+
+    assert mimetype == "image/jpeg"
+    assert path.name.startswith(etag)
+    with Image.open(path) as img:
+        assert img.width == 160
+
+
+def test_get_photo_refetches_original_evicted_after_lookup(cache_dir, monkeypatch):
+    fetched = []
+
+    def fetch(name):
+        fetched.append(name)
+        return _jpeg(), "jpg"
+
+    missing = cache_dir / "objects" / "gone.jpg"
+    real_lookup = photos._lookup
+
+    def lookup(name, variant):
+        # The original is found, then evicted before it is read
+        return missing if variant == "orig" else real_lookup(name, variant)
+
+    monkeypatch.setattr(photos, "_lookup", lookup)
+    monkeypatch.setattr(photos, "_fetch_original", fetch)
+
+    path, _, _ = photos.get_photo(photos.photo_proxy_path(NAME).rsplit("/", 1)[1], 400, "image/webp")
+
+    assert fetched == [NAME]
+    assert path.exists() and path.suffix == ".webp"
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from models import GeocodeCache, PlacesTileCache, db
+from services import places
+from services.geo import geohash_bbox, geohash_encode
+
+TILE = geohash_encode(40.7128, -74.0060, places.PLACES_TILE_PRECISION)
+_LAT_LO, _LAT_HI, _LNG_LO, _LNG_HI = geohash_bbox(TILE)
+# Opposite corners of the same tile (~1.3 km apart at precision 6)
+LAT, LNG = _LAT_LO + 1e-6, _LNG_LO + 1e-6
+FAR_LAT, FAR_LNG = _LAT_HI - 1e-6, _LNG_HI - 1e-6
+
+
+def _store(radius_m, lat=LAT, lng=LNG, pages=1, places_json="[]"):
+    places._upsert_tile_cache("thai", TILE, lat, lng, radius_m, pages, places_json)
+    db.session.commit()
+
+
+def test_padded_fetch_covers_nearby_origins(app):
+    assert geohash_encode(FAR_LAT, FAR_LNG, places.PLACES_TILE_PRECISION) == TILE
+    _store(places._fetch_radius_m(TILE, 2000))
+
+    assert places._read_tile_cache("thai", TILE, LAT, LNG, 2000) is not None
+    assert places._read_tile_cache("thai", TILE, FAR_LAT, FAR_LNG, 2000) is not None
+
+
+def test_miss_when_circle_not_covered(app):
+    _store(2000)
+
+    assert places._read_tile_cache("thai", TILE, LAT, LNG, 2000) is not None
+    assert places._read_tile_cache("thai", TILE, FAR_LAT, FAR_LNG, 2000) is None
+    assert places._read_tile_cache("thai", TILE, LAT, LNG, 2000, pages=2) is None
+    assert places._read_tile_cache("italian", TILE, LAT, LNG, 500) is None
+
+
+def test_legacy_row_without_origin_assumes_worst_spot(app):
+    _store(2000)
+    row = PlacesTileCache.query.one()
+    row.lat = row.lng = None
+    db.session.commit()
+
+    assert places._read_tile_cache("thai", TILE, LAT, LNG, 2000) is None
+    assert places._read_tile_cache("thai", TILE, LAT, LNG, 500) is not None
+
+
+def test_expired_entry_misses(app):
+    _store(5000)
+    PlacesTileCache.query.one().created_at = datetime.utcnow() - timedelta(
+        hours=places.PLACES_CACHE_TTL_HOURS + 1
+    )
+    db.session.commit()
+
+    assert places._read_tile_cache("thai", TILE, LAT, LNG, 500) is None
+
+
+def test_narrower_miss_keeps_wider_entry(app):
+    _store(5000, places_json='[{"id": "wide"}]')
+    _store(2000, places_json='[{"id": "narrow"}]')
+
+    row = PlacesTileCache.query.one()
+    assert (row.radius_m, row.places_json) == (5000, '[{"id": "wide"}]')
+
+    # Once the wide entry has expired it is replaced
+    row.created_at = datetime.utcnow() - timedelta(hours=places.PLACES_CACHE_TTL_HOURS + 1)
+    db.session.commit()
+    _store(2000, places_json='[{"id": "narrow"}]')
+    assert PlacesTileCache.query.one().radius_m == 2000
+
+
+def test_miss_fetches_padded_radius_and_filters_to_callers(app, monkeypatch):
+    calls = []
+
+    def fake_fetch(cuisine, lat, lng, radius_m, pages=1):
+        calls.append(radius_m)
+        near = {"id": "near", "location": {"latitude": LAT + 0.001, "longitude": LNG}}
+        far = {"id": "far", "location": {"latitude": LAT + 0.03, "longitude": LNG}}
+        return [near, far], None
+
+    monkeypatch.setattr(places, "GOOGLE_KEY", "test")
+    monkeypatch.setattr(places, "_fetch_places", fake_fetch)
+    monkeypatch.setattr(places, "_write_tile_cache", lambda *args: None)
+
+    result = places.search_restaurants("Thai", LAT, LNG, radius=1000)
+
+    assert calls == [places._fetch_radius_m(TILE, 1000)]
+    assert [r["place_id"] for r in result["results"]] == ["near"]
+
+
+def _geocode_falls_back_to_upstream(monkeypatch):
+    upstream = {"lat": 1.0, "lng": 2.0, "formatted_address": "Somewhere"}
+    monkeypatch.setattr(places, "_geocode_google", lambda address: upstream)
+    monkeypatch.setattr(places, "_write_geocode_cache", lambda *args: None)
+    return places.geocode_address("Somewhere") == upstream
+
+
+def test_geocode_corrupt_cache_row_falls_back_to_upstream(app, monkeypatch):
+    db.session.add(GeocodeCache(key=places._normalize_address("Somewhere"), result_json="{not json"))
+    db.session.commit()
+    assert _geocode_falls_back_to_upstream(monkeypatch)
+
+    db.session.execute(text("UPDATE geocode_cache SET result_json = '{}', created_at = 'garbage'"))
+    db.session.commit()
+    db.session.expunge_all()
+    assert _geocode_falls_back_to_upstream(monkeypatch)
+
+
+def test_geocode_cache_db_error_falls_back_to_upstream(app, monkeypatch):
+    db.session.execute(text("DROP TABLE geocode_cache"))
+    db.session.commit()
+    assert _geocode_falls_back_to_upstream(monkeypatch)
@@ -0,0 +1,89 @@
+import pytest
+
+from models import Recipe, RecipeIngredient, db
+from services import search
+from services.search import build_match_query, ensure_search_index, search_recipes
+
+
+def _recipe(name, cuisine, ingredients, steps=""):
+    recipe = Recipe(name=name, cuisine=cuisine, steps=steps)
+    recipe.ingredients = [RecipeIngredient(name=n, qty="1") for n in ingredients]
+    db.session.add(recipe)
+    db.session.commit()
+    return recipe.id
+
+
+@pytest.fixture
+def catalog(app):
+    return {
+        "stew": _recipe("Zorblat Stew", "Quuxian", ["zorblat", "quibberroot"], "Simmer slowly."),
+        "salad": _recipe("Green Salad", "Quuxian", ["lettuce", "quibberroot"], "Toss with zorblat oil."),
+        "pie": _recipe("Quibber Pie", "Frobnian", ["quibberroot", "flour"], "Bake."),
+    }
+
+
+@pytest.fixture(params=["fts", "like"])
+def backend(request, monkeypatch):
+    if request.param == "like":
+        monkeypatch.setattr(search, "_is_sqlite", lambda: False)
+    return request.param
+
+
+def _ids(results):
+    return {r["id"] for r in results}
+
+
+def test_build_match_query_quotes_terms():
+    assert build_match_query('Tom* "OR" -basil', "all") == '"tom"* AND "or"* AND "basil"*'
+    assert build_match_query("tom basil tom", "any") == '"tom"* OR "basil"*'
+    assert build_match_query("  !! ") == ""
+
+
+def test_match_all_and_any(catalog, backend):
+    assert _ids(search_recipes("zorblat quibberroot")) == {catalog["stew"], catalog["salad"]}
+    assert _ids(search_recipes("lettuce flour", match="any")) == {catalog["salad"], catalog["pie"]}
+    assert search_recipes("lettuce flour") == []
+
+
+def test_prefix_terms_and_cuisine_filter(catalog, backend):
+    assert _ids(search_recipes("quibb")) == set(catalog.values())
+    assert _ids(search_recipes("quibb", cuisine="frobnian")) == {catalog["pie"]}
+    # No terms: the cuisine is listed by name
+    assert [r["name"] for r in search_recipes("", cuisine="QUUXIAN")] == ["Green Salad", "Zorblat Stew"]
+
+
+def test_result_fields(catalog, backend):
+    [hit] = search_recipes("flour")
+    assert hit["id"] == catalog["pie"]
+    assert hit["required_ingredients"] == ["quibberroot", "flour"]
+    assert hit["steps"] == "Bake." and hit["cuisine"] == "Frobnian" and hit["source_url"] is None
+
+
+def test_fts_ranks_name_matches_first(catalog):
+    results = search_recipes("zorblat")
+    assert [r["id"] for r in results] == [catalog["stew"], catalog["salad"]]
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_triggers_keep_index_in_sync(catalog):
+    pie = db.session.get(Recipe, catalog["pie"])
+    pie.name = "Blorple Tart"
+    pie.ingredients = [i for i in pie.ingredients if i.name != "flour"]
+    pie.ingredients.append(RecipeIngredient(name="snargleberry", qty="2"))
+    db.session.commit()
+    assert _ids(search_recipes("blorple snargleberry")) == {catalog["pie"]}
+    assert search_recipes("flour") == []
+    assert search_recipes("pie") == []
+
+    db.session.delete(pie)
+    db.session.commit()
+    assert search_recipes("blorple") == []
+
+
+def test_ensure_search_index_rebuilds_when_out_of_step(catalog):
+    db.session.execute(db.text("DELETE FROM recipes_fts"))
+    db.session.commit()
+    assert search_recipes("zorblat") == []
+
+    ensure_search_index()
+    assert _ids(search_recipes("zorblat")) == {catalog["stew"], catalog["salad"]}
@@ -0,0 +1,69 @@
+import pytest
+
+from models import Recipe, RecipeIngredient, db
+from services.ingredients import parse_quantity
+from services.recipes import get_shopping_plan
+
+
+@pytest.mark.parametrize("qty, expected", [
+    ("1,000 g", (1000.0, "g")),
+    ("2,250 ml", (2250.0, "ml")),
+    ("1,000,000 g", (1000000.0, "g")),
+    ("1,000.5 g", (1000.5, "g")),
+    ("1,5 kg", (1.5, "kg")),
+    ("12,5 g", (12.5, "g")),
+    ("1.5 kg", (1.5, "kg")),
+    ("1 1/2 cups", (1.5, "cup")),
+    ("1½ cups", (1.5, "cup")),
+    ("2-3 cloves", (3.0, "clove")),
+])
+def test_parse_quantity(qty, expected):
+    assert parse_quantity(qty) == expected
+
+
+def _recipe(name, *ingredients):
+    recipe = Recipe(name=name, cuisine="test")
+    recipe.ingredients = [RecipeIngredient(name=n, qty=q) for n, q in ingredients]
+    db.session.add(recipe)
+    db.session.commit()
+    return recipe.id
+
+
+def _by_ingredient(items):
+    return {item.ingredient: item for item in items}
+
+
+def test_shopping_plan_merges_units(app):
+    first = _recipe("First", ("flour", "1,000 g"), ("olive oil", "1 tbsp"), ("garlic", "2 cloves"))
+    second = _recipe("Second", ("Flour", "500 g"), ("olive oil", "1 tsp"), ("salt", "to taste"))
+
+    items, missing = get_shopping_plan([first, second, 999999], [])
+    items = _by_ingredient(items)
+
+    assert missing == [999999]
+    assert items["flour"].qty == "1.5 kg"
+    assert [(q.amount, q.unit) for q in items["flour"].quantities] == [(1500.0, "g")]
+    assert items["flour"].recipe_ids == [first, second]
+    # tbsp + tsp only add up in ml
+    assert [(q.amount, q.unit) for q in items["olive oil"].quantities] == [(19.716, "ml")]
+    assert items["garlic"].qty == "2 cloves"
+    assert items["salt"].quantities == [] and items["salt"].unparsed == ["to taste"]
+
+
+def test_shopping_plan_keeps_a_single_unit_and_counts_repeats(app):
+    recipe = _recipe("Soup", ("olive oil", "1 tbsp"), ("carrot", "2"))
+
+    items, _ = get_shopping_plan([recipe, recipe], [])
+    items = _by_ingredient(items)
+
+    assert [(q.amount, q.unit) for q in items["olive oil"].quantities] == [(2.0, "tbsp")]
+    assert items["olive oil"].qty == "2 tbsp"
+    assert items["carrot"].qty == "4"
+
+
+def test_shopping_plan_leaves_out_pantry_items(app):
+    recipe = _recipe("Salad", ("Tomatoes", "3"), ("olive oil", "1 tbsp"))
+
+    items, _ = get_shopping_plan([recipe], ["tomato", " "])
+
+    assert [item.ingredient for item in items] == ["olive oil"]
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect
+
+from models import WebRecipeCache, db
+from services import webcache
+
+
+def _gauges():
+    return {k: v for k, v in webcache._gauges.items() if k != "created_sum"}
+
+
+def test_upsert_keeps_one_row_per_key(app):
+    now = datetime.utcnow()
+    webcache.upsert("beef,egg|", webcache.encode_items([{"name": "a"}]), now - timedelta(hours=1))
+    db.session.commit()
+    webcache.upsert("beef,egg|", webcache.encode_items([{"name": "b"}]), now)
+    db.session.commit()
+
+    rows = WebRecipeCache.query.all()
+    assert len(rows) == 1
+    assert webcache.decode_items(rows[0]) == [{"name": "b"}]
+    assert rows[0].created_at == now
+
+
+def test_gauges_follow_committed_writes_only(app):
+    webcache.refresh_gauges()
+    payload = webcache.encode_items([{"name": "a"}])
+
+    webcache.upsert("egg|", payload, datetime.utcnow())
+    db.session.rollback()
+    assert _gauges() == {"rows": 0, "bytes": 0}
+
+    webcache.upsert("egg|", payload, datetime.utcnow())
+    db.session.commit()
+    webcache.upsert("egg|", payload + b"x", datetime.utcnow())
+    db.session.commit()
+    expected = dict(_gauges())
+    webcache.refresh_gauges()
+    assert _gauges() == expected == {"rows": 1, "bytes": len(payload) + 1 + len("egg|")}
+
+
+def test_ensure_unique_keys_dedupes_legacy_table(app):
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_web_recipe_cache_key")
+        conn.exec_driver_sql("CREATE INDEX ix_web_recipe_cache_key ON web_recipe_cache (key)")
+        for day, items in ((1, "[1]"), (3, "[3]"), (2, "[2]")):
+            conn.exec_driver_sql(
+                "INSERT INTO web_recipe_cache (key, items_json, created_at) VALUES (?, ?, ?)",
+                ("tofu|", items, datetime(2026, 1, day)),
+            )
+
+    assert webcache.ensure_unique_keys() == 2
+    assert [webcache.decode_items(r) for r in WebRecipeCache.query.all()] == [[3]]
+    indexes = inspect(db.engine).get_indexes("web_recipe_cache")
+    assert [i["unique"] for i in indexes if i["column_names"] == ["key"]] == [1]
+    assert webcache.ensure_unique_keys() == 0
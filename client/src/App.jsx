@@ -273,6 +273,7 @@ function RecipeModal({
   const [cookingGuide, setCookingGuide] = useState(null);
   const [cookingLoading, setCookingLoading] = useState(false);
   const [cookingError, setCookingError] = useState(null);
+  const [streamedSteps, setStreamedSteps] = useState([]);
 
   if (!recipe) return null;
 
@@ -285,9 +286,38 @@ function RecipeModal({
     }
   };
 
+  // Read the SSE response: show each "step" as it arrives, return the "done" payload
+  const readGuideStream = async (res) => {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let done = null;
+    while (true) {
+      const { value, done: finished } = await reader.read();
+      if (finished) break;
+      buffer += decoder.decode(value, { stream: true });
+      const blocks = buffer.split("\n\n");
+      buffer = blocks.pop();
+      for (const block of blocks) {
+        const event = block.match(/^event: (.*)$/m)?.[1];
+        const data = block.match(/^data: (.*)$/m)?.[1];
+        if (!event || !data) continue;
+        const payload = JSON.parse(data);
+        if (event === "step") {
+          setStreamedSteps((prev) => [...prev, payload.step]);
+        } else if (event === "done") {
+          done = payload;
+          setStreamedSteps(payload.enhanced_steps?.steps || []);
+        }
+      }
+    }
+    return done;
+  };
+
   const handleGenerateVideo = async () => {
     setCookingLoading(true);
     setCookingError(null);
+    setStreamedSteps([]);
     try {
       const res = await fetch("http://localhost:5001/api/generate-cooking-guide", {
         method: "POST",
@@ -296,13 +326,35 @@ function RecipeModal({
           recipe_name: recipe.name || "Unknown Recipe",
           ingredients: recipe.required_ingredients || [],
           steps: recipe.steps ? [recipe.steps] : [],
+          stream: true,
         }),
       });
-      const data = await res.json();
-      if (data.success) {
+      const data = res.ok ? await readGuideStream(res) : await res.json();
+      if (!data || !data.success) {
+        setCookingError(data?.error || "Generation failed, please try again");
+        return;
+      }
+      if (data.video_error) {
+        setCookingError(data.video_error);
+        return;
+      }
+      if (data.video_url || !data.job_id) {
         setCookingGuide(data);
-      } else {
-        setCookingError(data.error || "Generation failed, please try again");
+        return;
+      }
+      // Video renders in the background; poll the job until it has a URL
+      while (true) {
+        await new Promise((resolve) => setTimeout(resolve, 1500));
+        const jobRes = await fetch(`http://localhost:5001/api/jobs/${data.job_id}`);
+        const job = await jobRes.json();
+        if (job.status === "done") {
+          setCookingGuide({ ...data, video_url: job.result?.video_url });
+          return;
+        }
+        if (job.status === "error" || !jobRes.ok) {
+          setCookingError(job.error || "Video generation failed, please try again");
+          return;
+        }
       }
     } catch (err) {
       setCookingError("Request failed: " + err.message);
@@ -312,7 +364,7 @@ function RecipeModal({
   };
 
   return (
-    <Modal show={show} onHide={() => { setCookingGuide(null); setCookingError(null); handleClose(); }} size="lg" centered>
+    <Modal show={show} onHide={() => { setCookingGuide(null); setCookingError(null); setStreamedSteps([]); handleClose(); }} size="lg" centered>
       <Modal.Header closeButton className="border-0">
         <Modal.Title className="fw-bold">{recipe.name}</Modal.Title>
       </Modal.Header>
@@ -402,11 +454,11 @@ function RecipeModal({
           <div className="alert alert-danger mt-3">{cookingError}</div>
         )}
 
-        {cookingGuide && cookingGuide.enhanced_steps?.steps?.length > 0 && (
+        {streamedSteps.length > 0 && (
           <Row className="mt-4">
             <Col>
               <h5 className="border-bottom pb-2">📋 Detailed Steps</h5>
-              {cookingGuide.enhanced_steps.steps.map((step, idx) => (
+              {streamedSteps.map((step, idx) => (
                 <div key={idx} className="mb-3 p-3 border rounded">
                   <strong>Step {step.step_num}: {step.title}</strong>
                   <p className="mb-1 mt-1">{step.description}</p>
@@ -419,7 +471,7 @@ function RecipeModal({
       </Modal.Body>
 
       <Modal.Footer className="border-0">
-        <Button variant="outline-secondary" onClick={() => { setCookingGuide(null); setCookingError(null); handleClose(); }}>
+        <Button variant="outline-secondary" onClick={() => { setCookingGuide(null); setCookingError(null); setStreamedSteps([]); handleClose(); }}>
           Close
         </Button>
         <Button
@@ -780,12 +832,43 @@ function App() {
         },
         { signal: controller.signal }
       );
-      let results = res.data.recipes || [];
+      // Recipes promoted from web results link back to their page
+      const withSource = (r) => (r.source_url ? { ...r, sourceUrl: r.source_url } : r);
+      let results = (res.data.recipes || []).map(withSource);
+
+      // Full-text local search (names, steps, partial ingredient names)
+      // catches recipes the exact-overlap recommender misses.
+      if (results.length < PAGE_SIZE && normalizedPantry.length >= 1) {
+        try {
+          const searchRes = await axios.get(`${API_BASE}/recipes/search`, {
+            params: { q: normalizedPantry.join(" "), match: "any", limit: 50 },
+            signal: controller.signal,
+          });
+          const seen = new Set(results.map((r) => r.id));
+          const pantrySet = new Set(normalizedPantry);
+          (searchRes.data.recipes || []).forEach((item) => {
+            if (seen.has(item.id)) return;
+            seen.add(item.id);
+            const required = item.required_ingredients || [];
+            const have = required.filter((name) => pantrySet.has(name)).length;
+            results.push({
+              ...withSource(item),
+              match_ratio: required.length ? Math.round((have / required.length) * 100) / 100 : 0,
+            });
+          });
+        } catch (e) {
+          if (e?.name !== "CanceledError" && e?.code !== "ERR_CANCELED") {
+            console.log("Local search failed", e);
+          }
+        }
+      }
       // Show fast local results first.
       setRecipes(results.slice(0, 50));
 
-      // Web parsing is expensive: skip when pantry is too small.
-      if (results.length < 50 && normalizedPantry.length >= 1) {
+      // Web parsing is expensive: skip when pantry is too small or when the
+      // local catalog already fills the first page (refreshes still page
+      // through web results).
+      if ((webStart > 1 || results.length < PAGE_SIZE) && normalizedPantry.length >= 1) {
         const maxItems = 50;
 
         if (webRecipeCacheRef.current.has(pantryKey)) {
@@ -1669,7 +1752,7 @@ function App() {
                       {res.photo_url ? (
                         <Card.Img
                           variant="top"
-                          src={res.photo_url}
+                          src={res.photo_url.startsWith("/") ? `http://localhost:5001${res.photo_url}` : res.photo_url}
                           style={{ height: "160px", objectFit: "cover" }}
                           onError={(e) => { e.target.style.display = "none"; }}
                         />
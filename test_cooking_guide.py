@@ -25,7 +25,8 @@ def test_cooking_guide():
     payload = {
         "recipe_name": "番茄炒蛋",
         "ingredients": ["番茄", "鸡蛋", "盐", "油"],
-        "steps": ["打蛋", "炒番茄", "混合", "调味"]
+        "steps": ["打蛋", "炒番茄", "混合", "调味"],
+        "async": False
     }
 
     try: